@@ -0,0 +1,207 @@
+import os
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from core.config import Config
+from core.file_lock import FileLock, atomic_write_json
+from subscription.raw_storage import RawDataStorage
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pc = None
+    pq = None
+
+_TIMESTAMP = "timestamp[us, tz=UTC]"
+
+# 各类数据的列定义：(列名, 类型, 取值函数)
+_COLUMNS = {
+    "pull_requests": [
+        ("id", "int64", lambda item: item.get("id")),
+        ("number", "int64", lambda item: item.get("number")),
+        ("state", "string", lambda item: item.get("state")),
+        ("title", "string", lambda item: item.get("title")),
+        ("author", "string", lambda item: (item.get("user") or {}).get("login")),
+        ("created_at", _TIMESTAMP, lambda item: item.get("created_at")),
+        ("updated_at", _TIMESTAMP, lambda item: item.get("updated_at")),
+        ("closed_at", _TIMESTAMP, lambda item: item.get("closed_at")),
+        ("merged_at", _TIMESTAMP, lambda item: item.get("merged_at")),
+    ],
+    "issues": [
+        ("id", "int64", lambda item: item.get("id")),
+        ("number", "int64", lambda item: item.get("number")),
+        ("state", "string", lambda item: item.get("state")),
+        ("title", "string", lambda item: item.get("title")),
+        ("author", "string", lambda item: (item.get("user") or {}).get("login")),
+        ("created_at", _TIMESTAMP, lambda item: item.get("created_at")),
+        ("updated_at", _TIMESTAMP, lambda item: item.get("updated_at")),
+        ("closed_at", _TIMESTAMP, lambda item: item.get("closed_at")),
+    ],
+    "releases": [
+        ("id", "int64", lambda item: item.get("id")),
+        ("tag_name", "string", lambda item: item.get("tag_name")),
+        ("name", "string", lambda item: item.get("name")),
+        ("prerelease", "bool", lambda item: item.get("prerelease")),
+        ("created_at", _TIMESTAMP, lambda item: item.get("created_at")),
+        ("published_at", _TIMESTAMP, lambda item: item.get("published_at")),
+    ],
+}
+
+# 同一条目多次出现时用于保留最新版本的列
+VERSION_COLUMNS = {"pull_requests": "updated_at", "issues": "updated_at", "releases": "published_at"}
+
+
+def require_pyarrow():
+    """分析导出与查询依赖pyarrow，未安装时给出明确提示"""
+    if pa is None:
+        raise RuntimeError("分析导出需要安装pyarrow（pip install pyarrow）")
+
+
+def _arrow_type(type_name: str):
+    if type_name == _TIMESTAMP:
+        return pa.timestamp("us", tz="UTC")
+    return {"int64": pa.int64(), "string": pa.string(), "bool": pa.bool_()}[type_name]
+
+
+def schema_for(kind: str):
+    """返回某类数据的Arrow表结构（repo列在分区路径中，不写入文件）"""
+    require_pyarrow()
+    return pa.schema([(name, _arrow_type(type_name)) for name, type_name, _ in _COLUMNS[kind]])
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+class AnalyticsExporter:
+    """
+    分析数据导出器：把原始数据压实为按仓库/月份分区的Parquet列式文件
+
+    输出目录结构（Hive分区，可直接用pyarrow.dataset按分区裁剪读取）：
+        {analytics.output_dir}/{kind}/repo={owner__name}/month={YYYY-MM}/part.parquet
+
+    导出是增量的：根据原始数据清单的写入时间只处理上次导出后新增或重写的文件，
+    只重写受影响的分区，分区内同一条目只保留最新版本。
+    """
+
+    STATE_FILE = "_state.json"
+
+    def __init__(self, config: Config, raw_storage: Optional[RawDataStorage] = None):
+        self.logger = logging.getLogger(__name__)
+        self.output_dir = config.get("analytics.output_dir", "data/analytics")
+        self.raw_storage = raw_storage or RawDataStorage(config)
+        self.state_path = os.path.join(self.output_dir, self.STATE_FILE)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    @staticmethod
+    def partition_repo(repo_full_name: str) -> str:
+        """仓库名转为分区目录值（/ 替换为 __）"""
+        return repo_full_name.replace("/", "__")
+
+    def partition_path(self, kind: str, repo_full_name: str, month: str) -> str:
+        return os.path.join(
+            self.output_dir, kind, f"repo={self.partition_repo(repo_full_name)}", f"month={month}", "part.parquet"
+        )
+
+    def _load_state(self) -> Dict:
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _to_table(self, kind: str, items: List[Dict]):
+        """把条目列表转换为带类型的Arrow表"""
+        columns = {}
+        for name, type_name, getter in _COLUMNS[kind]:
+            values = [getter(item) for item in items]
+            if type_name == _TIMESTAMP:
+                values = [_parse_timestamp(value) for value in values]
+            columns[name] = pa.array(values, type=_arrow_type(type_name))
+        return pa.table(columns, schema=schema_for(kind))
+
+    @staticmethod
+    def _latest_versions(kind: str, table):
+        """按id去重，只保留版本列最大的一行（排序后取每个id的第一行）"""
+        if table.num_rows == 0:
+            return table
+        table = table.sort_by([("id", "ascending"), (VERSION_COLUMNS[kind], "descending")])
+        ids = table.column("id").combine_chunks()
+        previous = pa.concat_arrays([pa.array([None], type=pa.int64()), ids.slice(0, len(ids) - 1)])
+        first_of_id = pc.or_kleene(pc.is_null(previous), pc.not_equal(ids, previous))
+        return table.filter(first_of_id)
+
+    def _write_partition(self, kind: str, repo_full_name: str, month: str, items: List[Dict]) -> int:
+        """把新条目合并进分区文件（原子替换），返回分区行数"""
+        path = self.partition_path(kind, repo_full_name, month)
+        table = self._to_table(kind, items)
+        if os.path.exists(path):
+            table = pa.concat_tables([pq.read_table(path, schema=schema_for(kind)), table])
+        table = self._latest_versions(kind, table)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+        return table.num_rows
+
+    def export(self, full: bool = False) -> Dict[str, int]:
+        """
+        增量导出原始数据到分区Parquet文件
+
+        参数:
+            full: 是否忽略导出进度，重新处理全部原始数据
+
+        返回:
+            统计信息：处理的原始文件数、写入的分区数、写入的条目数
+        """
+        require_pyarrow()
+        with FileLock(self.state_path):
+            state = {} if full else self._load_state()
+            changed = self.raw_storage.manifest.changed_since(state.get("manifest_watermark"))
+            if not changed:
+                self.logger.info("没有需要导出的新原始数据")
+                return {"files": 0, "partitions": 0, "items": 0}
+
+            # (类别, 仓库, 月份) -> 条目列表
+            partitions: Dict[Tuple[str, str, str], List[Dict]] = defaultdict(list)
+            files = 0
+            # 水位线只推进到第一个读取失败的文件之前，失败的文件下次导出时重试
+            watermark = state.get("manifest_watermark")
+            failed = False
+            for rel_path, repo_full_name, data_date, updated_at in changed:
+                try:
+                    raw_data = self.raw_storage.load(os.path.join(self.raw_storage.raw_data_dir, rel_path))
+                except Exception as e:
+                    self.logger.warning(f"导出时读取 {rel_path} 失败，跳过: {str(e)}")
+                    failed = True
+                    continue
+                if not failed:
+                    watermark = updated_at
+                month = f"{data_date[:4]}-{data_date[4:6]}"
+                for kind in _COLUMNS:
+                    items = raw_data["data"].get(kind) or []
+                    if items:
+                        partitions[(kind, repo_full_name, month)].extend(items)
+                files += 1
+
+            items_written = 0
+            for (kind, repo_full_name, month), items in sorted(partitions.items()):
+                self._write_partition(kind, repo_full_name, month, items)
+                items_written += len(items)
+
+            state["manifest_watermark"] = watermark
+            state["exported_at"] = datetime.now().isoformat()
+            atomic_write_json(self.state_path, state, indent=2)
+
+        self.logger.info(f"分析数据导出完成：原始文件 {files} 个，分区 {len(partitions)} 个，条目 {items_written} 条")
+        return {"files": files, "partitions": len(partitions), "items": items_written}
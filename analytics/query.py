@@ -0,0 +1,136 @@
+import os
+import logging
+from typing import List, Optional
+from core.config import Config
+from .exporter import AnalyticsExporter, VERSION_COLUMNS, require_pyarrow, schema_for
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+    pc = None
+    ds = None
+
+
+class AnalyticsQuery:
+    """
+    分析查询助手：基于AnalyticsExporter导出的分区Parquet文件做向量化统计
+
+    读取时按repo/month分区裁剪，只扫描需要的文件；同一条目跨月份出现多个版本时只保留最新版本。
+    统计结果以pandas DataFrame返回（需要安装pandas）。
+    """
+
+    def __init__(self, config: Config):
+        require_pyarrow()
+        self.logger = logging.getLogger(__name__)
+        self.output_dir = config.get("analytics.output_dir", "data/analytics")
+
+    def load(self,
+             kind: str,
+             repos: Optional[List[str]] = None,
+             start_month: Optional[str] = None,
+             end_month: Optional[str] = None,
+             latest: bool = True):
+        """
+        读取某类数据为Arrow表（含repo和month分区列）
+
+        参数:
+            kind: pull_requests / issues / releases
+            repos: 可选，仓库全名过滤
+            start_month: 可选，起始月份（YYYY-MM，包含）
+            end_month: 可选，结束月份（YYYY-MM，包含）
+            latest: 是否按id只保留最新版本
+
+        返回:
+            pyarrow.Table
+        """
+        kind_dir = os.path.join(self.output_dir, kind)
+        partition_schema = pa.schema([("repo", pa.string()), ("month", pa.string())])
+        if not os.path.isdir(kind_dir):
+            return pa.table(
+                {field.name: pa.array([], type=field.type) for field in list(schema_for(kind)) + list(partition_schema)}
+            )
+
+        dataset = ds.dataset(
+            kind_dir,
+            format="parquet",
+            schema=pa.unify_schemas([schema_for(kind), partition_schema]),
+            partitioning=ds.partitioning(partition_schema, flavor="hive")
+        )
+        conditions = []
+        if repos:
+            conditions.append(ds.field("repo").isin([AnalyticsExporter.partition_repo(r) for r in repos]))
+        if start_month:
+            conditions.append(ds.field("month") >= start_month)
+        if end_month:
+            conditions.append(ds.field("month") <= end_month)
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        table = dataset.to_table(filter=expression)
+        # 分区目录值还原为仓库全名
+        table = table.set_column(
+            table.schema.get_field_index("repo"), "repo", pc.replace_substring(table.column("repo"), "__", "/")
+        )
+        if latest:
+            table = AnalyticsExporter._latest_versions(kind, table)
+        return table
+
+    def merge_latency(self, repos: Optional[List[str]] = None):
+        """
+        每个仓库的PR合并耗时（小时）：合并数、中位数、平均值、P90
+
+        返回:
+            pandas.DataFrame，索引为repo
+        """
+        table = self.load("pull_requests", repos)
+        table = table.filter(pc.is_valid(table.column("merged_at")))
+        df = table.select(["repo", "created_at", "merged_at"]).to_pandas()
+        df["hours"] = (df["merged_at"] - df["created_at"]).dt.total_seconds() / 3600
+        grouped = df.groupby("repo")["hours"]
+        return grouped.agg(["count", "median", "mean"]).assign(p90=grouped.quantile(0.9))
+
+    def open_issue_growth(self, repos: Optional[List[str]] = None, freq: str = "M"):
+        """
+        每个仓库每个周期的新开/关闭Issue数及累计净增（未关闭）数
+
+        参数:
+            repos: 可选，仓库过滤
+            freq: pandas周期频率（M按月，W按周）
+
+        返回:
+            pandas.DataFrame，列为 repo, period, opened, closed, net_open
+        """
+        import pandas as pd
+
+        df = self.load("issues", repos).select(["repo", "created_at", "closed_at"]).to_pandas()
+        created = df["created_at"].dt.tz_convert(None).dt.to_period(freq)
+        closed = df["closed_at"].dt.tz_convert(None).dt.to_period(freq)
+        opened = df.assign(period=created).groupby(["repo", "period"]).size().rename("opened")
+        closed_counts = df.assign(period=closed).dropna(subset=["period"]).groupby(["repo", "period"]).size().rename("closed")
+        result = pd.concat([opened, closed_counts], axis=1).fillna(0).astype(int).sort_index()
+        result["net_open"] = (result["opened"] - result["closed"]).groupby(level="repo").cumsum()
+        return result.reset_index()
+
+    def release_cadence(self, repos: Optional[List[str]] = None, include_prereleases: bool = False):
+        """
+        每个仓库的发布节奏：发布数、相邻发布间隔天数的中位数和平均值、最近发布时间
+
+        返回:
+            pandas.DataFrame，索引为repo
+        """
+        table = self.load("releases", repos)
+        table = table.filter(pc.is_valid(table.column(VERSION_COLUMNS["releases"])))
+        if not include_prereleases:
+            table = table.filter(pc.invert(pc.fill_null(table.column("prerelease"), False)))
+        df = table.select(["repo", "published_at"]).to_pandas().sort_values(["repo", "published_at"])
+        df["gap_days"] = df.groupby("repo")["published_at"].diff().dt.total_seconds() / 86400
+        return df.groupby("repo").agg(
+            releases=("published_at", "count"),
+            median_gap_days=("gap_days", "median"),
+            mean_gap_days=("gap_days", "mean"),
+            last_release=("published_at", "max"),
+        )
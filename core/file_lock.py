@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import socket
+import logging
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLockTimeout(Exception):
+    """在超时时间内未能获得文件锁"""
+    pass
+
+
+class FileLock:
+    """
+    跨进程的建议性文件锁（POSIX使用fcntl.flock，Windows使用msvcrt.locking）
+
+    锁加在单独的 {path}.lock 文件上，CLI、应用和守护进程访问同一状态文件时通过它串行化读-改-写过程。
+    同一进程内的多个线程应另外使用线程锁（flock对同一进程的不同文件描述符也互斥，但不可重入）。
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0, poll_interval: float = 0.05):
+        """
+        参数:
+            path: 被保护的文件路径（锁文件为 path + ".lock"）
+            timeout: 获取锁的最长等待时间（秒），None表示一直等待
+            poll_interval: 轮询间隔（秒）
+        """
+        self.lock_path = f"{path}.lock"
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self):
+        """获取锁，超时抛出FileLockTimeout"""
+        dir_path = os.path.dirname(self.lock_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not self._try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                raise FileLockTimeout(f"获取文件锁超时: {self.lock_path}")
+            time.sleep(self.poll_interval)
+        self._fd = fd
+
+    def release(self):
+        """释放锁"""
+        if self._fd is None:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def atomic_write_bytes(path: str, content: bytes):
+    """
+    原子写入文件：在同一目录写临时文件并fsync后重命名替换，
+    其他进程要么读到旧文件，要么读到完整的新文件
+
+    参数:
+        path: 目标文件路径
+        content: 文件内容
+    """
+    dir_path = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_json(path: str, data: Any, **dump_kwargs):
+    """
+    原子写入JSON文件（见atomic_write_bytes）
+
+    参数:
+        path: 目标文件路径
+        data: 要写入的数据
+        dump_kwargs: 传给json.dumps的参数（默认ensure_ascii=False）
+    """
+    dump_kwargs.setdefault("ensure_ascii", False)
+    atomic_write_bytes(path, json.dumps(data, **dump_kwargs).encode("utf-8"))
+
+
+class LeaseManager:
+    """
+    基于租约文件的跨进程任务认领
+
+    每个任务（如某订阅某天的抓取）对应 lease_dir 下的一个租约文件，使用O_EXCL独占创建，
+    保证同一时刻只有一个进程持有；持有者崩溃后租约在ttl秒后过期，可被其他进程接管。
+    """
+
+    def __init__(self, lease_dir: str, ttl: float = 3600):
+        """
+        参数:
+            lease_dir: 租约文件目录
+            ttl: 租约有效期（秒），应大于单个任务的最长处理时间
+        """
+        self.logger = logging.getLogger(__name__)
+        self.lease_dir = lease_dir
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        os.makedirs(lease_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        safe_key = key.replace("/", "_").replace(os.sep, "_")
+        return os.path.join(self.lease_dir, f"{safe_key}.lease")
+
+    def _is_expired(self, path: str) -> bool:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f).get("expires_at", 0) < time.time()
+        except (OSError, ValueError):
+            # 文件刚创建尚未写完或已被删除，按mtime判断
+            try:
+                return os.path.getmtime(path) + self.ttl < time.time()
+            except OSError:
+                return True
+
+    def claim(self, key: str) -> bool:
+        """
+        尝试认领任务
+
+        返回:
+            是否认领成功（已被其他进程持有且未过期时返回False）
+        """
+        path = self._path(key)
+        # 过期租约的接管需串行化，避免两个进程同时删除后都创建成功
+        with FileLock(os.path.join(self.lease_dir, "leases")):
+            if os.path.exists(path):
+                if not self._is_expired(path):
+                    return False
+                self.logger.warning(f"租约 {key} 已过期，接管处理")
+                os.remove(path)
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                return False
+            # 在锁内写完持有者信息，续期和释放时总能读到完整的租约
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"owner": self.owner, "expires_at": time.time() + self.ttl}, f)
+        return True
+
+    def _read_lease(self, path: str) -> Optional[dict]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def renew(self, key: str) -> bool:
+        """
+        延长本进程持有的租约，长时间任务应在各步骤之间调用，避免处理中途被当作过期而接管
+
+        返回:
+            是否续期成功（租约已不存在或已被其他进程接管时返回False）
+        """
+        path = self._path(key)
+        with FileLock(os.path.join(self.lease_dir, "leases")):
+            lease = self._read_lease(path)
+            if not lease or lease.get("owner") != self.owner:
+                self.logger.warning(f"租约 {key} 已被其他进程接管，无法续期")
+                return False
+            atomic_write_json(path, {"owner": self.owner, "expires_at": time.time() + self.ttl})
+        return True
+
+    def release(self, key: str):
+        """释放任务租约（只删除本进程持有的租约，已被其他进程接管的租约保持不变）"""
+        path = self._path(key)
+        with FileLock(os.path.join(self.lease_dir, "leases")):
+            lease = self._read_lease(path)
+            if lease is not None and lease.get("owner") != self.owner:
+                self.logger.warning(f"租约 {key} 已被其他进程接管，不再释放")
+                return
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @contextmanager
+    def lease(self, key: str) -> Iterator[bool]:
+        """认领任务的上下文管理器，产出是否认领成功，退出时释放已认领的租约"""
+        claimed = self.claim(key)
+        try:
+            yield claimed
+        finally:
+            if claimed:
+                self.release(key)
@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional, Any
+
+class ResponseCache:
+    """GitHub API 条件请求缓存（磁盘存储ETag/Last-Modified与响应体）"""
+
+    def __init__(self,
+                 cache_dir: str = "data/cache/github",
+                 max_size_mb: float = 200,
+                 max_age_days: float = 7):
+        """
+        初始化缓存
+
+        参数:
+            cache_dir: 缓存目录
+            max_size_mb: 缓存总大小上限（MB），超出后按最久未使用淘汰
+            max_age_days: 缓存条目最大保留天数，超过后视为失效
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # 内存索引：文件名 -> (大小, 最后访问时间)，避免每次淘汰都扫描目录
+        self._index: Dict[str, list] = {}
+        self._total_size = 0
+        self._load_index()
+
+    def _load_index(self):
+        """扫描缓存目录构建索引，并清理过期条目"""
+        now = time.time()
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                self._remove(filename)
+                continue
+            self._index[filename] = [stat.st_size, stat.st_mtime]
+            self._total_size += stat.st_size
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict] = None) -> str:
+        """根据URL和请求参数生成缓存键"""
+        raw = url + "?" + json.dumps(params or {}, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存条目
+
+        返回:
+            包含etag、last_modified、body、next_url的字典，不存在或已过期时返回None
+        """
+        filename = f"{key}.json"
+        path = os.path.join(self.cache_dir, filename)
+        with self._lock:
+            meta = self._index.get(filename)
+            if meta is None:
+                return None
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except Exception as e:
+                self.logger.warning(f"读取缓存失败 {filename}: {str(e)}")
+                self._remove(filename)
+                return None
+
+            if time.time() - entry.get("stored_at", 0) > self.max_age:
+                self._remove(filename)
+                return None
+
+            meta[1] = time.time()
+            return entry
+
+    def touch(self, key: str):
+        """命中304后刷新条目的存储时间，延长其有效期"""
+        filename = f"{key}.json"
+        path = os.path.join(self.cache_dir, filename)
+        with self._lock:
+            if filename not in self._index:
+                return
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                entry["stored_at"] = time.time()
+                self._write(filename, entry)
+            except Exception as e:
+                self.logger.warning(f"刷新缓存失败 {filename}: {str(e)}")
+
+    def set(self,
+            key: str,
+            body: Any,
+            etag: Optional[str] = None,
+            last_modified: Optional[str] = None,
+            next_url: Optional[str] = None):
+        """写入缓存条目（无ETag和Last-Modified的响应无法做条件请求，不缓存）"""
+        if not etag and not last_modified:
+            return
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "next_url": next_url,
+            "stored_at": time.time(),
+            "body": body
+        }
+        with self._lock:
+            try:
+                self._write(f"{key}.json", entry)
+            except Exception as e:
+                self.logger.warning(f"写入缓存失败 {key}: {str(e)}")
+                return
+            self._evict()
+
+    def _write(self, filename: str, entry: Dict):
+        """写入缓存文件并更新索引（调用方需持有锁）"""
+        path = os.path.join(self.cache_dir, filename)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+        size = os.path.getsize(path)
+        old = self._index.get(filename)
+        if old:
+            self._total_size -= old[0]
+        self._index[filename] = [size, time.time()]
+        self._total_size += size
+
+    def _remove(self, filename: str):
+        """删除缓存文件并更新索引（调用方需持有锁）"""
+        meta = self._index.pop(filename, None)
+        if meta:
+            self._total_size -= meta[0]
+        try:
+            os.remove(os.path.join(self.cache_dir, filename))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """按最久未使用顺序淘汰条目，直到总大小低于上限（调用方需持有锁）"""
+        if self._total_size <= self.max_size:
+            return
+        for filename, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_size <= self.max_size:
+                break
+            self._remove(filename)
+        self.logger.info(f"GitHub响应缓存淘汰完成，当前大小: {self._total_size / 1024 / 1024:.1f}MB")
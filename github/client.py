@@ -1,62 +1,261 @@
+import os
 import requests
 import logging
-from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Any, Tuple, Union
+from core.config import Config
+from .cache import ResponseCache
+from .rate_limiter import RateLimiter
+from .token_pool import TokenPool
+
+class GitHubAPIError(Exception):
+    """GitHub API 请求最终失败（重试和速率限制等待均已用尽）"""
 
 class GitHubClient:
     """GitHub API 客户端，支持PR的完整时间范围过滤"""
     
-    def __init__(self, github_token: str, timeout: int = 10, retries: int = 3):
+    # Search API单个查询最多可获取的结果数
+    SEARCH_RESULT_CAP = 1000
+    # 发布可能在创建（提交日期）数天后才发布：整页发布的创建时间都早于 开始时间 - 该值 时才停止翻页
+    RELEASE_LOOKBACK = timedelta(days=30)
+    
+    def __init__(self, 
+                 github_token: Union[str, List[str]], 
+                 timeout: int = 10, 
+                 retries: int = 3,
+                 cache: Optional[ResponseCache] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 max_rate_limit_waits: int = 10):
         self.logger = logging.getLogger(__name__)
-        self.github_token = github_token
+        tokens = [github_token] if isinstance(github_token, str) else list(github_token)
+        self.github_token = tokens[0] if tokens else None
         self.timeout = timeout
         self.retries = retries
+        self.cache = cache
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.token_pool = TokenPool(tokens, self.rate_limiter)
+        self.max_rate_limit_waits = max_rate_limit_waits
         self.base_url = "https://api.github.com"
         
+        # Authorization按请求从令牌池中选择
         self.headers = {
-            "Authorization": f"token {self.github_token}",
             "Accept": "application/vnd.github.v3+json",
             "User-Agent": "GitHub-Sentinel"
         }
     
-    def _make_request(self, endpoint: str, params: Dict = None) -> Optional[Any]:
-        """发送API请求的内部方法，包含错误处理和重试逻辑"""
-        url = f"{self.base_url}{endpoint}"
-        params = params or {}
+    @classmethod
+    def from_config(cls, config: Config, github_token: str) -> "GitHubClient":
+        """
+        根据配置创建GitHubClient实例
+        
+        除主令牌外，还会合并环境变量 GITHUB_TOKENS（逗号分隔）和配置项 github_tokens 中的令牌，
+        组成令牌池按余量轮换使用
+        
+        参数:
+            config: 配置对象
+            github_token: GitHub主访问令牌
+            
+        返回:
+            GitHubClient实例
+        """
+        tokens = [github_token]
+        tokens.extend(os.getenv("GITHUB_TOKENS", "").split(","))
+        tokens.extend(config.get("github_tokens", []) or [])
         
-        for attempt in range(self.retries):
+        cache = None
+        if config.get("github_cache.enabled", False):
+            cache = ResponseCache(
+                cache_dir=config.get("github_cache.dir", "data/cache/github"),
+                max_size_mb=config.get("github_cache.max_size_mb", 200),
+                max_age_days=config.get("github_cache.max_age_days", 7)
+            )
+        
+        rate_limiter = RateLimiter(
+            reserve=config.get("rate_limit.reserve", 50),
+            pace_threshold=config.get("rate_limit.pace_threshold", 0.2),
+            base_backoff=config.get("rate_limit.base_backoff", 5),
+            max_backoff=config.get("rate_limit.max_backoff", 300)
+        )
+        
+        return cls(
+            github_token=tokens,
+            timeout=config.get("api_timeout", 10),
+            retries=config.get("api_retries", 3),
+            cache=cache,
+            rate_limiter=rate_limiter,
+            max_rate_limit_waits=config.get("rate_limit.max_waits", 10)
+        )
+    
+    @staticmethod
+    def _resource_for(url: str) -> str:
+        """根据请求URL判断其所属的GitHub速率限制资源类别"""
+        if "/search/" in url:
+            return "search"
+        if url.endswith("/graphql"):
+            return "graphql"
+        return "core"
+
+    @staticmethod
+    def _is_rate_limited(response: requests.Response) -> bool:
+        """判断响应是否为速率限制（主限制或二级限制）"""
+        if response.status_code == 429:
+            return True
+        if response.status_code != 403:
+            return False
+        return (response.headers.get("X-RateLimit-Remaining") == "0"
+                or "Retry-After" in response.headers
+                or "rate limit" in response.text.lower())
+
+    def _request(self, 
+                 url: str, 
+                 params: Dict = None, 
+                 extra_headers: Dict = None,
+                 json_body: Optional[Dict] = None,
+                 cost: int = 1) -> Optional[requests.Response]:
+        """
+        发送API请求的内部方法（提供json_body时为POST），包含令牌选择、速率限制调度、错误处理和重试逻辑，返回原始响应
+        
+        每次请求从令牌池选取余量最多的令牌；返回401的令牌被隔离后换用其他令牌重试
+        
+        触发速率限制时不会放弃请求：主限制挂起到配额重置，二级限制按Retry-After或抖动指数退避，
+        等待次数不计入网络错误的重试次数（上限为max_rate_limit_waits）
+        """
+        resource = self._resource_for(url)
+        attempt = 0
+        rate_limit_waits = 0
+        
+        while attempt < self.retries:
+            token = self.token_pool.select(resource)
+            if token is None:
+                self.logger.error("没有可用的GitHub令牌（全部认证失败），放弃请求")
+                return None
+            bucket_key = self.token_pool.bucket_key(token, resource)
+            headers = {
+                **self.headers, 
+                "Authorization": f"token {token}",
+                **(extra_headers or {})
+            }
+            
+            self.rate_limiter.acquire(bucket_key, cost)
             try:
-                response = requests.get(
-                    url,
-                    headers=self.headers,
-                    params=params,
-                    timeout=self.timeout
-                )
-                
-                # 处理速率限制
-                if response.status_code == 403 and "rate limit" in response.text.lower():
-                    reset_time = datetime.fromtimestamp(
-                        int(response.headers.get("X-RateLimit-Reset", 0)),
-                        tz=timezone.utc
+                if json_body is not None:
+                    response = requests.post(
+                        url,
+                        headers=headers,
+                        json=json_body,
+                        timeout=self.timeout
                     )
-                    self.logger.warning(
-                        f"GitHub API 速率限制已达。重置时间: {reset_time.strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                else:
+                    response = requests.get(
+                        url,
+                        headers=headers,
+                        params=params,
+                        timeout=self.timeout
                     )
+            except requests.exceptions.RequestException as e:
+                attempt += 1
+                self.logger.warning(f"API请求失败（尝试 {attempt}/{self.retries}）: {str(e)}")
+                if attempt >= self.retries:
+                    self.logger.error(f"API请求最终失败: {str(e)}")
+                    return None
+                time.sleep(2 ** (attempt - 1))
+                continue
+            
+            self.rate_limiter.update(bucket_key, response.headers)
+            
+            # 令牌失效：隔离后换用其他令牌重试
+            if response.status_code == 401:
+                self.token_pool.quarantine(token)
+                continue
+            
+            # 处理速率限制：等待后重试，而不是直接放弃
+            if self._is_rate_limited(response):
+                if rate_limit_waits >= self.max_rate_limit_waits:
+                    self.logger.error(f"速率限制等待次数已达上限（{self.max_rate_limit_waits}），放弃请求: {url}")
                     return None
                 
-                response.raise_for_status()
-                response.encoding = "utf-8"
-                return response.json()
+                if response.headers.get("X-RateLimit-Remaining") == "0" and "Retry-After" not in response.headers:
+                    reset_at = float(response.headers.get("X-RateLimit-Reset", time.time() + 60))
+                    reset_time = datetime.fromtimestamp(reset_at, tz=timezone.utc)
+                    self.logger.warning(
+                        f"GitHub API 速率限制已达（{resource}）。等待至重置时间: {reset_time.strftime('%Y-%m-%d %H:%M:%S UTC')}"
+                    )
+                    self.rate_limiter.block_until(bucket_key, reset_at + 1)
+                else:
+                    delay = self.rate_limiter.backoff_delay(rate_limit_waits, response.headers.get("Retry-After"))
+                    self.logger.warning(f"触发GitHub二级速率限制（{resource}），{delay:.1f} 秒后重试")
+                    self.rate_limiter.block_until(bucket_key, time.time() + delay)
                 
-            except requests.exceptions.RequestException as e:
-                self.logger.warning(f"API请求失败（尝试 {attempt + 1}/{self.retries}）: {str(e)}")
-                if attempt == self.retries - 1:
+                rate_limit_waits += 1
+                continue
+            
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                # 4xx（速率限制除外）重试无意义，直接失败
+                if response.status_code < 500:
+                    self.logger.error(f"API请求失败: {str(e)}")
+                    return None
+                attempt += 1
+                self.logger.warning(f"API请求失败（尝试 {attempt}/{self.retries}）: {str(e)}")
+                if attempt >= self.retries:
                     self.logger.error(f"API请求最终失败: {str(e)}")
                     return None
-                import time
-                time.sleep(2 **attempt)
+                time.sleep(2 ** (attempt - 1))
+                continue
+            
+            response.encoding = "utf-8"
+            return response
         
         return None
+
+    def _get_json(self, url: str, params: Dict = None) -> Optional[Tuple[Any, Optional[str]]]:
+        """
+        发送条件请求并返回(JSON数据, 下一页链接)
+        
+        启用缓存时携带If-None-Match/If-Modified-Since，收到304则直接使用磁盘缓存的响应体
+        （304响应不计入GitHub速率限制）
+        """
+        cache_key = None
+        cached = None
+        extra_headers = {}
+        if self.cache:
+            cache_key = ResponseCache.make_key(url, params)
+            cached = self.cache.get(cache_key)
+            if cached:
+                if cached.get("etag"):
+                    extra_headers["If-None-Match"] = cached["etag"]
+                if cached.get("last_modified"):
+                    extra_headers["If-Modified-Since"] = cached["last_modified"]
+        
+        response = self._request(url, params, extra_headers)
+        if response is None:
+            return None
+        
+        if response.status_code == 304 and cached:
+            self.logger.debug(f"命中条件请求缓存: {url}")
+            self.cache.touch(cache_key)
+            return cached["body"], cached.get("next_url")
+        
+        data = response.json()
+        next_url = response.links.get("next", {}).get("url")
+        if self.cache:
+            self.cache.set(
+                cache_key,
+                data,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                next_url=next_url
+            )
+        return data, next_url
+
+    def _make_request(self, endpoint: str, params: Dict = None) -> Optional[Any]:
+        """发送API请求并返回解析后的JSON数据"""
+        url = f"{self.base_url}{endpoint}"
+        result = self._get_json(url, params or {})
+        return result[0] if result is not None else None
     
     def _parse_github_datetime(self, datetime_str: str) -> Optional[datetime]:
         """解析GitHub API返回的datetime字符串为带UTC时区的datetime对象"""
@@ -82,120 +281,313 @@ class GitHubClient:
         endpoint = f"/repos/{repo_full_name}"
         return self._make_request(endpoint)
     
-    def get_latest_releases(self, 
-                           repo_full_name: str, 
-                           start_time: Optional[datetime] = None,
-                           end_time: Optional[datetime] = None,
-                           limit: Optional[int] = None) -> List[Dict]:
+    def graphql(self, query: str, variables: Optional[Dict] = None, cost: int = 1) -> Optional[Dict]:
         """
-        获取仓库在指定时间范围内的发布
+        发送GraphQL查询（与REST请求共享令牌池和速率限制调度）
+        
+        参数:
+            query: GraphQL查询语句
+            variables: 查询变量
+            cost: 预估的查询点数，用于速率限制调度
+            
+        返回:
+            查询结果中的data字段，失败时返回None
+        """
+        url = f"{self.base_url}/graphql"
+        response = self._request(url, json_body={"query": query, "variables": variables or {}}, cost=cost)
+        if response is None:
+            return None
+        
+        result = response.json()
+        if result.get("errors"):
+            messages = "; ".join(e.get("message", "") for e in result["errors"][:3])
+            self.logger.error(f"GraphQL查询返回错误: {messages}")
+            if not result.get("data"):
+                return None
+        return result.get("data")
+
+    def _iter_pages(self, endpoint: str, params: Dict = None) -> Iterator[List[Dict]]:
+        """
+        按Link响应头（rel="next"）惰性翻页，逐页产出列表数据
+        
+        参数:
+            endpoint: API端点
+            params: 首页请求参数（后续页的参数已包含在next链接中）
+            
+        返回:
+            每页数据列表的迭代器
+            
+        异常:
+            GitHubAPIError: 某一页请求最终失败（避免调用方把不完整的数据当作完整结果保存）
+        """
+        url = f"{self.base_url}{endpoint}"
+        while url:
+            result = self._get_json(url, params)
+            if result is None:
+                raise GitHubAPIError(f"分页请求失败: {url}")
+            page, url = result
+            if not isinstance(page, list) or not page:
+                return
+            yield page
+            params = None
+
+    def _in_time_range(self, 
+                       dt: datetime, 
+                       start_time: Optional[datetime] = None,
+                       end_time: Optional[datetime] = None) -> bool:
+        """判断时间是否在[start_time, end_time]范围内"""
+        if start_time and dt < self._ensure_utc_timezone(start_time):
+            return False
+        if end_time and dt > self._ensure_utc_timezone(end_time):
+            return False
+        return True
+
+    def iter_releases(self, 
+                      repo_full_name: str, 
+                      start_time: Optional[datetime] = None,
+                      end_time: Optional[datetime] = None) -> Iterator[Dict]:
+        """
+        流式获取仓库在指定时间范围内的发布（跳过预发布）
+        
+        发布列表按创建时间倒序返回，但窗口按发布时间过滤，创建时间可能早于发布时间数天；
+        因此只有整页发布的创建时间都早于 开始时间 - RELEASE_LOOKBACK 时才停止翻页
         
         参数:
             repo_full_name: 仓库全名 (owner/repo)
-            limit: 最大返回数量，默认None表示不限制
             start_time: 开始时间（包含）
             end_time: 结束时间（包含）
             
         返回:
-            符合条件的发布列表
+            符合条件的发布迭代器
         """
-        effective_limit = limit if limit is not None else 30
-        self.logger.info(f"获取仓库发布 {repo_full_name} (时间范围: {start_time} 至 {end_time}, 限制: {effective_limit})")
-        
         endpoint = f"/repos/{repo_full_name}/releases"
-        params = {"per_page": min(100, effective_limit)}
+        stop_before = self._ensure_utc_timezone(start_time) - self.RELEASE_LOOKBACK if start_time else None
         
-        if start_time:
-            start_utc = self._ensure_utc_timezone(start_time)
-            params["since"] = start_utc.isoformat()
-        
-        releases = self._make_request(endpoint, params) or []
-        filtered_releases = []
-        
-        for release in releases:
-            if release.get("prerelease", False):
-                continue
+        for page in self._iter_pages(endpoint, {"per_page": 100}):
+            page_is_old = stop_before is not None
+            for release in page:
+                created_at = self._parse_github_datetime(release.get("created_at"))
+                if page_is_old and (not created_at or created_at >= stop_before):
+                    page_is_old = False
                 
-            published_at = self._parse_github_datetime(release.get("published_at"))
-            if not published_at:
-                continue
-                
-            in_range = True
-            if start_time:
-                start_utc = self._ensure_utc_timezone(start_time)
-                in_range = in_range and (published_at >= start_utc)
+                if release.get("prerelease", False):
+                    continue
                 
-            if end_time:
-                end_utc = self._ensure_utc_timezone(end_time)
-                in_range = in_range and (published_at <= end_utc)
+                published_at = self._parse_github_datetime(release.get("published_at"))
+                if not published_at:
+                    continue
                 
-            if in_range:
-                filtered_releases.append(release)
-                if limit is not None and len(filtered_releases) >= limit:
-                    break
-        
-        return filtered_releases
-    
-    def get_recent_pull_requests(self, 
-                                repo_full_name: str, 
-                                start_time: Optional[datetime] = None,  # 重命名since为start_time
-                                end_time: Optional[datetime] = None,
-                                limit: Optional[int] = None) -> List[Dict]:
+                if self._in_time_range(published_at, start_time, end_time):
+                    yield release
+            if page_is_old:
+                return
+
+    def iter_pull_requests(self, 
+                           repo_full_name: str, 
+                           start_time: Optional[datetime] = None,
+                           end_time: Optional[datetime] = None) -> Iterator[Dict]:
         """
-        获取仓库在指定时间范围内的Pull Requests
+        流式获取仓库在指定时间范围内更新的Pull Requests
+        
+        按更新时间倒序翻页，遇到早于开始时间的条目即停止
         
         参数:
             repo_full_name: 仓库全名 (owner/repo)
-            limit: 最大返回数量，默认None表示不限制
             start_time: 开始时间（包含）
             end_time: 结束时间（包含）
             
         返回:
-            符合条件的PR列表
+            符合条件的PR迭代器
         """
-        effective_limit = limit if limit is not None else 50
-        self.logger.info(f"获取仓库PR {repo_full_name} (时间范围: {start_time} 至 {end_time}, 限制: {effective_limit})")
-        
         endpoint = f"/repos/{repo_full_name}/pulls"
-        
         params = {
             "state": "all",
             "sort": "updated",
             "direction": "desc",
-            "per_page": min(100, effective_limit * 2)  # 请求更多数据以便过滤
+            "per_page": 100
         }
+        start_utc = self._ensure_utc_timezone(start_time) if start_time else None
         
-        # API支持的since参数（开始时间）
-        if start_time:
-            start_utc = self._ensure_utc_timezone(start_time)
+        for page in self._iter_pages(endpoint, params):
+            for pr in page:
+                updated_at = self._parse_github_datetime(pr.get("updated_at"))
+                if not updated_at:
+                    continue
+                if start_utc and updated_at < start_utc:
+                    return
+                if self._in_time_range(updated_at, start_time, end_time):
+                    yield pr
+
+    def iter_issues(self, 
+                    repo_full_name: str, 
+                    start_time: Optional[datetime] = None,
+                    end_time: Optional[datetime] = None) -> Iterator[Dict]:
+        """
+        流式获取仓库在指定时间范围内更新的Issues（不含PR）
+        
+        按更新时间倒序翻页，遇到早于开始时间的条目即停止
+        
+        参数:
+            repo_full_name: 仓库全名 (owner/repo)
+            start_time: 开始时间（包含）
+            end_time: 结束时间（包含）
+            
+        返回:
+            符合条件的Issues迭代器
+        """
+        endpoint = f"/repos/{repo_full_name}/issues"
+        params = {
+            "state": "all",
+            "sort": "updated",
+            "direction": "desc",
+            "per_page": 100
+        }
+        start_utc = self._ensure_utc_timezone(start_time) if start_time else None
+        if start_utc:
             params["since"] = start_utc.isoformat()
         
-        prs = self._make_request(endpoint, params) or []
-        filtered = []
+        for page in self._iter_pages(endpoint, params):
+            for issue in page:
+                updated_at = self._parse_github_datetime(issue.get("updated_at"))
+                if not updated_at:
+                    continue
+                if start_utc and updated_at < start_utc:
+                    return
+                if "pull_request" in issue:
+                    continue
+                if self._in_time_range(updated_at, start_time, end_time):
+                    yield issue
+
+    def _search_window(self, query: str, start_utc: datetime, end_utc: datetime) -> Iterator[Dict]:
+        """
+        在时间窗口内执行Issues搜索，结果超过1000条上限时将窗口二分递归搜索
         
-        for pr in prs:
-            updated_at = self._parse_github_datetime(pr.get("updated_at"))
-            if not updated_at:
-                continue
-                
-            # 检查是否在时间范围内
-            in_range = True
+        参数:
+            query: 不含时间条件的搜索语句
+            start_utc: 窗口开始时间（包含）
+            end_utc: 窗口结束时间（包含）
             
-            if start_time:
-                start_utc = self._ensure_utc_timezone(start_time)
-                in_range = in_range and (updated_at >= start_utc)
-                
-            if end_time:
-                end_utc = self._ensure_utc_timezone(end_time)
-                in_range = in_range and (updated_at <= end_utc)
-                
-            if in_range:
-                filtered.append(pr)
-                # 达到数量限制则停止
-                if limit is not None and len(filtered) >= limit:
-                    break
+        返回:
+            搜索结果条目迭代器
+        """
+        time_format = "%Y-%m-%dT%H:%M:%SZ"
+        params = {
+            "q": f"{query} updated:{start_utc.strftime(time_format)}..{end_utc.strftime(time_format)}",
+            "sort": "updated",
+            "order": "desc",
+            "per_page": 100
+        }
+        url = f"{self.base_url}/search/issues"
+        result = self._get_json(url, params)
+        if result is None:
+            raise GitHubAPIError(f"搜索请求失败: {params['q']}")
+        first_page, next_url = result
+        
+        total_count = first_page.get("total_count", 0)
+        if total_count > self.SEARCH_RESULT_CAP:
+            if end_utc - start_utc > timedelta(seconds=1):
+                # 搜索API最多返回1000条结果，拆分窗口确保完整获取
+                mid = start_utc + (end_utc - start_utc) / 2
+                mid = mid.replace(microsecond=0)
+                self.logger.info(f"搜索结果 {total_count} 条超过上限，拆分窗口: {start_utc} ~ {mid} ~ {end_utc}")
+                yield from self._search_window(query, mid + timedelta(seconds=1), end_utc)
+                yield from self._search_window(query, start_utc, mid)
+                return
+            # 搜索条件的时间精度为秒，窗口无法再拆分
+            self.logger.warning(
+                f"搜索结果 {total_count} 条超过上限且窗口无法再拆分（{start_utc} ~ {end_utc}），"
+                f"只能获取前 {self.SEARCH_RESULT_CAP} 条: {query}"
+            )
+        
+        yield from first_page.get("items", [])
+        while next_url:
+            result = self._get_json(next_url)
+            if result is None:
+                raise GitHubAPIError(f"搜索分页请求失败: {next_url}")
+            page, next_url = result
+            yield from page.get("items", [])
+
+    def search_pull_requests(self, 
+                             repo_full_name: str, 
+                             start_time: datetime,
+                             end_time: datetime) -> Iterator[Dict]:
+        """
+        通过Search API获取在时间窗口内更新的Pull Requests（由服务端按时间过滤）
+        
+        搜索结果为Issue结构，merged_at取自pull_request字段，使下游处理与列表接口一致
+        
+        参数:
+            repo_full_name: 仓库全名 (owner/repo)
+            start_time: 开始时间（包含）
+            end_time: 结束时间（包含）
+            
+        返回:
+            PR迭代器
+        """
+        start_utc = self._ensure_utc_timezone(start_time)
+        end_utc = self._ensure_utc_timezone(end_time)
+        for item in self._search_window(f"repo:{repo_full_name} is:pr", start_utc, end_utc):
+            item.setdefault("merged_at", (item.get("pull_request") or {}).get("merged_at"))
+            yield item
+
+    def search_issues(self, 
+                      repo_full_name: str, 
+                      start_time: datetime,
+                      end_time: datetime) -> Iterator[Dict]:
+        """
+        通过Search API获取在时间窗口内更新的Issues（不含PR，由服务端按时间过滤）
         
-        return filtered
+        参数:
+            repo_full_name: 仓库全名 (owner/repo)
+            start_time: 开始时间（包含）
+            end_time: 结束时间（包含）
+            
+        返回:
+            Issues迭代器
+        """
+        start_utc = self._ensure_utc_timezone(start_time)
+        end_utc = self._ensure_utc_timezone(end_time)
+        yield from self._search_window(f"repo:{repo_full_name} is:issue", start_utc, end_utc)
+
+    def get_latest_releases(self, 
+                           repo_full_name: str, 
+                           start_time: Optional[datetime] = None,
+                           end_time: Optional[datetime] = None,
+                           limit: Optional[int] = None) -> List[Dict]:
+        """
+        获取仓库在指定时间范围内的发布
+        
+        参数:
+            repo_full_name: 仓库全名 (owner/repo)
+            limit: 最大返回数量，默认None表示不限制
+            start_time: 开始时间（包含）
+            end_time: 结束时间（包含）
+            
+        返回:
+            符合条件的发布列表
+        """
+        self.logger.info(f"获取仓库发布 {repo_full_name} (时间范围: {start_time} 至 {end_time}, 限制: {limit})")
+        return list(islice(self.iter_releases(repo_full_name, start_time, end_time), limit))
+    
+    def get_recent_pull_requests(self, 
+                                repo_full_name: str, 
+                                start_time: Optional[datetime] = None,  # 重命名since为start_time
+                                end_time: Optional[datetime] = None,
+                                limit: Optional[int] = None) -> List[Dict]:
+        """
+        获取仓库在指定时间范围内的Pull Requests
+        
+        参数:
+            repo_full_name: 仓库全名 (owner/repo)
+            limit: 最大返回数量，默认None表示不限制
+            start_time: 开始时间（包含）
+            end_time: 结束时间（包含）
+            
+        返回:
+            符合条件的PR列表
+        """
+        self.logger.info(f"获取仓库PR {repo_full_name} (时间范围: {start_time} 至 {end_time}, 限制: {limit})")
+        return list(islice(self.iter_pull_requests(repo_full_name, start_time, end_time), limit))
     
     def get_recent_issues(self, 
                          repo_full_name: str, 
@@ -214,45 +606,5 @@ class GitHubClient:
         返回:
             符合条件的Issues列表
         """
-        effective_limit = limit if limit is not None else 50
-        self.logger.info(f"获取仓库Issues {repo_full_name} (时间范围: {start_time} 至 {end_time}, 限制: {effective_limit})")
-        
-        endpoint = f"/repos/{repo_full_name}/issues"
-        
-        params = {
-            "state": "all",
-            "sort": "updated",
-            "direction": "desc",
-            "per_page": min(100, effective_limit * 2)
-        }
-        
-        if start_time:
-            start_utc = self._ensure_utc_timezone(start_time)
-            params["since"] = start_utc.isoformat()
-        
-        issues = self._make_request(endpoint, params) or []
-        filtered_issues = []
-        
-        for issue in issues:
-            if "pull_request" in issue:
-                continue
-                
-            updated_at = self._parse_github_datetime(issue.get("updated_at"))
-            if not updated_at:
-                continue
-                
-            in_range = True
-            if start_time:
-                start_utc = self._ensure_utc_timezone(start_time)
-                in_range = in_range and (updated_at >= start_utc)
-                
-            if end_time:
-                end_utc = self._ensure_utc_timezone(end_time)
-                in_range = in_range and (updated_at <= end_utc)
-                
-            if in_range:
-                filtered_issues.append(issue)
-                if limit is not None and len(filtered_issues) >= limit:
-                    break
-        
-        return filtered_issues
+        self.logger.info(f"获取仓库Issues {repo_full_name} (时间范围: {start_time} 至 {end_time}, 限制: {limit})")
+        return list(islice(self.iter_issues(repo_full_name, start_time, end_time), limit))
@@ -0,0 +1,330 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+from .client import GitHubClient, GitHubAPIError
+
+# 单个仓库在时间窗口内所需的字段（仅包含报告实际使用的字段）
+_REPO_FIELDS = """
+    nameWithOwner name description url stargazerCount forkCount
+    releases(first: $first, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes { databaseId tagName name publishedAt createdAt isPrerelease isDraft description url }
+      pageInfo { hasNextPage endCursor }
+    }
+    pullRequests(first: $first, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      nodes { databaseId number state title createdAt updatedAt mergedAt closedAt url author { login } }
+      pageInfo { hasNextPage endCursor }
+    }
+    issues(first: $first, orderBy: {field: UPDATED_AT, direction: DESC}, filterBy: {since: $since}) {
+      nodes { databaseId number state title createdAt updatedAt closedAt url author { login } }
+      pageInfo { hasNextPage endCursor }
+    }
+"""
+
+# 单个连接的翻页查询（窗口内条目超过一页时使用）
+_CONNECTION_QUERIES = {
+    "releases": """
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    releases(first: $first, after: $after, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes { databaseId tagName name publishedAt createdAt isPrerelease isDraft description url }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+  rateLimit { cost remaining resetAt }
+}""",
+    "pullRequests": """
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: $first, after: $after, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      nodes { databaseId number state title createdAt updatedAt mergedAt closedAt url author { login } }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+  rateLimit { cost remaining resetAt }
+}""",
+    "issues": """
+query($owner: String!, $name: String!, $first: Int!, $after: String, $since: DateTime) {
+  repository(owner: $owner, name: $name) {
+    issues(first: $first, after: $after, orderBy: {field: UPDATED_AT, direction: DESC}, filterBy: {since: $since}) {
+      nodes { databaseId number state title createdAt updatedAt closedAt url author { login } }
+      pageInfo { hasNextPage endCursor }
+    }
+  }
+  rateLimit { cost remaining resetAt }
+}""",
+}
+
+# 每个仓库查询包含的连接数（releases / pullRequests / issues）
+_CONNECTIONS_PER_REPO = 3
+
+# GitHub对单次查询的节点数上限
+MAX_NODES_PER_QUERY = 500000
+
+
+def estimate_query_cost(repo_count: int, page_size: int) -> Tuple[int, int]:
+    """
+    按GitHub GraphQL计费规则估算查询点数
+
+    规则：累加满足每个连接所需的请求数（嵌套连接按父级first相乘），除以100后四舍五入，最少为1。
+    本查询中每个仓库有3个顶层连接，author不是连接，不额外计费。
+
+    参数:
+        repo_count: 单次查询中别名合并的仓库数
+        page_size: 每个连接的first参数
+
+    返回:
+        (预估点数, 预估节点数)
+    """
+    requests_needed = repo_count * _CONNECTIONS_PER_REPO
+    cost = max(1, round(requests_needed / 100))
+    nodes = repo_count * _CONNECTIONS_PER_REPO * page_size
+    return cost, nodes
+
+
+class GraphQLFetcher:
+    """
+    基于GitHub GraphQL API的批量抓取器
+
+    一次查询取回仓库信息、发布、PR和Issues（只含报告使用的字段），并可用别名把多个仓库合并到同一查询中，
+    结果转换为与REST接口一致的字段结构，下游处理无需区分数据来源。
+    """
+
+    def __init__(self,
+                 client: GitHubClient,
+                 page_size: int = 50,
+                 repos_per_query: int = 5,
+                 max_cost_per_query: int = 10):
+        """
+        初始化抓取器
+
+        参数:
+            client: GitHub客户端（复用其令牌池与速率限制调度）
+            page_size: 每个连接每页条目数（最大100）
+            repos_per_query: 单次查询合并的仓库数上限
+            max_cost_per_query: 单次查询允许的最大预估点数
+        """
+        self.logger = logging.getLogger(__name__)
+        self.client = client
+        self.page_size = min(100, page_size)
+        self.repos_per_query = max(1, repos_per_query)
+        self.max_cost_per_query = max_cost_per_query
+
+    def _batch_size(self) -> int:
+        """计算满足点数预算和节点上限的单次查询仓库数"""
+        size = self.repos_per_query
+        while size > 1:
+            cost, nodes = estimate_query_cost(size, self.page_size)
+            if cost <= self.max_cost_per_query and nodes <= MAX_NODES_PER_QUERY:
+                break
+            size -= 1
+        return size
+
+    @staticmethod
+    def _build_query(repo_count: int) -> str:
+        """构造以别名r0..rN合并多个仓库的查询语句"""
+        var_defs = ["$first: Int!", "$since: DateTime"]
+        blocks = []
+        for i in range(repo_count):
+            var_defs.append(f"$owner{i}: String!")
+            var_defs.append(f"$name{i}: String!")
+            blocks.append(f"  r{i}: repository(owner: $owner{i}, name: $name{i}) {{{_REPO_FIELDS}  }}")
+        return (
+            f"query({', '.join(var_defs)}) {{\n"
+            + "\n".join(blocks)
+            + "\n  rateLimit { cost remaining resetAt }\n}"
+        )
+
+    def fetch_window(self,
+                     repo_full_name: str,
+                     start_time: datetime,
+                     end_time: datetime) -> Dict:
+        """
+        获取单个仓库在时间窗口内的数据
+
+        返回:
+            包含repo_info、releases、pull_requests、issues的字典
+        """
+        result = self.fetch_windows([repo_full_name], start_time, end_time)[repo_full_name]
+        if isinstance(result, GitHubAPIError):
+            raise result
+        return result
+
+    def fetch_windows(self,
+                      repo_full_names: List[str],
+                      start_time: datetime,
+                      end_time: datetime) -> Dict[str, Union[Dict, GitHubAPIError]]:
+        """
+        批量获取多个仓库在同一时间窗口内的数据
+
+        单个仓库不存在（改名、删除或无权限）或某一批查询失败时不影响其他仓库：
+        失败的仓库对应的值为GitHubAPIError，由调用方决定是否单独重试。
+
+        参数:
+            repo_full_names: 仓库全名列表
+            start_time: 开始时间（包含）
+            end_time: 结束时间（包含）
+
+        返回:
+            仓库全名 -> 数据字典（结构同fetch_window）或该仓库的GitHubAPIError
+        """
+        start_utc = self.client._ensure_utc_timezone(start_time)
+        end_utc = self.client._ensure_utc_timezone(end_time)
+        batch_size = self._batch_size()
+        results = {}
+
+        for offset in range(0, len(repo_full_names), batch_size):
+            batch = repo_full_names[offset:offset + batch_size]
+            cost, _ = estimate_query_cost(len(batch), self.page_size)
+            variables = {"first": self.page_size, "since": start_utc.isoformat()}
+            for i, repo_full_name in enumerate(batch):
+                owner, name = repo_full_name.split("/", 1)
+                variables[f"owner{i}"] = owner
+                variables[f"name{i}"] = name
+
+            self.logger.info(f"GraphQL批量获取 {len(batch)} 个仓库（预估 {cost} 点）: {', '.join(batch)}")
+            data = self.client.graphql(self._build_query(len(batch)), variables, cost=cost)
+            if data is None:
+                error = GitHubAPIError(f"GraphQL查询失败: {', '.join(batch)}")
+                results.update((repo_full_name, error) for repo_full_name in batch)
+                continue
+            self._log_rate_limit(data)
+
+            for i, repo_full_name in enumerate(batch):
+                repo = data.get(f"r{i}")
+                if not repo:
+                    results[repo_full_name] = GitHubAPIError(f"仓库 {repo_full_name} 不存在或无权限访问")
+                    continue
+                results[repo_full_name] = self._collect_repo(repo_full_name, repo, start_utc, end_utc)
+
+        return results
+
+    def _log_rate_limit(self, data: Dict):
+        """记录查询实际消耗的点数"""
+        rate_limit = data.get("rateLimit") or {}
+        if rate_limit:
+            self.logger.debug(
+                f"GraphQL查询消耗 {rate_limit.get('cost')} 点，剩余 {rate_limit.get('remaining')} 点"
+            )
+
+    def _collect_repo(self, repo_full_name: str, repo: Dict, start_utc: datetime, end_utc: datetime) -> Dict:
+        """汇总单个仓库的首页数据，窗口内条目超过一页时继续翻页，并转换为REST字段结构"""
+        # 发布按创建时间排序、按发布时间过滤，创建时间可能早于发布时间数天（同GitHubClient.iter_releases）
+        releases = self._drain(repo_full_name, "releases", repo["releases"],
+                               start_utc - self.client.RELEASE_LOOKBACK, "createdAt")
+        prs = self._drain(repo_full_name, "pullRequests", repo["pullRequests"], start_utc, "updatedAt")
+        issues = self._drain(repo_full_name, "issues", repo["issues"], start_utc, "updatedAt")
+
+        return {
+            "repo_info": self._to_repo_info(repo),
+            "releases": [
+                self._to_release(r) for r in releases
+                if not r.get("isPrerelease") and not r.get("isDraft")
+                and self._in_window(r.get("publishedAt"), start_utc, end_utc)
+            ],
+            "pull_requests": [
+                self._to_pull_request(p) for p in prs
+                if self._in_window(p.get("updatedAt"), start_utc, end_utc)
+            ],
+            "issues": [
+                self._to_issue(i) for i in issues
+                if self._in_window(i.get("updatedAt"), start_utc, end_utc)
+            ],
+        }
+
+    def _drain(self,
+               repo_full_name: str,
+               connection: str,
+               first_page: Dict,
+               stop_before: datetime,
+               order_field: str) -> List[Dict]:
+        """
+        从首页开始翻页，直到没有下一页或最后一条的排序字段早于stop_before（之后的条目都更早）
+
+        stop_before通常为窗口开始时间；发布按创建时间排序，传入 窗口开始时间 - RELEASE_LOOKBACK
+        """
+        nodes = list(first_page.get("nodes") or [])
+        page_info = first_page.get("pageInfo") or {}
+        owner, name = repo_full_name.split("/", 1)
+
+        while page_info.get("hasNextPage") and nodes:
+            last_time = self.client._parse_github_datetime(nodes[-1].get(order_field))
+            if last_time and last_time < stop_before:
+                break
+
+            variables = {
+                "owner": owner,
+                "name": name,
+                "first": self.page_size,
+                "after": page_info.get("endCursor")
+            }
+            if connection == "issues":
+                variables["since"] = stop_before.isoformat()
+            data = self.client.graphql(_CONNECTION_QUERIES[connection], variables)
+            if not data or not data.get("repository"):
+                raise GitHubAPIError(f"GraphQL翻页失败: {repo_full_name} {connection}")
+            self._log_rate_limit(data)
+
+            page = data["repository"][connection]
+            nodes.extend(page.get("nodes") or [])
+            page_info = page.get("pageInfo") or {}
+
+        return nodes
+
+    def _in_window(self, value: Optional[str], start_utc: datetime, end_utc: datetime) -> bool:
+        """判断GraphQL返回的时间字符串是否在窗口内"""
+        dt = self.client._parse_github_datetime(value)
+        return bool(dt) and start_utc <= dt <= end_utc
+
+    @staticmethod
+    def _to_repo_info(repo: Dict) -> Dict:
+        return {
+            "full_name": repo.get("nameWithOwner"),
+            "name": repo.get("name"),
+            "description": repo.get("description"),
+            "html_url": repo.get("url"),
+            "stargazers_count": repo.get("stargazerCount", 0),
+            "forks_count": repo.get("forkCount", 0),
+        }
+
+    @staticmethod
+    def _to_release(node: Dict) -> Dict:
+        return {
+            "id": node.get("databaseId"),
+            "tag_name": node.get("tagName"),
+            "name": node.get("name") or "",
+            "body": node.get("description") or "",
+            "prerelease": node.get("isPrerelease", False),
+            "created_at": node.get("createdAt"),
+            "published_at": node.get("publishedAt"),
+            "html_url": node.get("url"),
+        }
+
+    @staticmethod
+    def _to_pull_request(node: Dict) -> Dict:
+        return {
+            "id": node.get("databaseId"),
+            "number": node.get("number"),
+            # REST中已合并的PR状态为closed
+            "state": "open" if node.get("state") == "OPEN" else "closed",
+            "title": node.get("title"),
+            "user": {"login": (node.get("author") or {}).get("login")},
+            "created_at": node.get("createdAt"),
+            "updated_at": node.get("updatedAt"),
+            "closed_at": node.get("closedAt"),
+            "merged_at": node.get("mergedAt"),
+            "html_url": node.get("url"),
+        }
+
+    @staticmethod
+    def _to_issue(node: Dict) -> Dict:
+        return {
+            "id": node.get("databaseId"),
+            "number": node.get("number"),
+            "state": (node.get("state") or "").lower(),
+            "title": node.get("title"),
+            "user": {"login": (node.get("author") or {}).get("login")},
+            "created_at": node.get("createdAt"),
+            "updated_at": node.get("updatedAt"),
+            "closed_at": node.get("closedAt"),
+            "html_url": node.get("url"),
+        }
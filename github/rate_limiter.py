@@ -0,0 +1,169 @@
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Mapping
+
+@dataclass
+class _Bucket:
+    """单个限流桶的状态（对应GitHub的一类速率限制资源）"""
+    limit: Optional[int] = None  # 窗口内总配额
+    remaining: Optional[int] = None  # 剩余配额（未知时为None）
+    reset_at: float = 0.0  # 配额重置时间（epoch秒）
+    next_allowed: float = 0.0  # 下一个请求允许发出的时间（epoch秒）
+
+class RateLimiter:
+    """
+    感知GitHub速率限制的请求调度器（线程安全，可在多个工作线程间共享）
+
+    根据响应头 X-RateLimit-Limit/Remaining/Reset 维护每类资源的令牌桶：
+    配额充足时不限速；剩余配额低于阈值后，把剩余请求均匀分摊到重置前的时间内；
+    配额耗尽时挂起调用方直到重置。
+    """
+
+    def __init__(self,
+                 reserve: int = 50,
+                 pace_threshold: float = 0.2,
+                 base_backoff: float = 5.0,
+                 max_backoff: float = 300.0):
+        """
+        初始化调度器
+
+        参数:
+            reserve: 每个桶保留不用的配额数（最多为总配额的1/20）
+            pace_threshold: 剩余配额低于总配额的该比例时开始匀速调度
+            base_backoff: 二级速率限制的基础退避时间（秒）
+            max_backoff: 退避时间上限（秒）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.reserve = reserve
+        self.pace_threshold = pace_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, key: str) -> _Bucket:
+        """获取（或创建）指定键的限流桶，调用方需持有锁"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+        return bucket
+
+    def _reserve_for(self, bucket: _Bucket) -> int:
+        """计算桶的保留配额，小配额资源（如search每分钟30次）按比例缩减"""
+        if not bucket.limit:
+            return 0
+        return min(self.reserve, bucket.limit // 20)
+
+    def headroom(self, key: str) -> float:
+        """
+        返回桶的可用余量（未知时视为无穷大），用于在多个桶之间选择
+        """
+        with self._lock:
+            bucket = self._bucket(key)
+            if bucket.remaining is None or (bucket.reset_at and time.time() >= bucket.reset_at):
+                return float("inf")
+            return bucket.remaining - self._reserve_for(bucket)
+
+    def acquire(self, key: str = "core", cost: int = 1):
+        """
+        申请发送一个请求，必要时阻塞到允许发送的时间
+
+        参数:
+            key: 限流桶键（如 core / search / graphql）
+            cost: 请求消耗的配额（GraphQL按查询点数计算，REST为1）
+        """
+        while True:
+            with self._lock:
+                bucket = self._bucket(key)
+                now = time.time()
+
+                # 重置时间已过，配额恢复（准确值等下一次响应头更新）
+                if bucket.reset_at and now >= bucket.reset_at:
+                    bucket.remaining = bucket.limit
+                    bucket.reset_at = 0.0
+
+                reserve = self._reserve_for(bucket)
+                exhausted = (
+                    bucket.remaining is not None
+                    and bucket.remaining - cost < reserve
+                    and bucket.reset_at > now
+                )
+                if exhausted:
+                    wait = bucket.reset_at - now + 1
+                else:
+                    interval = 0.0
+                    if (bucket.remaining is not None and bucket.limit
+                            and bucket.reset_at > now
+                            and bucket.remaining < bucket.limit * self.pace_threshold):
+                        interval = cost * (bucket.reset_at - now) / max(1, bucket.remaining - reserve)
+
+                    slot = max(now, bucket.next_allowed)
+                    bucket.next_allowed = slot + interval
+                    if bucket.remaining is not None:
+                        bucket.remaining -= cost
+                    wait = slot - now
+
+            if exhausted:
+                self.logger.warning(f"速率限制配额即将耗尽（{key}），等待 {wait:.0f} 秒至重置")
+                time.sleep(wait)
+                continue
+
+            if wait > 0:
+                time.sleep(wait)
+            return
+
+    def update(self, key: str, headers: Mapping[str, str]):
+        """
+        根据响应头更新桶状态
+
+        参数:
+            key: 限流桶键
+            headers: HTTP响应头
+        """
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        try:
+            with self._lock:
+                bucket = self._bucket(key)
+                bucket.remaining = int(remaining)
+                if headers.get("X-RateLimit-Limit"):
+                    bucket.limit = int(headers["X-RateLimit-Limit"])
+                if headers.get("X-RateLimit-Reset"):
+                    bucket.reset_at = float(headers["X-RateLimit-Reset"])
+        except ValueError:
+            self.logger.warning(f"无法解析速率限制响应头: {dict(headers)}")
+
+    def block_until(self, key: str, until: float):
+        """
+        将桶阻塞到指定时间，所有共享该桶的调用方都会等待
+
+        参数:
+            key: 限流桶键
+            until: 解除阻塞的时间（epoch秒）
+        """
+        with self._lock:
+            bucket = self._bucket(key)
+            bucket.next_allowed = max(bucket.next_allowed, until)
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        计算二级速率限制的退避时间：优先使用Retry-After，否则为带抖动的指数退避
+
+        参数:
+            attempt: 第几次退避（从0开始）
+            retry_after: Retry-After响应头的值
+
+        返回:
+            等待秒数
+        """
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
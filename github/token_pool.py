@@ -0,0 +1,63 @@
+import logging
+import threading
+from typing import List, Optional
+from .rate_limiter import RateLimiter
+
+class TokenPool:
+    """
+    GitHub访问令牌池
+
+    每个令牌在RateLimiter中拥有独立的限流桶（键为"令牌序号:资源"），
+    每次请求选择当前余量最多的可用令牌；返回401的令牌会被隔离，不再参与调度。
+    """
+
+    def __init__(self, tokens: List[str], rate_limiter: RateLimiter):
+        """
+        初始化令牌池
+
+        参数:
+            tokens: 令牌列表（自动去重、去除空值）
+            rate_limiter: 共享的速率限制调度器
+        """
+        self.logger = logging.getLogger(__name__)
+        self.tokens = list(dict.fromkeys(t.strip() for t in tokens if t and t.strip()))
+        self.rate_limiter = rate_limiter
+        self._quarantined = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def mask(token: str) -> str:
+        """脱敏显示令牌，用于日志"""
+        return f"{token[:4]}...{token[-4:]}" if len(token) > 8 else "****"
+
+    def bucket_key(self, token: str, resource: str) -> str:
+        """返回令牌在指定资源上的限流桶键"""
+        return f"{self.tokens.index(token)}:{resource}"
+
+    def select(self, resource: str = "core") -> Optional[str]:
+        """
+        选择指定资源上余量最多的可用令牌
+
+        参数:
+            resource: 速率限制资源类别（core / search / graphql）
+
+        返回:
+            令牌，全部被隔离时返回None
+        """
+        with self._lock:
+            available = [t for t in self.tokens if t not in self._quarantined]
+        if not available:
+            return None
+        return max(available, key=lambda t: self.rate_limiter.headroom(self.bucket_key(t, resource)))
+
+    def quarantine(self, token: str):
+        """隔离失效的令牌（如返回401）"""
+        with self._lock:
+            if token in self._quarantined:
+                return
+            self._quarantined.add(token)
+            healthy = len(self.tokens) - len(self._quarantined)
+        self.logger.error(f"GitHub令牌 {self.mask(token)} 认证失败，已隔离（剩余可用令牌: {healthy}）")
+
+    def __len__(self) -> int:
+        return len(self.tokens)
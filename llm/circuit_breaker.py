@@ -0,0 +1,67 @@
+import time
+import logging
+import threading
+from typing import Optional
+
+class CircuitBreaker:
+    """
+    熔断器（线程安全）：连续失败达到阈值后打开，在reset_timeout秒内直接拒绝请求；
+    超时后放行一个试探请求（半开），试探成功则关闭，失败则重新打开
+
+    服务整体不可用时，后续调用立即失败，而不是每次都等待超时和重试。
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0, name: str = "api"):
+        """
+        初始化熔断器
+
+        参数:
+            failure_threshold: 打开熔断的连续失败次数
+            reset_timeout: 打开后到允许试探请求的时间（秒）
+            name: 名称（用于日志）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """判断是否允许发出请求（半开状态下只放行一个试探请求）"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._probing and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._probing = True
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        """距离允许试探请求的剩余秒数（未打开时为0）"""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        """记录一次成功请求，关闭熔断"""
+        with self._lock:
+            if self._opened_at is not None:
+                self.logger.info(f"{self.name} 熔断恢复")
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        """记录一次失败请求，达到阈值（或试探失败）时打开熔断"""
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self.logger.warning(
+                    f"{self.name} 连续失败 {self._failures} 次，熔断 {self.reset_timeout:.0f} 秒"
+                )
+                self._opened_at = time.monotonic()
+                self._probing = False
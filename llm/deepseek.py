@@ -1,8 +1,38 @@
+import time
 import logging
 import json
 import requests
-from typing import List, Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional
 from core.config import Config
+from .circuit_breaker import CircuitBreaker
+from .rate_limiter import RequestLimiter
+from .response_cache import ResponseCache
+
+# 每次请求在输入内容之外预留的token数（消息格式开销和分段说明）
+_PROMPT_OVERHEAD_TOKENS = 200
+
+# 合并分段总结时的指令
+_REDUCE_INSTRUCTION = "以下是同一时间段内活动数据的 {count} 份分段总结，请按要求合并为一份完整总结，去除重复内容："
+
+# 汇总多日日报时的指令
+_ROLLUP_INSTRUCTION = "以下是同一仓库连续 {count} 份按日期排列的日报总结（及未生成日报日期的活动数据），请汇总为一份完整的周期报告："
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的token数：中日韩字符按每字1个token，其余字符按每4个字符1个token
+    （用于拆分输入，不需要精确）
+    """
+    cjk = sum(1 for ch in text if ch >= "\u2e80")
+    return cjk + (len(text) - cjk) // 4 + 1
+
+
+class DeepSeekAPIError(Exception):
+    """DeepSeek API 请求最终失败（重试用尽、熔断中或返回格式异常），不会被缓存或写入报告"""
+
 
 class DeepSeekClient:
     """DeepSeek大模型客户端（独立模块）"""
@@ -17,60 +47,285 @@ class DeepSeekClient:
             self.model = config.get("deepseek.model", "deepseek-chat")
             self.temperature = config.get("deepseek.temperature", 0.3)
             self.max_tokens = config.get("deepseek.max_tokens", 1000)
+            self.max_input_tokens = config.get("deepseek.max_input_tokens", 16000)
+            self.stream = config.get("deepseek.stream", False)
+            self.read_timeout = config.get("deepseek.stream_read_timeout", 60)
+            self.timeout = config.get("deepseek.timeout", 60)
+            self.limiter = RequestLimiter(
+                max_concurrent=config.get("deepseek.max_concurrent", 4),
+                requests_per_minute=config.get("deepseek.requests_per_minute", 0)
+            )
+            self.breaker = CircuitBreaker(
+                failure_threshold=config.get("deepseek.circuit_breaker.failure_threshold", 5),
+                reset_timeout=config.get("deepseek.circuit_breaker.reset_timeout", 60),
+                name="DeepSeek API"
+            )
+            retries = config.get("deepseek.retries", 3)
+            backoff_factor = config.get("deepseek.backoff_factor", 1.0)
         else:
             self.api_url = "https://api.deepseek.com/v1/chat/completions"
             self.model = "deepseek-chat"
             self.temperature = 0.3
             self.max_tokens = 1000
+            self.max_input_tokens = 16000
+            self.stream = False
+            self.read_timeout = 60
+            self.timeout = 60
+            self.limiter = RequestLimiter()
+            self.breaker = CircuitBreaker(name="DeepSeek API")
+            retries = 3
+            backoff_factor = 1.0
+        self.cache = ResponseCache(
+            config.get("deepseek.cache.path", "data/llm_cache.db"),
+            ttl=config.get("deepseek.cache.ttl", 7 * 24 * 3600),
+            max_entries=config.get("deepseek.cache.max_entries", 5000)
+        ) if config and config.get("deepseek.cache.enabled", False) else None
         
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
+
+        # 长连接会话：连接池大小与并发数一致；连接失败和429/5xx按Retry-After或指数退避有限次重试（POST默认不重试，需显式允许）。
+        # 读超时不重试：服务无响应时每次调用只等待一个超时就计入熔断器，而不是 (重试次数+1) × 超时
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.limiter.max_concurrent,
+            max_retries=Retry(
+                total=retries,
+                connect=retries,
+                read=0,
+                other=0,
+                status=retries,
+                backoff_factor=backoff_factor,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset({"POST"}),
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(self.headers)
     
-    def _call_api(self, messages: List[Dict[str, str]]) -> str:
-        """调用DeepSeek API"""
+    def _call_api(self, messages: List[Dict[str, str]], on_token: Optional[Callable[[str], None]] = None) -> str:
+        """
+        调用DeepSeek API（线程安全，并发数和每分钟请求数受limiter限制，成功的响应写入缓存）
+
+        参数:
+            messages: 消息列表
+            on_token: 可选，流式回调，每收到一段生成内容调用一次（命中缓存时以完整内容调用一次）；
+                指定该回调或配置deepseek.stream时使用SSE流式请求
+
+        返回:
+            完整的生成内容
+
+        异常:
+            DeepSeekAPIError: 请求最终失败或熔断中（失败结果不会写入缓存）
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens
+        }
+        cache_key = ResponseCache.make_key(payload) if self.cache else None
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.logger.debug("DeepSeek响应命中缓存")
+                if on_token:
+                    on_token(cached)
+                return cached
+
+        if not self.breaker.allow():
+            raise DeepSeekAPIError(f"DeepSeek API连续失败，已熔断（{self.breaker.retry_in():.0f} 秒后重试）")
         try:
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": self.temperature,
-                "max_tokens": self.max_tokens
-            }
-            
-            response = requests.post(
-                self.api_url,
-                headers=self.headers,
-                data=json.dumps(payload),
-                timeout=60
-            )
-            
-            response.raise_for_status()
-            result = response.json()
-            
-            if "choices" in result and len(result["choices"]) > 0:
-                return result["choices"][0]["message"]["content"]
-            else:
-                self.logger.error("DeepSeek API返回格式异常")
-                return "未能生成总结（API返回格式异常）"
-                
+            with self.limiter.slot():
+                if on_token or self.stream:
+                    content = self._post_stream(payload, on_token)
+                else:
+                    content = self._post(payload)
+            if content is None:
+                raise DeepSeekAPIError("DeepSeek API返回格式异常")
         except Exception as e:
+            self.breaker.record_failure()
             self.logger.error(f"DeepSeek API调用失败: {str(e)}")
-            return f"未能生成总结（错误: {str(e)}）"
+            if isinstance(e, DeepSeekAPIError):
+                raise
+            raise DeepSeekAPIError(f"DeepSeek API调用失败: {str(e)}") from e
+        self.breaker.record_success()
+
+        if cache_key:
+            self.cache.put(cache_key, content)
+        return content
+
+    def _post(self, payload: Dict) -> Optional[str]:
+        """发送请求，返回生成的内容（返回格式异常时为None，请求失败时抛出异常）"""
+        response = self.session.post(
+            self.api_url,
+            data=json.dumps(payload),
+            timeout=self.timeout
+        )
+        
+        response.raise_for_status()
+        result = response.json()
+        
+        if "choices" in result and len(result["choices"]) > 0:
+            return result["choices"][0]["message"]["content"]
+        return None
     
-    def summarize_releases(self, releases: List[Dict]) -> str:
-        """总结发布信息"""
+    def _post_stream(self, payload: Dict, on_token: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        """
+        以SSE流式请求生成内容，边接收边回调
+
+        超时只限制连接和相邻两段数据之间的间隔（deepseek.stream_read_timeout），
+        生成时间较长但持续输出的请求不会因总时长超时而失败
+        """
+        started = time.monotonic()
+        parts: List[str] = []
+        with self.session.post(
+            self.api_url,
+            data=json.dumps(dict(payload, stream=True)),
+            stream=True,
+            timeout=(10, self.read_timeout)
+        ) as response:
+            response.raise_for_status()
+            response.encoding = "utf-8"
+            # 小块读取，收到一个事件就立即处理（默认的512字节缓冲会推迟首个内容）
+            for line in response.iter_lines(chunk_size=64, decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                if not delta:
+                    continue
+                if not parts:
+                    self.logger.info(f"DeepSeek流式响应首个内容用时 {time.monotonic() - started:.2f} 秒")
+                parts.append(delta)
+                if on_token:
+                    on_token(delta)
+        return "".join(parts) if parts else None
+
+    def _input_budget(self, system_prompt: str) -> int:
+        """单次请求中用户消息可用的token预算"""
+        return max(500, self.max_input_tokens - estimate_tokens(system_prompt) - _PROMPT_OVERHEAD_TOKENS)
+
+    def _fits(self, system_prompt: str, prompt: str) -> bool:
+        """判断一次请求的输入是否在deepseek.max_input_tokens预算内"""
+        return estimate_tokens(prompt) <= self._input_budget(system_prompt)
+
+    def _call_many(self, system_prompt: str, prompts: List[str]) -> List[str]:
+        """并发发送多条用户消息（实际并发数受limiter限制），结果顺序与prompts一致"""
+        if len(prompts) == 1:
+            return [self._call_api([{"role": "system", "content": system_prompt}, {"role": "user", "content": prompts[0]}])]
+        with ThreadPoolExecutor(max_workers=self.limiter.max_concurrent, thread_name_prefix="llm-chunk") as executor:
+            return list(executor.map(
+                lambda prompt: self._call_api([{"role": "system", "content": system_prompt},
+                                               {"role": "user", "content": prompt}]),
+                prompts
+            ))
+
+    def _map_reduce(self,
+                    system_prompt: str,
+                    sections: Dict[str, List[Dict]],
+                    on_token: Optional[Callable[[str], None]] = None) -> str:
+        """
+        输入超出token预算时分段总结再合并
+
+        按估算的token数把各部分条目拆成若干段（每段不超过预算），并发总结各段，
+        再把分段总结合并为最终结果（分段总结过多时逐层合并）
+
+        参数:
+            system_prompt: system提示词（分段和合并时都使用，保证输出格式一致）
+            sections: 标签 -> 条目列表（如 {"Issues": [...], "Pull Requests": [...]}）
+            on_token: 可选，最终合并结果的流式回调
+
+        返回:
+            合并后的总结
+        """
+        budget = self._input_budget(system_prompt)
+        chunks: List[Dict[str, List[Dict]]] = [{}]
+        used = 0
+        for label, rows in sections.items():
+            for row in rows:
+                cost = estimate_tokens(json.dumps(row, ensure_ascii=False)) + 1
+                if used + cost > budget and used:
+                    chunks.append({})
+                    used = 0
+                chunks[-1].setdefault(label, []).append(row)
+                used += cost
+
+        self.logger.info(f"输入超出token预算（估算），拆分为 {len(chunks)} 段分别总结后合并")
+        prompts = [
+            "\n".join(f"{label}: {json.dumps(rows, ensure_ascii=False)}" for label, rows in chunk.items())
+            for chunk in chunks
+        ]
+        return self._reduce(system_prompt, self._call_many(system_prompt, prompts), on_token=on_token)
+
+    def _reduce(self,
+                system_prompt: str,
+                partials: List[str],
+                instruction: str = _REDUCE_INSTRUCTION,
+                on_token: Optional[Callable[[str], None]] = None) -> str:
+        """合并分段总结：能放进一次请求时直接合并，否则分组合并后继续逐层合并（只有最终一次合并流式回调）"""
+        if len(partials) == 1:
+            if on_token:
+                on_token(partials[0])
+            return partials[0]
+        budget = self._input_budget(system_prompt)
+        groups: List[List[str]] = [[]]
+        used = 0
+        for partial in partials:
+            cost = estimate_tokens(partial) + 10
+            # 每组至少两份，保证每一层的总结数都在减少
+            if used + cost > budget and len(groups[-1]) >= 2:
+                groups.append([])
+                used = 0
+            groups[-1].append(partial)
+            used += cost
+        if len(groups[-1]) == 1 and len(groups) > 1:
+            groups[-2].extend(groups.pop())
+
+        prompts = [
+            instruction.format(count=len(group)) + "\n\n" + "\n\n".join(
+                f"【第{i}部分】\n{partial}" for i, partial in enumerate(group, 1)
+            )
+            for group in groups
+        ]
+        if len(prompts) == 1:
+            return self._call_api([{"role": "system", "content": system_prompt},
+                                   {"role": "user", "content": prompts[0]}], on_token=on_token)
+        return self._reduce(system_prompt, self._call_many(system_prompt, prompts), instruction, on_token)
+
+    @staticmethod
+    def _release_rows(releases: List[Dict]) -> List[Dict]:
+        """提取发布信息中需要发送给模型的字段"""
+        return [{
+            "版本": release.get("tag_name", "未知版本"),
+            "发布时间": release.get("published_at", "未知时间"),
+            "标题": release.get("name", "无标题"),
+            "描述": (release.get("body") or "无描述")[:500]
+        } for release in releases]
+
+    @staticmethod
+    def _issue_rows(issues: List[Dict]) -> List[Dict]:
+        return [{"编号": i.get("number"), "状态": i.get("state"), "标题": i.get("title")} for i in issues]
+
+    @staticmethod
+    def _pr_rows(prs: List[Dict]) -> List[Dict]:
+        return [{"编号": p.get("number"), "状态": p.get("state"), "标题": p.get("title"), "是否合并": "是" if p.get("merged_at") else "否"} for p in prs]
+
+    def summarize_releases(self, releases: List[Dict], on_token: Optional[Callable[[str], None]] = None) -> str:
+        """总结发布信息（on_token为可选的流式回调，见_call_api）"""
         if not releases:
             return "无最新发布信息"
             
-        release_data = []
-        for release in releases:
-            release_data.append({
-                "版本": release.get("tag_name", "未知版本"),
-                "发布时间": release.get("published_at", "未知时间"),
-                "标题": release.get("name", "无标题"),
-                "描述": release.get("body", "无描述")[:500]
-            })
+        release_data = self._release_rows(releases)
         
         # 加载system-role提示词
         prompt_file = "config/prompts/github_release_prompts.txt"
@@ -82,15 +337,20 @@ class DeepSeekClient:
             systemPrompt = "你是一个专业的GitHub仓库分析助手，擅长总结代码仓库的活动和变化。"    
 
         prompt = f"""Release: {json.dumps(release_data, ensure_ascii=False, indent=2)}"""
-        return self._call_api([{"role": "system", "content": systemPrompt},{"role": "user", "content": prompt}])
+        if not self._fits(systemPrompt, prompt):
+            return self._map_reduce(systemPrompt, {"Release": release_data}, on_token)
+        return self._call_api([{"role": "system", "content": systemPrompt},{"role": "user", "content": prompt}], on_token)
  
-    def summarize_issues_prs(self, issues: List[Dict], prs: List[Dict]) -> str:
-        """总结Issues和PRs"""
+    def summarize_issues_prs(self,
+                             issues: List[Dict],
+                             prs: List[Dict],
+                             on_token: Optional[Callable[[str], None]] = None) -> str:
+        """总结Issues和PRs（on_token为可选的流式回调，见_call_api）"""
         if not issues and not prs:
             return "无最近社区活动"
             
-        issue_data = [{"编号": i.get("number"), "状态": i.get("state"), "标题": i.get("title")} for i in issues]
-        pr_data = [{"编号": p.get("number"), "状态": p.get("state"), "标题": p.get("title"), "是否合并": "是" if p.get("merged_at") else "否"} for p in prs]
+        issue_data = self._issue_rows(issues)
+        pr_data = self._pr_rows(prs)
         
         # 加载system-role提示词
         prompt_file = "config/prompts/issues_pr_prompts.txt"
@@ -104,9 +364,54 @@ class DeepSeekClient:
         prompt = f"""Issues: {json.dumps(issue_data, ensure_ascii=False)}
                      Pull Requests: {json.dumps(pr_data, ensure_ascii=False)}
                     """
+        if not self._fits(systemPrompt, prompt):
+            return self._map_reduce(systemPrompt, {"Issues": issue_data, "Pull Requests": pr_data}, on_token)
         return self._call_api([{"role": "system", "content": systemPrompt},
-                               {"role": "user", "content": prompt}])
+                               {"role": "user", "content": prompt}], on_token)
     
+    def summarize_rollup(self,
+                         daily_summaries: List[str],
+                         releases: List[Dict],
+                         issues: List[Dict],
+                         prs: List[Dict]) -> str:
+        """
+        把多份日报总结汇总为周报/月报
+
+        参数:
+            daily_summaries: 按日期排列的日报总结（每份以日期标题开头）
+            releases: 没有日报的日期中的发布
+            issues: 没有日报的日期中的Issues
+            prs: 没有日报的日期中的PR
+
+        返回:
+            汇总报告（只有一份日报且没有其他数据时直接返回该日报总结）
+        """
+        # 加载system-role提示词
+        prompt_file = "config/prompts/rollup_prompts.txt"
+        
+        # 尝试从文件加载
+        if self.config.load_prompt("rollup_prompts", prompt_file):
+            systemPrompt = self.config.get_prompt("rollup_prompts")
+        else:
+            systemPrompt = "你是一个专业的GitHub仓库分析助手，擅长把每日活动总结汇总为周期报告。"
+
+        parts = list(daily_summaries)
+        sections = {
+            label: rows for label, rows in (
+                ("Release", self._release_rows(releases)),
+                ("Issues", self._issue_rows(issues)),
+                ("Pull Requests", self._pr_rows(prs)),
+            ) if rows
+        }
+        if sections:
+            prompt = "\n".join(f"{label}: {json.dumps(rows, ensure_ascii=False)}" for label, rows in sections.items())
+            if not self._fits(systemPrompt, prompt):
+                prompt = self._map_reduce(systemPrompt, sections)
+            parts.append(f"【未生成日报的日期中的活动】\n{prompt}")
+        if not parts:
+            return "该时间段内无活动"
+        return self._reduce(systemPrompt, parts, instruction=_ROLLUP_INSTRUCTION)
+
     def analyze_hackernews_trends(self, stories: List[Dict]) -> Optional[str]:
         """
         分析HackerNews热点并生成技术趋势总结
@@ -0,0 +1,54 @@
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Iterator
+
+class RequestLimiter:
+    """
+    大模型请求的并发与速率限制（线程安全，同一客户端的所有调用共享）
+
+    同时进行中的请求数不超过 max_concurrent；任意60秒内发出的请求数不超过
+    requests_per_minute（滑动窗口，0表示不限制），超出时挂起调用方直到窗口内最早的请求过期。
+    """
+
+    WINDOW = 60.0
+
+    def __init__(self, max_concurrent: int = 4, requests_per_minute: int = 0):
+        """
+        初始化限制器
+
+        参数:
+            max_concurrent: 最大并发请求数
+            requests_per_minute: 每分钟请求数上限，0表示不限制
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_concurrent = max(1, max_concurrent)
+        self.requests_per_minute = max(0, requests_per_minute)
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrent)
+        self._sent: Deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def _wait_for_budget(self):
+        """按每分钟预算登记一次请求，必要时阻塞"""
+        if not self.requests_per_minute:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= self.WINDOW:
+                    self._sent.popleft()
+                if len(self._sent) < self.requests_per_minute:
+                    self._sent.append(now)
+                    return
+                wait = self.WINDOW - (now - self._sent[0])
+            self.logger.info(f"大模型请求达到每分钟 {self.requests_per_minute} 次上限，等待 {wait:.1f} 秒")
+            time.sleep(wait)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """占用一个请求名额（并发名额在退出时释放）"""
+        with self._semaphore:
+            self._wait_for_budget()
+            yield
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+class ResponseCache:
+    """
+    大模型响应缓存（SQLite，跨进程持久化）
+
+    以请求内容（模型、温度、最大token数和全部消息，包括system提示词）的SHA-256为键，
+    相同请求直接返回上次的结果。条目超过ttl秒后失效；条目数超过max_entries时
+    按最近访问时间淘汰最旧的条目（LRU）。只应缓存成功的响应。
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at);
+    """
+
+    def __init__(self, db_path: str, ttl: int = 7 * 24 * 3600, max_entries: int = 5000):
+        """
+        初始化缓存
+
+        参数:
+            db_path: 缓存数据库路径
+            ttl: 条目有效期（秒），0表示永不过期
+            max_entries: 最多保留的条目数
+        """
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        dir_path = os.path.dirname(db_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接并在一个事务中执行，成功提交、异常回滚（每次操作独立连接，线程安全）"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(request: Dict[str, Any]) -> str:
+        """根据请求参数计算缓存键（键顺序无关）"""
+        canonical = json.dumps(request, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存的响应，不存在或已过期时返回None"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and self.ttl and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row:
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        with self._stats_lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, key: str, response: str):
+        """保存响应，并淘汰超出容量的最久未访问条目"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            conn.execute(
+                """DELETE FROM responses WHERE key IN (
+                       SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)""",
+                (self.max_entries,)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """返回本进程的命中/未命中次数和当前条目数"""
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
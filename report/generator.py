@@ -1,14 +1,80 @@
 import os
 import json
+import time
 import logging
-from datetime import datetime, date, timezone
-from typing import List, Tuple, Optional, Dict
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta, timezone
+from typing import Callable, List, Tuple, Optional, Dict
 from core.config import Config
 from subscription.models import Subscription
+from subscription.raw_storage import RawDataStorage
 from llm.deepseek import DeepSeekClient
 from notification.manager import NotificationManager
 from utils.markdown_converter import MarkdownConverter
 
+# 汇总报告周期 -> 默认天数
+ROLLUP_PERIODS = {"weekly": 7, "monthly": 30}
+
+# 日报中AI总结部分的起止标题（见_format_markdown）
+_SUMMARY_START = "## 📝 AI智能总结"
+_SUMMARY_END = "## 🔍 原始数据预览"
+
+# 旧版本写入报告的调用失败提示
+_LEGACY_ERROR_TEXT = "未能生成总结（"
+
+class _ReportProgress:
+    """
+    流式生成报告时的进度：累积各部分已生成的内容，节流地把当前报告写入 {报告路径}.partial
+    并通知调用方；完整报告写入后删除部分文件（正式报告只在生成完成后写入，已存在即跳过的语义不变）
+    """
+
+    # 两次写入部分报告之间的最小间隔（秒）
+    FLUSH_INTERVAL = 0.5
+
+    def __init__(self,
+                 report_path: str,
+                 render: Callable[[Dict[str, str]], str],
+                 on_progress: Optional[Callable[[str], None]] = None):
+        self.partial_path = f"{report_path}.partial"
+        self.render = render
+        self.on_progress = on_progress
+        self.summaries = {"releases": "", "issues_prs": ""}
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+
+    def callback(self, section: str) -> Callable[[str], None]:
+        """返回某部分总结的流式回调"""
+        return lambda text: self._append(section, text)
+
+    def _append(self, section: str, text: str):
+        with self._lock:
+            self.summaries[section] += text
+            now = time.monotonic()
+            if now - self._flushed_at < self.FLUSH_INTERVAL:
+                return
+            self._flushed_at = now
+            content = self.render({key: value or "（生成中…）" for key, value in self.summaries.items()})
+            with open(self.partial_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            if self.on_progress:
+                self.on_progress(content)
+
+    def discard(self):
+        """生成失败：删除部分报告"""
+        with self._lock:
+            if os.path.exists(self.partial_path):
+                os.remove(self.partial_path)
+
+    def finish(self, content: str):
+        """完整报告已写入：删除部分报告并通知最终内容"""
+        with self._lock:
+            if os.path.exists(self.partial_path):
+                os.remove(self.partial_path)
+            if self.on_progress:
+                self.on_progress(content)
+
 class AIReportGenerator:
     """报告生成器：读取订阅原始数据，生成AI总结报告"""
     
@@ -16,7 +82,10 @@ class AIReportGenerator:
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.raw_data_dir = config.get("subscription.raw_data_dir", "data/raw_subscription_data")
+        self.raw_storage = RawDataStorage(config)
         self.report_output_dir = config.get("report.output_dir", "ai_reports")
+        # 批量生成报告时的并发数（1为逐个生成），大模型请求总并发另受deepseek.max_concurrent限制
+        self.max_workers = max(1, config.get("report.max_workers", 1))
         os.makedirs(self.report_output_dir, exist_ok=True)
         self.notificationManager =  NotificationManager(config)
         self.converter = MarkdownConverter()
@@ -56,51 +125,52 @@ class AIReportGenerator:
         Returns:
             符合条件的原始数据列表
         """
-        raw_data_list = []
-        if not os.path.exists(self.raw_data_dir):
-            return raw_data_list
-        
         # 处理查询时间（确保无时区信息）
         query_start = self._ensure_naive_datetime(start_time) if start_time else None
         query_end = self._ensure_naive_datetime(end_time) if end_time else None
         
-        # 遍历所有原始数据文件
-        for filename in os.listdir(self.raw_data_dir):
-            if not filename.endswith("_raw.json"):
-                continue
-            file_path = os.path.join(self.raw_data_dir, filename)
-            
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                
-                # 筛选订阅ID
-                if sub_id is not None and data["subscription_id"] != sub_id:
-                    continue
-                
-                # 解析数据时间范围（确保无时区信息）
-                try:
-                    data_start = self._parse_iso_datetime(data["time_range"]["start"])
-                    data_end = self._parse_iso_datetime(data["time_range"]["end"])
-                except Exception as e:
-                    self.logger.warning(f"解析 {filename} 的时间范围失败: {str(e)}")
-                    continue
-                
-                # 筛选时间范围
-                if query_start and data_end < query_start:
-                    continue
-                if query_end and data_start > query_end:
-                    continue
-                
-                raw_data_list.append(data)
-            except Exception as e:
-                self.logger.error(f"加载原始数据 {filename} 失败: {str(e)}")
-        
-        # 按时间排序（最新在前）
-        return raw_data_list
+        return self.raw_storage.query(sub_id=sub_id, start_time=query_start, end_time=query_end)
+
+    def _summarize(self,
+                   releases: List[dict],
+                   issues: List[dict],
+                   prs: List[dict],
+                   progress: Optional[_ReportProgress] = None) -> Dict[str, str]:
+        """
+        同时请求发布总结和Issues/PR总结（两次调用互不依赖），指定progress时流式更新部分报告
+
+        任一部分失败时抛出DeepSeekAPIError（不生成只含错误信息的报告）
+        """
+        releases_token = progress.callback("releases") if progress else None
+        issues_prs_token = progress.callback("issues_prs") if progress else None
+        try:
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-section") as executor:
+                releases_future = executor.submit(self.deepseek_client.summarize_releases, releases, releases_token)
+                issues_prs = self.deepseek_client.summarize_issues_prs(issues, prs, issues_prs_token)
+                return {"releases": releases_future.result(), "issues_prs": issues_prs}
+        except Exception:
+            if progress:
+                progress.discard()
+            raise
+
+    def _progress_for(self,
+                      report_path: str,
+                      render: Callable[[Dict[str, str]], str],
+                      on_progress: Optional[Callable[[str], None]]) -> Optional[_ReportProgress]:
+        """调用方需要部分结果或启用了deepseek.stream时，返回流式进度，否则返回None"""
+        if on_progress or self.deepseek_client.stream:
+            return _ReportProgress(report_path, render, on_progress)
+        return None
 
-    def generate_single_raw_report(self, raw_data: dict,recipients: Optional[List[str]] = None,) -> Tuple[bool, str, Optional[str]]:
-        """基于单条原始数据生成AI总结报告"""
+    def generate_single_raw_report(self,
+                                   raw_data: dict,
+                                   recipients: Optional[List[str]] = None,
+                                   on_progress: Optional[Callable[[str], None]] = None) -> Tuple[bool, str, Optional[str]]:
+        """
+        基于单条原始数据生成AI总结报告
+
+        on_progress为可选回调：生成过程中以当前的部分报告（Markdown）多次调用，完成时以完整报告调用一次
+        """
         if not self.deepseek_client:
             return False, "未配置DeepSeek API Key，无法生成AI总结", None
         
@@ -114,29 +184,32 @@ class AIReportGenerator:
             prs = raw_data["data"]["pull_requests"]
             issues = raw_data["data"]["issues"]
 
+            start_date = self._parse_iso_datetime(time_range["start"]).strftime("%Y%m%d")
+            safe_repo_name = repo_full_name.replace("/", "_")
+            report_filename = f"{start_date}_sub{sub_id}_{safe_repo_name}_ai_report.md"
+            report_path = os.path.join(self.report_output_dir, report_filename)
+
+            def render(summaries: Dict[str, str]) -> str:
+                return self._format_markdown(
+                    repo_info=repo_info,
+                    time_range=time_range,
+                    summaries=summaries,
+                    raw_data=raw_data["data"]
+                )
+
             # 2. AI总结
             self.logger.info(f"生成订阅ID {sub_id}（{repo_full_name}）的AI总结...")
-            summaries = {
-                "releases": self.deepseek_client.summarize_releases(releases),
-                "issues_prs": self.deepseek_client.summarize_issues_prs(issues, prs)
-            }
+            progress = self._progress_for(report_path, render, on_progress)
+            summaries = self._summarize(releases, issues, prs, progress)
 
             # 3. 生成Markdown内容
-            markdown_content = self._format_markdown(
-                repo_info=repo_info,
-                time_range=time_range,
-                summaries=summaries,
-                raw_data=raw_data["data"]
-            )
+            markdown_content = render(summaries)
 
             # 4. 保存报告
-            start_date = self._parse_iso_datetime(time_range["start"]).strftime("%Y%m%d")
-            safe_repo_name = repo_full_name.replace("/", "_")
-            report_filename = f"{start_date}_sub{sub_id}_{safe_repo_name}_ai_report.md"
-            report_path = os.path.join(self.report_output_dir, report_filename)
-
             with open(report_path, "w", encoding="utf-8") as f:
                 f.write(markdown_content)
+            if progress:
+                progress.finish(markdown_content)
 
             # 5. 发送提醒
             if recipients:
@@ -151,8 +224,20 @@ class AIReportGenerator:
     def generate_subscription_report(self, 
                                     sub_id: int,
                                     start_time: Optional[datetime] = None,
-                                    end_time: Optional[datetime] = None,) -> Tuple[bool, str, Optional[str]]:
-        """生成报告（支持时间范围，默认最新数据）"""
+                                    end_time: Optional[datetime] = None,
+                                    on_progress: Optional[Callable[[str], None]] = None) -> Tuple[bool, str, Optional[str]]:
+        """生成报告（支持时间范围，默认最新数据；on_progress为可选的部分报告回调，见generate_single_raw_report）"""
+        # 按时间范围生成报告（多份数据合并，每个条目只读取最新版本）
+        if start_time and end_time:
+            merged = self.raw_storage.load_merged(
+                sub_id,
+                self._ensure_naive_datetime(start_time),
+                self._ensure_naive_datetime(end_time)
+            )
+            if not merged:
+                return False, f"未找到订阅ID {sub_id} 的原始数据", None
+            return self._generate_merged_report(merged, start_time, end_time, on_progress)
+        
         # 加载符合条件的原始数据
         raw_data_list = self.load_subscription_raw_data(
             sub_id=sub_id,
@@ -162,97 +247,255 @@ class AIReportGenerator:
         if not raw_data_list:
             return False, f"未找到订阅ID {sub_id} 的原始数据", None
         
-        # 按时间范围生成报告（多份数据合并）
-        if start_time and end_time:
-            return self._generate_merged_report(raw_data_list, start_time, end_time)
-        # 否则使用最新的单份数据
-        return self.generate_single_raw_report(raw_data_list[0])
+        # 否则使用最新的单份数据（清单按数据日期升序返回）
+        return self.generate_single_raw_report(raw_data_list[-1], on_progress=on_progress)
 
-    def _generate_merged_report(self, raw_data_list: List[dict], start_time: datetime, end_time: datetime) -> Tuple[bool, str, Optional[str]]:
-        """合并多个原始数据生成报告"""
+    def _generate_merged_report(self,
+                                merged: dict,
+                                start_time: datetime,
+                                end_time: datetime,
+                                on_progress: Optional[Callable[[str], None]] = None) -> Tuple[bool, str, Optional[str]]:
+        """基于合并后的原始数据（见RawDataStorage.load_merged，已按ID去重）生成报告"""
         if not self.deepseek_client:
             return False, "未配置DeepSeek API Key", None
         
         try:
-            # 合并数据
-            merged_data = {
-                "releases": [],
-                "pull_requests": [],
-                "issues": []
-            }
-            repo_info = raw_data_list[0]["data"]["repo_info"]
-            for data in raw_data_list:
-                merged_data["releases"].extend(data["data"]["releases"])
-                merged_data["pull_requests"].extend(data["data"]["pull_requests"])
-                merged_data["issues"].extend(data["data"]["issues"])
-            
-            # 去重（按ID）
-            merged_data["releases"] = list({r["id"]: r for r in merged_data["releases"]}.values())
-            merged_data["pull_requests"] = list({p["id"]: p for p in merged_data["pull_requests"]}.values())
-            merged_data["issues"] = list({i["id"]: i for i in merged_data["issues"]}.values())
+            merged_data = merged["data"]
+            repo_info = merged_data["repo_info"]
 
-            # AI总结
-            summaries = {
-                "releases": self.deepseek_client.summarize_releases(merged_data["releases"]),
-                "issues_prs": self.deepseek_client.summarize_issues_prs(
-                    merged_data["issues"], 
-                    merged_data["pull_requests"]
-                )
-            }
-
-            # 生成报告
             start_str = self._ensure_naive_datetime(start_time).strftime("%Y%m%d")
             end_str = self._ensure_naive_datetime(end_time).strftime("%Y%m%d")
             safe_repo_name = repo_info["full_name"].replace("/", "_")
-            report_filename = f"{start_str}_to_{end_str}_sub{raw_data_list[0]['subscription_id']}_{safe_repo_name}_ai_report.md"
+            report_filename = f"{start_str}_to_{end_str}_sub{merged['subscription_id']}_{safe_repo_name}_ai_report.md"
             report_path = os.path.join(self.report_output_dir, report_filename)
 
-            markdown_content = self._format_markdown(
-                repo_info=repo_info,
-                time_range={
-                    "start": start_time.isoformat(),
-                    "end": end_time.isoformat()
-                },
-                summaries=summaries,
-                raw_data=merged_data
-            )
+            def render(summaries: Dict[str, str]) -> str:
+                return self._format_markdown(
+                    repo_info=repo_info,
+                    time_range={
+                        "start": start_time.isoformat(),
+                        "end": end_time.isoformat()
+                    },
+                    summaries=summaries,
+                    raw_data=merged_data
+                )
 
+            # AI总结
+            progress = self._progress_for(report_path, render, on_progress)
+            summaries = self._summarize(merged_data["releases"], merged_data["issues"], merged_data["pull_requests"], progress)
+
+            # 生成报告
+            markdown_content = render(summaries)
             with open(report_path, "w", encoding="utf-8") as f:
                 f.write(markdown_content)
+            if progress:
+                progress.finish(markdown_content)
             return True, f"合并报告生成成功", report_path
         except Exception as e:
             return False, f"合并报告失败: {str(e)}", None
 
+    def daily_report_path(self, sub_id: int, repo_full_name: str, data_date: str) -> str:
+        """返回订阅某天（YYYYMMDD）日报的路径"""
+        safe_repo_name = repo_full_name.replace("/", "_")
+        return os.path.join(self.report_output_dir, f"{data_date}_sub{sub_id}_{safe_repo_name}_ai_report.md")
+
+    @staticmethod
+    def _extract_summary(markdown_content: str) -> Optional[str]:
+        """从日报中提取AI总结部分，格式不符时返回None"""
+        start = markdown_content.find(_SUMMARY_START)
+        if start < 0:
+            return None
+        end = markdown_content.find(_SUMMARY_END, start)
+        summary = markdown_content[start + len(_SUMMARY_START):end if end >= 0 else None]
+        # 旧版本在调用失败时会把错误信息写入报告，这类总结不可用
+        if _LEGACY_ERROR_TEXT in summary:
+            return None
+        return summary.strip().rstrip("-").strip() or None
+
+    def generate_rollup_report(self,
+                               sub_id: int,
+                               period: str = "weekly",
+                               start_time: Optional[datetime] = None,
+                               end_time: Optional[datetime] = None) -> Tuple[bool, str, Optional[str]]:
+        """
+        基于已生成的日报生成周报/月报
+
+        已有日报的日期只使用日报中的AI总结，没有日报的日期才读取原始数据，
+        汇总时只需一次较小的模型调用，而不必重新总结整个时间段的全部条目
+
+        Args:
+            sub_id: 订阅ID
+            period: weekly / monthly（未指定开始时间时决定时间范围天数）
+            start_time: 可选，开始时间，默认为结束时间前一个周期
+            end_time: 可选，结束时间（不包含），默认为今天0点（UTC）
+
+        Returns:
+            (是否成功, 提示信息, 报告路径)
+        """
+        if not self.deepseek_client:
+            return False, "未配置DeepSeek API Key", None
+        if period not in ROLLUP_PERIODS:
+            return False, f"不支持的汇总周期: {period}（可选: {', '.join(ROLLUP_PERIODS)}）", None
+
+        end = self._ensure_naive_datetime(end_time) if end_time else \
+            datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        start = self._ensure_naive_datetime(start_time) if start_time else end - timedelta(days=ROLLUP_PERIODS[period])
+
+        try:
+            days = self.raw_storage.manifest.days(sub_id, start.strftime("%Y%m%d"), end.strftime("%Y%m%d"))
+            if not days:
+                return False, f"未找到订阅ID {sub_id} 的原始数据", None
+
+            # 已有日报的日期使用日报总结，其余日期合并原始数据（同一条目保留最后一次出现的版本）
+            daily_summaries = []
+            missing: Dict[str, Dict[int, dict]] = {"releases": {}, "pull_requests": {}, "issues": {}}
+            repo_info = None
+            for data_date, repo_full_name in days:
+                report_path = self.daily_report_path(sub_id, repo_full_name, data_date)
+                summary = None
+                if os.path.exists(report_path):
+                    with open(report_path, "r", encoding="utf-8") as f:
+                        summary = self._extract_summary(f.read())
+                if summary:
+                    day = datetime.strptime(data_date, "%Y%m%d").strftime("%Y-%m-%d")
+                    daily_summaries.append(f"【{day}】\n{summary}")
+                    continue
+                raw_data = self.raw_storage.load_day(sub_id, repo_full_name, datetime.strptime(data_date, "%Y%m%d").date())
+                if not raw_data:
+                    continue
+                repo_info = raw_data["data"].get("repo_info") or repo_info
+                for kind, items in missing.items():
+                    for item in raw_data["data"].get(kind) or []:
+                        items[item["id"]] = item
+
+            last_date, repo_full_name = days[-1]
+            if repo_info is None:
+                last_raw = self.raw_storage.load_day(sub_id, repo_full_name, datetime.strptime(last_date, "%Y%m%d").date())
+                repo_info = (last_raw or {}).get("data", {}).get("repo_info") or {"full_name": repo_full_name}
+
+            self.logger.info(
+                f"生成订阅ID {sub_id}（{repo_full_name}）的{period}汇总：日报 {len(daily_summaries)} 份，"
+                f"未生成日报的条目 {sum(len(items) for items in missing.values())} 个"
+            )
+            summary = self.deepseek_client.summarize_rollup(
+                daily_summaries,
+                list(missing["releases"].values()),
+                list(missing["issues"].values()),
+                list(missing["pull_requests"].values())
+            )
+
+            start_str = start.strftime("%Y%m%d")
+            end_str = end.strftime("%Y%m%d")
+            safe_repo_name = repo_full_name.replace("/", "_")
+            report_filename = f"{start_str}_to_{end_str}_sub{sub_id}_{safe_repo_name}_{period}_ai_report.md"
+            report_path = os.path.join(self.report_output_dir, report_filename)
+            markdown_content = self._format_rollup_markdown(
+                repo_info=repo_info,
+                start_time=start,
+                end_time=end,
+                period=period,
+                summary=summary,
+                summarized_days=len(daily_summaries),
+                total_days=len(days)
+            )
+            with open(report_path, "w", encoding="utf-8") as f:
+                f.write(markdown_content)
+            return True, f"汇总报告生成成功", report_path
+        except Exception as e:
+            return False, f"汇总报告生成失败: {str(e)}", None
+
+    def _format_rollup_markdown(self,
+                                repo_info: dict,
+                                start_time: datetime,
+                                end_time: datetime,
+                                period: str,
+                                summary: str,
+                                summarized_days: int,
+                                total_days: int) -> str:
+        """格式化周报/月报Markdown内容"""
+        title = "周报" if period == "weekly" else "月报"
+        md = [
+            f"# 🤖 GitHub订阅AI{title}",
+            f"**仓库**: {repo_info.get('full_name', '未知')} [{repo_info.get('html_url', '')}]({repo_info.get('html_url', '')})",
+            f"**时间范围**: {start_time.strftime('%Y-%m-%d %H:%M')} ~ {end_time.strftime('%Y-%m-%d %H:%M')}",
+            f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"**数据来源**: {total_days} 天原始数据，其中 {summarized_days} 天使用已生成的日报总结",
+            "",
+            "## 📊 仓库基本信息",
+            f"- 名称: {repo_info.get('name', '未知')}",
+            f"- 描述: {repo_info.get('description', '无描述')}",
+            f"- 星级: {repo_info.get('stargazers_count', 0)} ⭐",
+            f"- 分支: {repo_info.get('forks_count', 0)} 🍴",
+            "",
+            "---",
+            f"## 📝 AI{title}总结",
+            summary,
+            "",
+        ]
+        return "\n".join(md)
+
     def generate_all_reports(self,subscriptions: Optional[List[Subscription]] = None,) -> Tuple[int, int, List[str]]:
-        """生成所有未处理的原始数据报告（按时间排序）"""
-        raw_data_list = self.load_subscription_raw_data()
-        if not raw_data_list:
-            return 0, 0, []
-        
+        """
+        生成所有未处理的原始数据报告（按时间排序，逐个读取原始数据，不一次性全部加载）
+
+        report.max_workers大于1时多份报告并发生成，同时在途的原始数据不超过并发数的2倍；
+        返回的报告路径顺序与原始数据顺序一致
+        """
         success_count = 0
+        total_count = 0
         report_paths = []
-        for raw_data in raw_data_list:
-            # 检查报告是否已存在
-            start_date = self._parse_iso_datetime(raw_data["time_range"]["start"]).strftime("%Y%m%d")
-            sub_id = raw_data["subscription_id"]
-            safe_repo_name = raw_data["repo_full_name"].replace("/", "_")
-            report_filename = f"{start_date}_sub{sub_id}_{safe_repo_name}_ai_report.md"
-            report_path = os.path.join(self.report_output_dir, report_filename)
-            
-            if os.path.exists(report_path):
-                self.logger.info(f"报告已存在，跳过：{report_filename}")
-                continue
-            recipients = None
-            for sub in subscriptions:
-                if sub.id == sub_id:
-                    recipients = sub.subscribers
-            # 生成报告
-            success, msg, path = self.generate_single_raw_report(raw_data, recipients)
+        recipients_by_sub = {sub.id: sub.subscribers for sub in subscriptions or []}
+
+        def pending():
+            """跳过已有报告的原始数据（按清单记录判断，不打开文件），产出 (原始数据, 收件人)"""
+            nonlocal total_count
+            for rel_path, sub_id, repo_full_name, window_start in self.raw_storage.manifest.windows():
+                total_count += 1
+                # 检查报告是否已存在
+                start_date = self._parse_iso_datetime(window_start).strftime("%Y%m%d")
+                report_path = self.daily_report_path(sub_id, repo_full_name, start_date)
+
+                if os.path.exists(report_path):
+                    self.logger.info(f"报告已存在，跳过：{os.path.basename(report_path)}")
+                    continue
+                # 只读取仍需生成报告的原始数据
+                raw_data = self.raw_storage.load_recorded(rel_path)
+                if raw_data is not None:
+                    yield raw_data, recipients_by_sub.get(sub_id)
+
+        def collect(result: Tuple[bool, str, Optional[str]]):
+            nonlocal success_count
+            success, msg, path = result
             if success and path:
                 success_count += 1
                 report_paths.append(path)
-        
-        return success_count, len(raw_data_list), report_paths
+            else:
+                self.logger.warning(msg)
+
+        if self.max_workers == 1:
+            for raw_data, recipients in pending():
+                collect(self.generate_single_raw_report(raw_data, recipients))
+            self._log_cache_stats()
+            return success_count, total_count, report_paths
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="report-worker") as executor:
+            in_flight = deque()
+            for raw_data, recipients in pending():
+                in_flight.append(executor.submit(self.generate_single_raw_report, raw_data, recipients))
+                if len(in_flight) >= self.max_workers * 2:
+                    collect(in_flight.popleft().result())
+            while in_flight:
+                collect(in_flight.popleft().result())
+
+        self._log_cache_stats()
+        return success_count, total_count, report_paths
+
+    def _log_cache_stats(self):
+        """记录大模型响应缓存的命中情况"""
+        cache = self.deepseek_client.cache if self.deepseek_client else None
+        if cache:
+            stats = cache.stats()
+            self.logger.info(f"大模型响应缓存：命中 {stats['hits']} 次，未命中 {stats['misses']} 次，共 {stats['entries']} 条")
 
     def _format_markdown(self, repo_info: dict, time_range: dict, summaries: dict, raw_data: dict) -> str:
         """格式化Markdown报告内容"""
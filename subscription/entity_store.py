@@ -0,0 +1,147 @@
+import os
+import json
+import sqlite3
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Set, Tuple
+
+# 各类条目的版本字段：同一id的条目在该字段变化时才产生新版本
+VERSION_FIELDS = {"releases": "published_at", "pull_requests": "updated_at", "issues": "updated_at"}
+
+# 单条SQL中IN参数的数量上限（低于SQLite默认的999）
+_QUERY_CHUNK = 500
+
+
+class EntityStore:
+    """
+    条目版本存储（SQLite）
+
+    每个发布/PR/Issue的每个版本（按id和版本字段区分）只保存一份，
+    每日原始数据文件中只记录 {"id", "version"} 引用。长期活跃的PR即使每天都被更新，
+    未变化的版本也不会在多个日文件中重复保存。
+
+    每次写入（包括已存在的版本）都会刷新版本的touched_at，清理时跳过最近被写入过的版本，
+    正在保存、尚未登记到清单的文件所引用的版本不会被并发的清理删除。
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entities (
+            kind TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            version TEXT NOT NULL,
+            body TEXT NOT NULL,
+            touched_at REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (kind, id, version)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: str):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        dir_path = os.path.dirname(db_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entities)")}
+            if "touched_at" not in columns:
+                conn.execute("ALTER TABLE entities ADD COLUMN touched_at REAL NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接并在一个事务中执行，成功提交、异常回滚（每次操作独立连接，线程安全）"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def version_of(kind: str, item: Dict) -> str:
+        """返回条目的版本（版本字段为空时为空字符串）"""
+        return item.get(VERSION_FIELDS[kind]) or ""
+
+    def put_many(self, kind: str, items: List[Dict]) -> List[Dict]:
+        """
+        保存条目（已存在的版本不重复写入，只刷新touched_at）
+
+        参数:
+            kind: 条目类别（releases / pull_requests / issues）
+            items: 条目列表
+
+        返回:
+            与items顺序一致的引用列表 [{"id": id, "version": version}]
+        """
+        refs = [{"id": item["id"], "version": self.version_of(kind, item)} for item in items]
+        if items:
+            now = time.time()
+            with self._connect() as conn:
+                conn.executemany(
+                    """INSERT INTO entities (kind, id, version, body, touched_at) VALUES (?, ?, ?, ?, ?)
+                       ON CONFLICT (kind, id, version) DO UPDATE SET touched_at = excluded.touched_at""",
+                    [
+                        (kind, ref["id"], ref["version"],
+                         json.dumps(item, ensure_ascii=False, separators=(",", ":")), now)
+                        for ref, item in zip(refs, items)
+                    ]
+                )
+        return refs
+
+    def get_many(self, kind: str, refs: List[Dict]) -> List[Dict]:
+        """
+        按引用读取条目
+
+        参数:
+            kind: 条目类别
+            refs: 引用列表 [{"id", "version"}]
+
+        返回:
+            与refs顺序一致的条目列表（缺失的引用会被跳过并记录警告）
+        """
+        wanted = {(ref["id"], ref["version"]) for ref in refs}
+        ids = sorted({ref["id"] for ref in refs})
+        bodies: Dict[Tuple[int, str], Dict] = {}
+        with self._connect() as conn:
+            for offset in range(0, len(ids), _QUERY_CHUNK):
+                chunk = ids[offset:offset + _QUERY_CHUNK]
+                rows = conn.execute(
+                    f"SELECT id, version, body FROM entities WHERE kind = ? AND id IN ({','.join('?' * len(chunk))})",
+                    [kind, *chunk]
+                ).fetchall()
+                for entity_id, version, body in rows:
+                    if (entity_id, version) in wanted:
+                        bodies[(entity_id, version)] = json.loads(body)
+
+        items = []
+        for ref in refs:
+            item = bodies.get((ref["id"], ref["version"]))
+            if item is None:
+                self.logger.warning(f"条目 {kind}#{ref['id']}@{ref['version']} 不存在")
+                continue
+            items.append(item)
+        return items
+
+    def prune(self, referenced: Set[Tuple[str, int, str]], touched_before: float) -> int:
+        """
+        删除未被引用的条目版本
+
+        参数:
+            referenced: 仍被原始数据文件引用的 (类别, id, 版本) 集合
+            touched_before: 只删除touched_at早于该时间戳的版本（应早于开始收集引用的时间，
+                收集期间写入的文件所引用的版本会被保留）
+
+        返回:
+            删除的版本数
+        """
+        with self._connect() as conn:
+            stale = [
+                key for key in conn.execute(
+                    "SELECT kind, id, version FROM entities WHERE touched_at < ?", (touched_before,)
+                )
+                if key not in referenced
+            ]
+            conn.executemany("DELETE FROM entities WHERE kind = ? AND id = ? AND version = ?", stale)
+        return len(stale)
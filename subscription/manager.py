@@ -1,26 +1,60 @@
 import logging
 import os
-import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
+from itertools import islice
 from typing import List, Optional, Tuple, Dict
 from .models import Subscription
-from .storage import SubscriptionStorage
-from github.client import GitHubClient
+from .storage import create_subscription_storage
+from .raw_storage import RawDataStorage
+from github.client import GitHubClient, GitHubAPIError
+from github.graphql import GraphQLFetcher
 from core.config import Config
+from core.file_lock import LeaseManager
 
 class SubscriptionManager:
     """订阅管理核心类，支持处理连续日期范围内的所有数据"""
     
+    # 各类数据用于按天归属和增量水位线的时间字段
+    ITEM_TIME_FIELDS = {"releases": "published_at", "pull_requests": "updated_at", "issues": "updated_at"}
+    
     def __init__(self, config: Config, github_client: GitHubClient):
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.github_client = github_client
-        self.storage = SubscriptionStorage(config)
+        self.storage = create_subscription_storage(config)
+        # 并发处理时保护订阅存储的读-改-写过程
+        self._storage_lock = threading.Lock()
+        self.max_concurrent = config.get("scheduler.max_concurrent", 1)
         self.raw_data_dir = config.get("subscription.raw_data_dir", "data/raw_subscription_data")
+        self.raw_storage = RawDataStorage(config)
+        # 跨进程任务认领：多个进程同时运行时，同一订阅的同一天只会被一个进程抓取
+        self.leases = LeaseManager(
+            config.get("subscription.lease_dir", "data/leases"),
+            ttl=config.get("subscription.lease_ttl", 3600)
+        )
         
         # 确保原始数据目录存在
         os.makedirs(self.raw_data_dir, exist_ok=True)
         
+        # 抓取方式：rest（列表接口）/ search（Search API按时间窗口服务端过滤PR和Issues）/ graphql（每个窗口1次GraphQL查询）
+        self.fetch_mode = config.get("fetch.mode", "rest")
+        self.graphql_fetcher = GraphQLFetcher(
+            github_client,
+            page_size=config.get("fetch.graphql_page_size", 50),
+            repos_per_query=config.get("fetch.graphql_repos_per_query", 5),
+            max_cost_per_query=config.get("fetch.graphql_max_cost", 10)
+        ) if self.fetch_mode == "graphql" else None
+        
+        # 回溯模式：多日范围每类数据只扫描一次，再按天拆分写入
+        self.backfill_enabled = config.get("subscription.backfill", True)
+        # 增量模式：按每个订阅的水位线只抓取新条目
+        self.incremental_enabled = config.get("subscription.incremental", False)
+        # 水位线推进时预留的时钟偏差（秒），覆盖GitHub索引延迟和本机时钟误差
+        self.cursor_skew = config.get("subscription.cursor_skew", 300)
+        
         # 默认时间范围：每日处理前一天数据（00:00 ~ 次日00:00）
         self.default_time_range = {
             "start": lambda: datetime.now().replace(
@@ -31,18 +65,15 @@ class SubscriptionManager:
             )
         }
 
-    # 保持其他方法(add_subscription, delete_subscription等)不变...
     def add_subscription(self, 
                         repo_full_name: str, 
                         subscribers: List[str], 
                         time_range_type: str = "daily") -> Tuple[bool, str]:
-        # 原始实现保持不变
         repo_info = self.github_client.get_repo_info(repo_full_name)
         if not repo_info:
             return False, f"仓库 {repo_full_name} 不存在或无权限访问"
         
-        subs = self.storage.load_subscriptions()
-        if any(sub.repo_full_name == repo_full_name for sub in subs):
+        if self.storage.find_by_repo(repo_full_name):
             return False, f"仓库 {repo_full_name} 已在订阅列表中"
         
         new_sub = Subscription(
@@ -54,39 +85,33 @@ class SubscriptionManager:
             enabled=True
         )
         
-        subs.append(new_sub)
-        self.storage.save_subscriptions(subs)
+        self.storage.add_subscription(new_sub)
         return True, f"订阅成功！订阅ID: {new_sub.id}（仓库: {repo_full_name}）"
 
     def delete_subscription(self, sub_id: int) -> Tuple[bool, str]:
-        # 原始实现保持不变
-        subs = self.storage.load_subscriptions()
-        original_count = len(subs)
-        subs = [sub for sub in subs if sub.id != sub_id]
-        
-        if len(subs) == original_count:
+        if not self.storage.delete_subscription(sub_id):
             return False, f"未找到订阅ID: {sub_id}"
-        
-        self.storage.save_subscriptions(subs)
         return True, f"订阅ID {sub_id} 已成功删除"
 
     def list_subscriptions(self, repo_full_name: Optional[str] = None) -> List[Subscription]:
-        # 原始实现保持不变
-        subs = self.storage.load_subscriptions()
         if repo_full_name:
-            subs = [sub for sub in subs if sub.repo_full_name == repo_full_name]
+            subs = self.storage.find_by_repo(repo_full_name)
+        else:
+            subs = self.storage.load_subscriptions()
         return sorted(subs, key=lambda x: x.id)
 
+    def get_subscription(self, sub_id: int) -> Optional[Subscription]:
+        """按ID获取订阅"""
+        return self.storage.get_subscription(sub_id)
+
     def toggle_subscription_status(self, sub_id: int) -> Tuple[bool, str]:
-        # 原始实现保持不变
-        subs = self.storage.load_subscriptions()
-        for sub in subs:
-            if sub.id == sub_id:
-                sub.enabled = not sub.enabled
-                self.storage.save_subscriptions(subs)
-                status = "启用" if sub.enabled else "禁用"
-                return True, f"订阅ID {sub_id} 已{status}"
-        return False, f"未找到订阅ID: {sub_id}"
+        sub = self.storage.get_subscription(sub_id)
+        if not sub:
+            return False, f"未找到订阅ID: {sub_id}"
+        sub.enabled = not sub.enabled
+        self.storage.update_subscription(sub)
+        status = "启用" if sub.enabled else "禁用"
+        return True, f"订阅ID {sub_id} 已{status}"
 
     def get_subscription_time_range(self, sub: Subscription) -> Tuple[datetime, datetime]:
         # 原始实现保持不变
@@ -95,11 +120,7 @@ class SubscriptionManager:
         return self.default_time_range["start"](), self.default_time_range["end"]()
 
     def _is_duplicate_raw_data(self, sub: Subscription, start_date: date) -> bool:
-        # 原始实现保持不变
-        safe_repo_name = sub.repo_full_name.replace("/", "_")
-        date_str = start_date.strftime("%Y%m%d")
-        target_filename = f"{date_str}_sub{sub.id}_{safe_repo_name}_raw.json"
-        return os.path.exists(os.path.join(self.raw_data_dir, target_filename))
+        return self.raw_storage.exists(sub.id, sub.repo_full_name, start_date)
 
     def _generate_date_list(self, start_date: date, end_date: date) -> List[date]:
         """
@@ -119,11 +140,267 @@ class SubscriptionManager:
             current_date += timedelta(days=1)
         return date_list
 
+    def _fetch_window_data(self, 
+                           repo_full_name: str, 
+                           start_time: datetime, 
+                           end_time: datetime,
+                           limit: Optional[int] = 500) -> Dict:
+        """
+        获取仓库在时间窗口内的全部数据（仓库信息、发布、PR、Issues）
+        
+        Args:
+            repo_full_name: 仓库全名
+            start_time: 窗口开始时间
+            end_time: 窗口结束时间
+            limit: 每类数据的最大条数，None表示不限制
+            
+        Returns:
+            包含repo_info、releases、pull_requests、issues的字典
+            
+        Raises:
+            GitHubAPIError: 任一数据获取失败
+        """
+        if self.graphql_fetcher:
+            return self.graphql_fetcher.fetch_window(repo_full_name, start_time, end_time)
+        
+        repo_info = self.github_client.get_repo_info(repo_full_name)
+        if repo_info is None:
+            # 不写入空数据文件，避免该日期被去重逻辑视为已处理
+            raise GitHubAPIError(f"获取仓库信息失败: {repo_full_name}")
+        
+        return {
+            "repo_info": repo_info,
+            **{
+                kind: self._fetch_endpoint(repo_full_name, kind, start_time, end_time, limit)
+                for kind in self.ITEM_TIME_FIELDS
+            }
+        }
+
+    def _fetch_endpoint(self, 
+                        repo_full_name: str, 
+                        kind: str, 
+                        start_time: datetime, 
+                        end_time: datetime,
+                        limit: Optional[int] = 500) -> List[Dict]:
+        """
+        通过REST（或Search API）获取单类数据在时间窗口内的条目
+        
+        Args:
+            repo_full_name: 仓库全名
+            kind: 数据类型（releases / pull_requests / issues）
+            start_time: 窗口开始时间
+            end_time: 窗口结束时间
+            limit: 最大条数，None表示不限制
+            
+        Returns:
+            条目列表
+        """
+        if kind == "releases":
+            return self.github_client.get_latest_releases(
+                repo_full_name, start_time=start_time, end_time=end_time, limit=limit
+            )
+        if self.fetch_mode == "search":
+            search = (self.github_client.search_pull_requests if kind == "pull_requests"
+                      else self.github_client.search_issues)
+            return list(islice(search(repo_full_name, start_time, end_time), limit))
+        fetch = (self.github_client.get_recent_pull_requests if kind == "pull_requests"
+                 else self.github_client.get_recent_issues)
+        return fetch(repo_full_name, start_time=start_time, end_time=end_time, limit=limit)
+
+    def _day_window(self, current_date: date) -> Tuple[datetime, datetime]:
+        """返回指定日期的UTC时间窗口（当天00:00到次日00:00）"""
+        day_start = datetime.combine(current_date, datetime.min.time())
+        day_end = day_start + timedelta(days=1)
+        return (
+            self.github_client._ensure_utc_timezone(day_start),
+            self.github_client._ensure_utc_timezone(day_end)
+        )
+
+    def _fetch_range_by_day(self, repo_full_name: str, dates: List[date]) -> Dict[date, Dict]:
+        """
+        回溯模式：对整个日期范围每类数据只做一次分页扫描（仓库信息只获取一次），再按天分桶
+        
+        发布按published_at分桶，PR和Issues按updated_at分桶，与逐日抓取时的归属一致
+        
+        Args:
+            repo_full_name: 仓库全名
+            dates: 需要处理的日期列表
+            
+        Returns:
+            日期 -> 当天数据字典（结构同_fetch_window_data）
+            
+        Raises:
+            GitHubAPIError: 任一数据获取失败
+        """
+        range_start, _ = self._day_window(min(dates))
+        _, range_end = self._day_window(max(dates))
+        self.logger.info(f"回溯模式：一次性获取 {repo_full_name} {range_start} ~ {range_end} 的数据并按天分桶")
+        
+        range_data = self._fetch_window_data(repo_full_name, range_start, range_end, limit=None)
+        return self._bucket_by_day(range_data, dates)
+
+    def _bucket_by_day(self, range_data: Dict, dates: List[date]) -> Dict[date, Dict]:
+        """将时间范围内的数据按条目时间（ITEM_TIME_FIELDS）拆分到各日期"""
+        buckets = {
+            d: {"repo_info": range_data["repo_info"], "releases": [], "pull_requests": [], "issues": []}
+            for d in dates
+        }
+        for kind, time_field in self.ITEM_TIME_FIELDS.items():
+            for item in range_data[kind]:
+                item_time = self.github_client._parse_github_datetime(item.get(time_field))
+                if item_time and item_time.date() in buckets:
+                    buckets[item_time.date()][kind].append(item)
+        
+        return buckets
+
+    def _update_last_processed(self, sub_id: int, cursors: Optional[Dict[str, str]] = None):
+        """更新订阅的最后处理时间及增量水位线（线程安全）"""
+        with self._storage_lock:
+            sub = self.storage.get_subscription(sub_id)
+            if not sub:
+                return
+            sub.last_processed_at = datetime.now()
+            if cursors is not None:
+                sub.cursors = cursors
+            self.storage.update_subscription(sub)
+
+    @staticmethod
+    def _merge_items(existing: List[Dict], new_items: List[Dict], time_field: str) -> List[Dict]:
+        """按id合并条目，同一条目保留时间字段较新的版本"""
+        merged = {item["id"]: item for item in existing}
+        for item in new_items:
+            old = merged.get(item["id"])
+            if old is None or (item.get(time_field) or "") >= (old.get(time_field) or ""):
+                merged[item["id"]] = item
+        return list(merged.values())
+
+    def process_incremental_subscription(self, 
+                                         sub: Subscription, 
+                                         now: Optional[datetime] = None) -> Tuple[bool, str, List[str]]:
+        """
+        增量处理单个订阅：从每类数据的水位线（已完整抓取到的时间点）开始只抓取更新的条目
+        
+        新条目按时间归入对应日期的原始数据文件（已存在的文件按id合并），
+        处理成功后推进水位线。首次处理时从默认时间范围的开始时间抓取；
+        守护进程错过的运行会在下一次增量处理时自动补齐，已覆盖的日期不会重复抓取。
+        
+        Args:
+            sub: 订阅对象
+            now: 抓取截止时间，默认当前时间
+            
+        Returns:
+            (是否成功, 提示信息, 原始数据文件路径列表)
+        """
+        if not sub.enabled:
+            return False, f"订阅ID {sub.id} 已禁用，跳过处理", []
+        
+        # 同一订阅的增量处理同时只允许一个进程进行
+        with self.leases.lease(f"sub{sub.id}_incremental") as claimed:
+            if not claimed:
+                return False, f"订阅ID {sub.id} 正由其他进程处理，跳过", []
+            # 认领后重新读取订阅，获取其他进程可能已推进的水位线
+            sub = self.storage.get_subscription(sub.id) or sub
+            return self._process_incremental_claimed(sub, now)
+
+    def _process_incremental_claimed(self, 
+                                     sub: Subscription, 
+                                     now: Optional[datetime] = None) -> Tuple[bool, str, List[str]]:
+        """在已持有租约的情况下执行增量处理（见process_incremental_subscription）"""
+        now = self.github_client._ensure_utc_timezone(now or datetime.now().astimezone())
+        default_start, _ = self._resolve_time_range(sub)
+        
+        # 各类数据的水位线，未记录时使用默认开始时间
+        watermarks = {}
+        for kind in self.ITEM_TIME_FIELDS:
+            cursor = self.github_client._parse_github_datetime(sub.cursors.get(kind))
+            watermarks[kind] = cursor or default_start
+        
+        self.logger.info(
+            f"增量处理订阅ID {sub.id}（{sub.repo_full_name}），水位线: "
+            + ", ".join(f"{kind}={watermarks[kind].isoformat()}" for kind in watermarks)
+        )
+        try:
+            if self.graphql_fetcher:
+                # GraphQL单次查询即返回全部类型，从最早的水位线开始取，再按各自水位线过滤
+                range_data = self.graphql_fetcher.fetch_window(
+                    sub.repo_full_name, min(watermarks.values()), now
+                )
+            else:
+                repo_info = self.github_client.get_repo_info(sub.repo_full_name)
+                if repo_info is None:
+                    raise GitHubAPIError(f"获取仓库信息失败: {sub.repo_full_name}")
+                # 每类数据从各自的水位线开始抓取
+                range_data = {"repo_info": repo_info}
+                for kind in self.ITEM_TIME_FIELDS:
+                    range_data[kind] = self._fetch_endpoint(
+                        sub.repo_full_name, kind, watermarks[kind], now, limit=None
+                    )
+        except Exception as e:
+            error_msg = f"订阅ID {sub.id} 增量获取数据失败: {str(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg, []
+        
+        # 只保留不早于各自水位线的条目（重叠窗口内的条目在合并时按id去重）。
+        # 抓取成功后水位线推进到 max(原水位线, 抓取截止时间 - 时钟偏差)，不会越过时钟偏差窗口：
+        # 即使已见到更新的条目，GitHub列表/搜索尚未返回的稍早条目下次仍会被抓取
+        safe_end = now - timedelta(seconds=self.cursor_skew)
+        new_cursors = dict(sub.cursors)
+        fresh_dates = set()
+        for kind, time_field in self.ITEM_TIME_FIELDS.items():
+            fresh = []
+            for item in range_data[kind]:
+                item_time = self.github_client._parse_github_datetime(item.get(time_field))
+                if item_time and item_time >= watermarks[kind]:
+                    fresh.append(item)
+                    fresh_dates.add(item_time.date())
+            range_data[kind] = fresh
+            new_cursors[kind] = max(watermarks[kind], safe_end).isoformat()
+        
+        # 只处理有新条目的日期
+        buckets = self._bucket_by_day(range_data, sorted(fresh_dates))
+        
+        raw_file_paths = []
+        try:
+            for current_date, day_data in buckets.items():
+                existing = self.raw_storage.load_day(sub.id, sub.repo_full_name, current_date)
+                if existing is not None:
+                    for kind, time_field in self.ITEM_TIME_FIELDS.items():
+                        day_data[kind] = self._merge_items(existing["data"][kind], day_data[kind], time_field)
+                
+                day_start, day_end = self._day_window(current_date)
+                raw_file_paths.append(self.raw_storage.save(
+                    sub.id, sub.repo_full_name, current_date, day_start, day_end, data=day_data
+                ))
+        except Exception as e:
+            # 未推进水位线，下次运行会重新抓取
+            error_msg = f"订阅ID {sub.id} 保存增量数据失败: {str(e)}"
+            self.logger.error(error_msg)
+            return False, error_msg, raw_file_paths
+        
+        self._update_last_processed(sub.id, new_cursors)
+        
+        new_count = sum(len(range_data[kind]) for kind in self.ITEM_TIME_FIELDS)
+        return True, f"增量处理完成。新条目: {new_count}, 更新文件: {len(raw_file_paths)}", raw_file_paths
+
+    def _resolve_time_range(self, 
+                            sub: Subscription,
+                            custom_time_start: Optional[datetime] = None,
+                            custom_time_end: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+        """确定订阅的处理时间范围（带UTC时区）"""
+        default_start, default_end = self.get_subscription_time_range(sub)
+        start_time = custom_time_start or default_start
+        end_time = custom_time_end or default_end
+        return (
+            self.github_client._ensure_utc_timezone(start_time),
+            self.github_client._ensure_utc_timezone(end_time)
+        )
+
     def process_single_subscription(self, 
                                    sub: Subscription, 
                                    custom_time_start: Optional[datetime] = None,
                                    custom_time_end: Optional[datetime] = None,
-                                   avoid_duplicate: bool = False) -> Tuple[bool, str, List[str]]:
+                                   avoid_duplicate: bool = False,
+                                   backfill: Optional[bool] = None) -> Tuple[bool, str, List[str]]:
         """
         处理单个订阅，确保处理时间范围内的所有日期
         
@@ -134,6 +411,7 @@ class SubscriptionManager:
             custom_time_start: 自定义开始时间
             custom_time_end: 自定义结束时间
             avoid_duplicate: 是否避免重复生成
+            backfill: 多日范围是否一次性抓取后按天分桶，None表示使用配置subscription.backfill
             
         Returns:
             (是否成功, 提示信息, 原始数据文件路径列表)
@@ -142,19 +420,38 @@ class SubscriptionManager:
         if not sub.enabled:
             return False, f"订阅ID {sub.id} 已禁用，跳过处理", []
         
-        # 确定时间范围
-        default_start, default_end = self.get_subscription_time_range(sub)
-        start_time = custom_time_start or default_start
-        end_time = custom_time_end or default_end
+        start_time, end_time = self._resolve_time_range(sub, custom_time_start, custom_time_end)
+        return self._process_repo_group([sub], start_time, end_time, avoid_duplicate, backfill)[0]
+
+    def _process_repo_group(self, 
+                            subs: List[Subscription],
+                            start_time: datetime,
+                            end_time: datetime,
+                            avoid_duplicate: bool = False,
+                            backfill: Optional[bool] = None,
+                            prefetched: Optional[Dict] = None) -> List[Tuple[bool, str, List[str]]]:
+        """
+        处理关注同一仓库、同一时间范围的一组订阅：每个日期只抓取一次仓库数据，再分发给组内所有订阅
         
-        # 确保时间带有时区信息
-        start_time = self.github_client._ensure_utc_timezone(start_time)
-        end_time = self.github_client._ensure_utc_timezone(end_time)
+        组内有多个订阅需要同一天的数据时，数据保存为一份共享快照，各订阅文件只记录快照引用
+        
+        Args:
+            subs: 同一仓库的订阅列表
+            start_time: 开始时间（带时区）
+            end_time: 结束时间（带时区）
+            avoid_duplicate: 是否避免重复生成
+            backfill: 多日范围是否一次性抓取后按天分桶，None表示使用配置subscription.backfill
+            prefetched: 可选，已批量抓取的整个时间范围数据（见_prefetch_graphql），提供时直接按天分桶
+            
+        Returns:
+            与subs顺序一致的(是否成功, 提示信息, 原始数据文件路径列表)
+        """
+        repo_full_name = subs[0].repo_full_name
         
         # 验证时间范围有效性
         if start_time >= end_time:
             self.logger.info("开始时间必须早于结束时间")
-            return False, "开始时间必须早于结束时间", []
+            return [(False, "开始时间必须早于结束时间", []) for _ in subs]
         
         # 转换为日期对象（仅日期部分）
         start_date = start_time.date()
@@ -164,142 +461,256 @@ class SubscriptionManager:
         date_list = self._generate_date_list(start_date, end_date)
         total_days = len(date_list)
         
+        sub_ids = ",".join(str(sub.id) for sub in subs)
         self.logger.info(
-            f"处理订阅ID {sub.id}（{sub.repo_full_name}），时间范围："
+            f"处理订阅ID {sub_ids}（{repo_full_name}），时间范围："
             f"{start_date} ~ {end_date}，共 {total_days} 天"
         )
         
-        # 初始化统计变量
-        success_count = 0
-        skipped_count = 0
-        failed_count = 0
-        raw_file_paths = []
-        error_messages = []
-
-        # 遍历每个日期并处理
-        for current_date in date_list:
-            # 检查是否已存在该日期的数据
-            if avoid_duplicate and self._is_duplicate_raw_data(sub, current_date):
-                self.logger.info(f"日期 {current_date} 已存在数据，跳过")
-                skipped_count += 1
-                continue  # 跳过当前日期，但继续处理下一个日期
-
-            # 为当前日期创建时间范围（当天00:00到次日00:00）
-            day_start = datetime.combine(current_date, datetime.min.time())
-            day_end = day_start + timedelta(days=1)
-            
-            # 确保时间带有时区信息
-            day_start = self.github_client._ensure_utc_timezone(day_start)
-            day_end = self.github_client._ensure_utc_timezone(day_end)
+        # 初始化每个订阅的统计变量
+        stats = {
+            sub.id: {"success": 0, "skipped": 0, "failed": 0, "paths": [], "errors": []}
+            for sub in subs
+        }
+        
+        def mark_failed(day_subs: List[Subscription], error_msg: str, days: int = 1):
+            self.logger.error(error_msg)
+            for s in day_subs:
+                stats[s.id]["failed"] += days
+                stats[s.id]["errors"].append(error_msg)
 
-            try:
-                # 获取GitHub数据
-                repo_info = self.github_client.get_repo_info(sub.repo_full_name)
-                releases = self.github_client.get_latest_releases(
-                    sub.repo_full_name, 
-                    start_time=day_start, 
-                    end_time=day_end,
-                    limit=500
-                )
-                prs = self.github_client.get_recent_pull_requests(
-                    sub.repo_full_name, 
-                    start_time=day_start, 
-                    end_time=day_end,
-                    limit=500
-                )
-                issues = self.github_client.get_recent_issues(
-                    sub.repo_full_name, 
-                    start_time=day_start, 
-                    end_time=day_end,
-                    limit=500
-                )
-            except Exception as e:
-                error_msg = f"日期 {current_date} 获取数据失败: {str(e)}"
-                self.logger.error(error_msg)
-                failed_count += 1
-                error_messages.append(error_msg)
-                continue  # 获取数据失败，继续处理下一个日期
-
-            # 准备原始数据
-            raw_data = {
-                "subscription_id": sub.id,
-                "repo_full_name": sub.repo_full_name,
-                "time_range": {
-                    "start": day_start.isoformat(),
-                    "end": day_end.isoformat()
-                },
-                "data": {
-                    "repo_info": repo_info,
-                    "releases": releases,
-                    "pull_requests": prs,
-                    "issues": issues
-                },
-                "generated_at": datetime.now().isoformat()
-            }
+        claimed: List[str] = []
+        try:
+            # 筛选每个日期需要数据的订阅
+            needed: Dict[date, List[Subscription]] = {}
+            for current_date in date_list:
+                for sub in subs:
+                    # 检查是否已存在该日期的数据
+                    if avoid_duplicate and self._is_duplicate_raw_data(sub, current_date):
+                        self.logger.info(f"订阅ID {sub.id} 日期 {current_date} 已存在数据，跳过")
+                        stats[sub.id]["skipped"] += 1
+                        continue  # 跳过当前日期，但继续处理下一个日期
+                    # 认领该订阅日，其他进程正在抓取时跳过
+                    lease_key = f"sub{sub.id}_{current_date.strftime('%Y%m%d')}"
+                    if not self.leases.claim(lease_key):
+                        self.logger.info(f"订阅ID {sub.id} 日期 {current_date} 正由其他进程处理，跳过")
+                        stats[sub.id]["skipped"] += 1
+                        continue
+                    claimed.append(lease_key)
+                    # 认领前可能刚有其他进程完成了该日期
+                    if avoid_duplicate and self._is_duplicate_raw_data(sub, current_date):
+                        stats[sub.id]["skipped"] += 1
+                        continue
+                    needed.setdefault(current_date, []).append(sub)
+            pending_dates = sorted(needed)
 
-            # 生成文件名并保存
-            try:
-                safe_repo_name = sub.repo_full_name.replace("/", "_")
-                date_str = current_date.strftime("%Y%m%d")
-                filename = f"{date_str}_sub{sub.id}_{safe_repo_name}_raw.json"
-                raw_file_path = os.path.join(self.raw_data_dir, filename)
+            # 回溯模式：多日范围一次性抓取后按天分桶
+            if backfill is None:
+                backfill = self.backfill_enabled
+            day_buckets = None
+            if prefetched is not None:
+                day_buckets = self._bucket_by_day(prefetched, pending_dates)
+            elif backfill and len(pending_dates) > 1:
+                try:
+                    day_buckets = self._fetch_range_by_day(repo_full_name, pending_dates)
+                except Exception as e:
+                    for current_date in pending_dates:
+                        mark_failed(needed[current_date], f"日期 {current_date} 获取数据失败: {str(e)}")
+                    pending_dates = []
 
-                with open(raw_file_path, "w", encoding="utf-8") as f:
-                    json.dump(raw_data, f, ensure_ascii=False, indent=2)
+            # 遍历每个日期并处理
+            last_renewal = time.time()
+            for current_date in pending_dates:
+                # 长时间回溯时在日期之间续期（超过有效期一半时），避免租约中途过期被其他进程接管
+                if time.time() - last_renewal > self.leases.ttl / 2:
+                    for lease_key in claimed:
+                        self.leases.renew(lease_key)
+                    last_renewal = time.time()
+                day_subs = needed[current_date]
+                day_start, day_end = self._day_window(current_date)
 
-                success_count += 1
-                raw_file_paths.append(raw_file_path)
-                self.logger.info(f"日期 {current_date} 数据处理成功")
+                if day_buckets is not None:
+                    window_data = day_buckets[current_date]
+                else:
+                    try:
+                        # 获取GitHub数据
+                        window_data = self._fetch_window_data(repo_full_name, day_start, day_end)
+                    except Exception as e:
+                        mark_failed(day_subs, f"日期 {current_date} 获取数据失败: {str(e)}")
+                        continue  # 获取数据失败，继续处理下一个日期
 
-            except Exception as e:
-                error_msg = f"日期 {current_date} 保存数据失败: {str(e)}"
-                self.logger.error(error_msg)
-                failed_count += 1
-                error_messages.append(error_msg)
-                continue  # 保存失败，继续处理下一个日期
-
-        # 更新订阅最后处理时间（如果有成功处理的日期）
-        if success_count > 0:
-            subs = self.storage.load_subscriptions()
-            for s in subs:
-                if s.id == sub.id:
-                    s.last_processed_at = datetime.now()
-                    break
-            self.storage.save_subscriptions(subs)
-
-        # 准备结果信息
-        summary = (
-            f"总天数: {total_days}, "
-            f"成功: {success_count}, "
-            f"已跳过: {skipped_count}, "
-            f"失败: {failed_count}"
-        )
+                # 保存原始数据（多个订阅共享一份快照）
+                try:
+                    snapshot = None
+                    if len(day_subs) > 1:
+                        snapshot = self.raw_storage.save_snapshot(
+                            repo_full_name, current_date, day_start, day_end, window_data
+                        )
+                    for sub in day_subs:
+                        raw_file_path = self.raw_storage.save(
+                            sub.id, repo_full_name, current_date, day_start, day_end,
+                            data=window_data, snapshot=snapshot
+                        )
+                        stats[sub.id]["success"] += 1
+                        stats[sub.id]["paths"].append(raw_file_path)
+                    self.logger.info(f"日期 {current_date} 数据处理成功（订阅ID {','.join(str(s.id) for s in day_subs)}）")
 
-        if success_count > 0 or skipped_count > 0:
-            return True, f"处理完成。{summary}", raw_file_paths
-        else:
-            return False, f"处理失败。{summary} 错误: {'; '.join(error_messages[:3])}", raw_file_paths
+                except Exception as e:
+                    mark_failed(day_subs, f"日期 {current_date} 保存数据失败: {str(e)}")
+                    continue  # 保存失败，继续处理下一个日期
+
+            results = []
+            for sub in subs:
+                sub_stats = stats[sub.id]
+                # 更新订阅最后处理时间（如果有成功处理的日期）
+                if sub_stats["success"] > 0:
+                    self._update_last_processed(sub.id)
+
+                # 准备结果信息
+                summary = (
+                    f"总天数: {total_days}, "
+                    f"成功: {sub_stats['success']}, "
+                    f"已跳过: {sub_stats['skipped']}, "
+                    f"失败: {sub_stats['failed']}"
+                )
+
+                if sub_stats["success"] > 0 or sub_stats["skipped"] > 0:
+                    results.append((True, f"处理完成。{summary}", sub_stats["paths"]))
+                else:
+                    results.append((
+                        False, 
+                        f"处理失败。{summary} 错误: {'; '.join(sub_stats['errors'][:3])}", 
+                        sub_stats["paths"]
+                    ))
+            return results
+        finally:
+            for lease_key in claimed:
+                self.leases.release(lease_key)
+
+    def _prefetch_graphql(self, 
+                          groups: Dict[Tuple[str, datetime, datetime], List[Subscription]],
+                          avoid_duplicate: bool) -> Dict[Tuple[str, datetime, datetime], Dict]:
+        """
+        GraphQL模式：时间范围相同的多个仓库用别名合并到同一查询中预先抓取整个范围的数据
+        
+        单次查询合并的仓库数受fetch.graphql_repos_per_query和预估点数（estimate_query_cost）限制；
+        所有日期均已有数据的分组不参与抓取，批量抓取失败的仓库回退为单独抓取
+        
+        Args:
+            groups: (仓库, 开始时间, 结束时间) -> 订阅列表
+            avoid_duplicate: 是否避免重复生成
+            
+        Returns:
+            (仓库, 开始时间, 结束时间) -> 整个范围的数据
+        """
+        windows: Dict[Tuple[datetime, datetime], List[str]] = {}
+        for (repo_full_name, start_time, end_time), group_subs in groups.items():
+            if start_time >= end_time:
+                continue
+            dates = self._generate_date_list(start_time.date(), end_time.date())
+            if avoid_duplicate and all(self._is_duplicate_raw_data(s, d) for s in group_subs for d in dates):
+                continue
+            windows.setdefault((start_time, end_time), []).append(repo_full_name)
+        
+        prefetched = {}
+        for (start_time, end_time), repo_full_names in windows.items():
+            if len(repo_full_names) < 2:
+                continue
+            range_start, _ = self._day_window(start_time.date())
+            _, range_end = self._day_window(end_time.date())
+            try:
+                range_data = self.graphql_fetcher.fetch_windows(repo_full_names, range_start, range_end)
+            except Exception as e:
+                self.logger.warning(f"GraphQL批量抓取失败，改为逐个仓库抓取: {str(e)}")
+                continue
+            for repo_full_name in repo_full_names:
+                result = range_data[repo_full_name]
+                if isinstance(result, Exception):
+                    # 只有失败的仓库回退为单独抓取，同一查询中其他仓库的数据照常使用
+                    self.logger.warning(f"GraphQL批量抓取 {repo_full_name} 失败，改为单独抓取: {str(result)}")
+                    continue
+                prefetched[(repo_full_name, start_time, end_time)] = result
+        return prefetched
 
     def process_all_subscriptions(self, 
                                  custom_time_start: Optional[datetime] = None,
                                  custom_time_end: Optional[datetime] = None,
-                                 avoid_duplicate: bool = True) -> List[Tuple[bool, str, List[str]]]:
-        """处理所有启用的订阅，返回多日期处理结果"""
+                                 avoid_duplicate: bool = True,
+                                 max_concurrent: Optional[int] = None,
+                                 incremental: Optional[bool] = None) -> List[Tuple[bool, str, List[str]]]:
+        """
+        处理所有启用的订阅，返回多日期处理结果
+        
+        增量模式下忽略时间范围参数，每个订阅从各自的水位线开始抓取（见process_incremental_subscription）
+        
+        先按(仓库, 时间范围)对启用的订阅分组，每组只抓取一次仓库数据再分发给组内订阅
+        （GraphQL模式下时间范围相同的多个仓库合并为一次别名查询）；
+        各组在有界线程池中并发处理（所有工作线程共享同一个GitHub客户端及其速率限制调度器），
+        结果顺序与订阅列表顺序一致
+        
+        Args:
+            custom_time_start: 自定义开始时间
+            custom_time_end: 自定义结束时间
+            avoid_duplicate: 是否避免重复生成
+            max_concurrent: 最大并发数，None表示使用配置scheduler.max_concurrent
+            incremental: 是否使用增量模式，None表示使用配置subscription.incremental
+            
+        Returns:
+            每个订阅的(是否成功, 提示信息, 原始数据文件路径列表)
+        """
         subs = self.list_subscriptions()
-        results = []
+        workers = max(1, max_concurrent or self.max_concurrent or 1)
+        
+        if incremental is None:
+            incremental = self.incremental_enabled
+        if incremental:
+            def process_incremental(sub: Subscription) -> Tuple[bool, str, List[str]]:
+                # 单个订阅的异常（如租约文件锁超时、存储错误）不影响其他订阅
+                try:
+                    return self.process_incremental_subscription(sub)
+                except Exception as e:
+                    self.logger.error(f"订阅ID {sub.id} 增量处理异常: {str(e)}")
+                    return False, f"订阅ID {sub.id} 增量处理异常: {str(e)}", []
+            
+            self.logger.info(f"增量处理 {len(subs)} 个订阅（并发数: {workers}）")
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sub-worker") as executor:
+                return list(executor.map(process_incremental, subs))
+        
+        results: Dict[int, Tuple[bool, str, List[str]]] = {}
         
+        # 规划阶段：按仓库和时间范围分组
+        groups: Dict[Tuple[str, datetime, datetime], List[Subscription]] = {}
         for sub in subs:
-            if sub.enabled:
-                res = self.process_single_subscription(
-                    sub, 
-                    custom_time_start=custom_time_start,
-                    custom_time_end=custom_time_end,
-                    avoid_duplicate=avoid_duplicate
+            if not sub.enabled:
+                self.logger.info(f"订阅ID {sub.id} 已禁用，未处理")
+                results[sub.id] = (False, f"订阅ID {sub.id} 已禁用，未处理", [])
+                continue
+            start_time, end_time = self._resolve_time_range(sub, custom_time_start, custom_time_end)
+            groups.setdefault((sub.repo_full_name, start_time, end_time), []).append(sub)
+        
+        prefetched = self._prefetch_graphql(groups, avoid_duplicate) if self.graphql_fetcher else {}
+        
+        def process(item: Tuple[Tuple[str, datetime, datetime], List[Subscription]]):
+            key, group_subs = item
+            _, start_time, end_time = key
+            try:
+                group_results = self._process_repo_group(
+                    group_subs, start_time, end_time, avoid_duplicate, prefetched=prefetched.get(key)
                 )
-                results.append(res)
-            else:
-                self.logger.info("订阅ID {sub.id} 已禁用，未处理")
-                results.append((False, f"订阅ID {sub.id} 已禁用，未处理", []))
+            except Exception as e:
+                self.logger.error(f"订阅ID {','.join(str(s.id) for s in group_subs)} 处理异常: {str(e)}")
+                group_results = [(False, f"订阅ID {s.id} 处理异常: {str(e)}", []) for s in group_subs]
+            for sub, result in zip(group_subs, group_results):
+                results[sub.id] = result
+        
+        self.logger.info(
+            f"开始处理 {len(subs)} 个订阅，合并为 {len(groups)} 个仓库抓取任务（并发数: {workers}）"
+        )
+        if workers == 1:
+            for item in groups.items():
+                process(item)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sub-worker") as executor:
+                list(executor.map(process, groups.items()))
         
-        return results
-    
\ No newline at end of file
+        return [results[sub.id] for sub in subs]
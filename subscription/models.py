@@ -1,6 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 @dataclass
 class Subscription:
@@ -12,6 +12,7 @@ class Subscription:
     last_processed_at: Optional[datetime] = None  # 最后处理时间
     time_range_type: str = "daily"  # 时间范围类型：daily（每日）/ custom（自定义）
     enabled: bool = True  # 是否启用订阅
+    cursors: Dict[str, str] = field(default_factory=dict)  # 增量抓取水位线：数据类型 -> 已完整抓取到的时间点（ISO格式）
 
     def to_dict(self) -> dict:
         """转换为字典（用于持久化）"""
@@ -22,7 +23,8 @@ class Subscription:
             "created_at": self.created_at.isoformat(),
             "last_processed_at": self.last_processed_at.isoformat() if self.last_processed_at else None,
             "time_range_type": self.time_range_type,
-            "enabled": self.enabled
+            "enabled": self.enabled,
+            "cursors": self.cursors
         }
 
     @classmethod
@@ -35,5 +37,6 @@ class Subscription:
             created_at=datetime.fromisoformat(data["created_at"]),
             last_processed_at=datetime.fromisoformat(data["last_processed_at"]) if data["last_processed_at"] else None,
             time_range_type=data.get("time_range_type", "daily"),
-            enabled=data.get("enabled", True)
+            enabled=data.get("enabled", True),
+            cursors=data.get("cursors") or {}
         )
\ No newline at end of file
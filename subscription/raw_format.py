@@ -0,0 +1,278 @@
+import io
+import gzip
+import json
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, ContextManager, Dict, Iterator, Optional, TextIO, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# 存储格式 -> 文件扩展名
+RAW_FORMATS = {
+    "json": ".json",  # 旧格式：缩进的单个JSON对象
+    "jsonl.gz": ".jsonl.gz",  # gzip压缩的紧凑JSON Lines
+    "jsonl.zst": ".jsonl.zst",  # zstd压缩的紧凑JSON Lines（需要安装zstandard）
+}
+
+# 数据类别（JSON Lines中每行条目的kind）
+ITEM_KINDS = ("releases", "pull_requests", "issues")
+
+# 精简投影保留的字段：仅包括报告生成（_format_markdown）、LLM摘要（DeepSeekClient）、
+# 按天分桶/增量水位线（时间字段）和去重合并（id）实际读取的字段，与GraphQL抓取结果的字段一致
+SLIM_FIELDS = {
+    "repo_info": ("full_name", "name", "description", "html_url", "stargazers_count", "forks_count"),
+    "releases": ("id", "tag_name", "name", "body", "prerelease", "created_at", "published_at", "html_url"),
+    "pull_requests": ("id", "number", "state", "title", "user", "created_at", "updated_at",
+                      "closed_at", "merged_at", "html_url"),
+    "issues": ("id", "number", "state", "title", "user", "created_at", "updated_at", "closed_at", "html_url"),
+}
+
+
+def format_available(fmt: str) -> bool:
+    """判断存储格式在当前环境中是否可用"""
+    if fmt not in RAW_FORMATS:
+        return False
+    return fmt != "jsonl.zst" or zstandard is not None
+
+
+def suffix_for(fmt: str) -> str:
+    """返回存储格式对应的文件扩展名"""
+    return RAW_FORMATS[fmt]
+
+
+def format_of(path: str) -> Optional[str]:
+    """根据文件扩展名判断存储格式，无法识别时返回None"""
+    for fmt, suffix in sorted(RAW_FORMATS.items(), key=lambda kv: -len(kv[1])):
+        if path.endswith(suffix):
+            return fmt
+    return None
+
+
+def _slim(item: Dict, fields) -> Dict:
+    slim = {key: item.get(key) for key in fields if key in item}
+    user = slim.get("user")
+    if isinstance(user, dict):
+        slim["user"] = {"login": user.get("login")}
+    return slim
+
+
+def slim_item(kind: str, item: Dict) -> Dict:
+    """对单个条目（或kind为repo_info时的仓库信息）做精简投影"""
+    return _slim(item, SLIM_FIELDS[kind])
+
+
+def slim_data(data: Dict) -> Dict:
+    """
+    对仓库数据做精简投影，去掉报告和摘要不需要的字段（*_url模板、owner对象、reactions等）
+
+    参数:
+        data: 包含repo_info、releases、pull_requests、issues的字典
+
+    返回:
+        新的精简字典（不修改原数据）
+    """
+    slim = dict(data)
+    if data.get("repo_info") is not None:
+        slim["repo_info"] = _slim(data["repo_info"], SLIM_FIELDS["repo_info"])
+    for kind in ITEM_KINDS:
+        if kind in data:
+            slim[kind] = [_slim(item, SLIM_FIELDS[kind]) for item in data[kind] or []]
+    return slim
+
+
+def _compress(content: bytes, fmt: str) -> bytes:
+    if fmt == "jsonl.gz":
+        return gzip.compress(content, compresslevel=6)
+    if fmt == "jsonl.zst":
+        return zstandard.ZstdCompressor(level=10).compress(content)
+    return content
+
+
+def _decompress(content: bytes, fmt: str) -> bytes:
+    if fmt == "jsonl.gz":
+        return gzip.decompress(content)
+    if fmt == "jsonl.zst":
+        if zstandard is None:
+            raise RuntimeError("读取.zst原始数据需要安装zstandard（pip install zstandard）")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(content)
+    return content
+
+
+def encode(record: Dict, fmt: str) -> bytes:
+    """
+    将原始数据记录编码为文件内容
+
+    JSON Lines布局：第一行是去掉data的记录头（data中的repo_info放在头部），
+    之后每行一个条目 {"kind": 类别, "item": 条目}
+
+    参数:
+        record: 原始数据记录（订阅文件或快照）
+        fmt: 存储格式
+
+    返回:
+        文件字节内容
+    """
+    if fmt == "json":
+        return json.dumps(record, ensure_ascii=False, indent=2).encode("utf-8")
+
+    header = {key: value for key, value in record.items() if key != "data"}
+    lines = []
+    data = record.get("data")
+    if data is not None:
+        header["repo_info"] = data.get("repo_info")
+        header["kinds"] = [kind for kind in ITEM_KINDS if kind in data]
+    lines.append(json.dumps(header, ensure_ascii=False, separators=(",", ":")))
+    if data is not None:
+        for kind in header["kinds"]:
+            for item in data[kind]:
+                lines.append(json.dumps({"kind": kind, "item": item}, ensure_ascii=False, separators=(",", ":")))
+    return _compress(("\n".join(lines) + "\n").encode("utf-8"), fmt)
+
+
+def decode(content: bytes, fmt: str) -> Dict:
+    """
+    将文件内容解码为原始数据记录（encode的逆过程，新旧格式返回相同结构）
+
+    参数:
+        content: 文件字节内容
+        fmt: 存储格式（见format_of）
+
+    返回:
+        原始数据记录
+    """
+    if fmt == "json":
+        return json.loads(content)
+
+    lines = _decompress(content, fmt).decode("utf-8").splitlines()
+    record = json.loads(lines[0])
+    kinds = record.pop("kinds", None)
+    repo_info = record.pop("repo_info", None)
+    if kinds is not None:
+        data = {"repo_info": repo_info}
+        for kind in kinds:
+            data[kind] = []
+        for line in lines[1:]:
+            if line:
+                entry = json.loads(line)
+                data.setdefault(entry["kind"], []).append(entry["item"])
+        record["data"] = data
+    return record
+
+
+# 打开原始数据二进制流的函数（返回上下文管理器），用于读取普通文件以外的来源（如月度归档中的成员）
+Opener = Callable[[], ContextManager[BinaryIO]]
+
+
+@contextmanager
+def _open_text(opener: Opener, fmt: str) -> Iterator[TextIO]:
+    """以流的方式打开JSON Lines文件（边读边解压，不把整个文件读入内存）"""
+    with opener() as raw:
+        if fmt == "jsonl.gz":
+            with gzip.open(raw, "rt", encoding="utf-8") as f:
+                yield f
+        elif fmt == "jsonl.zst":
+            if zstandard is None:
+                raise RuntimeError("读取.zst原始数据需要安装zstandard（pip install zstandard）")
+            with zstandard.ZstdDecompressor().stream_reader(raw) as reader:
+                yield io.TextIOWrapper(reader, encoding="utf-8")
+        else:
+            yield io.TextIOWrapper(raw, encoding="utf-8")
+
+
+_START_EVENTS = ("start_map", "start_array")
+_END_EVENTS = ("end_map", "end_array")
+
+
+def _iter_json_document(opener: Opener) -> Iterator[Tuple[str, Any]]:
+    """
+    流式解析旧格式（单个JSON对象）文件：安装ijson时逐个条目增量解析，否则整体加载后逐个产出
+
+    旧格式中记录头字段可能出现在data之后（如entity_refs），因此使用ijson时分两遍读取：
+    第一遍只收集记录头（不构建条目对象），第二遍逐个构建并产出条目。
+    """
+    if ijson is None:
+        with opener() as f:
+            record = json.load(f)
+        data = record.pop("data", None)
+        if data is not None:
+            record["repo_info"] = data.get("repo_info")
+            record["kinds"] = [kind for kind in ITEM_KINDS if kind in data]
+        yield "header", record
+        for kind in (record.get("kinds") or []):
+            for item in data[kind] or []:
+                yield kind, item
+        return
+
+    header: Dict[str, Any] = {}
+    kinds = []
+    has_data = False
+    with opener() as f:
+        builder, builder_prefix = None, None
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == builder_prefix and event in _END_EVENTS:
+                    header["repo_info" if builder_prefix == "data.repo_info" else builder_prefix] = builder.value
+                    builder = None
+                continue
+            top_level = bool(prefix) and "." not in prefix and prefix != "data"
+            if (top_level or prefix == "data.repo_info") and event in _START_EVENTS:
+                builder, builder_prefix = ijson.ObjectBuilder(), prefix
+                builder.event(event, value)
+            elif top_level and event not in _END_EVENTS and event != "map_key":
+                header[prefix] = value
+            elif prefix == "data" and event == "start_map":
+                has_data = True
+            elif prefix.startswith("data.") and prefix.count(".") == 1 and event == "start_array":
+                kinds.append(prefix.split(".", 1)[1])
+    if has_data:
+        header["kinds"] = [kind for kind in kinds if kind in ITEM_KINDS]
+    yield "header", header
+    if not has_data:
+        return
+
+    item_prefixes = {f"data.{kind}.item": kind for kind in ITEM_KINDS}
+    with opener() as f:
+        builder, builder_prefix = None, None
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == builder_prefix and event in _END_EVENTS:
+                    yield item_prefixes[builder_prefix], builder.value
+                    builder = None
+            elif prefix in item_prefixes and event in _START_EVENTS:
+                builder, builder_prefix = ijson.ObjectBuilder(), prefix
+                builder.event(event, value)
+
+
+def iter_file(path: str, fmt: str, opener: Optional[Opener] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    流式读取原始数据文件：先产出 ("header", 记录头)，再逐个产出 (类别, 条目)
+
+    记录头的结构与JSON Lines格式的首行相同（repo_info和kinds在头部，不含data），
+    任何时刻内存中只保留一个条目。
+
+    参数:
+        path: 文件路径
+        fmt: 存储格式（见format_of）
+        opener: 可选，打开二进制流的函数，默认打开path
+    """
+    opener = opener or (lambda: open(path, "rb"))
+    if fmt == "json":
+        yield from _iter_json_document(opener)
+        return
+
+    with _open_text(opener, fmt) as f:
+        first = f.readline()
+        yield "header", json.loads(first)
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                yield entry["kind"], entry["item"]
@@ -0,0 +1,233 @@
+import os
+import sqlite3
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+class RawDataManifest:
+    """
+    原始数据文件清单（SQLite），每写入一个原始数据文件就记录一行：
+    订阅ID、仓库、数据日期、时间窗口、相对路径、大小、各类条目数和校验和。
+
+    按订阅和时间范围查找文件只需一次索引查询，无需扫描目录或解析文件内容。
+    时间窗口以无时区的UTC ISO字符串保存，可直接按字符串比较。
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS raw_files (
+            path TEXT PRIMARY KEY,
+            subscription_id INTEGER NOT NULL,
+            repo_full_name TEXT NOT NULL,
+            data_date TEXT NOT NULL,
+            window_start TEXT NOT NULL,
+            window_end TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            releases INTEGER NOT NULL DEFAULT 0,
+            pull_requests INTEGER NOT NULL DEFAULT 0,
+            issues INTEGER NOT NULL DEFAULT 0,
+            checksum TEXT NOT NULL,
+            snapshot TEXT,
+            updated_at TEXT NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_raw_files_sub_date ON raw_files(subscription_id, data_date);
+        CREATE INDEX IF NOT EXISTS idx_raw_files_window ON raw_files(window_start, window_end);
+    """
+
+    def __init__(self, db_path: str):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        dir_path = os.path.dirname(db_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接并在一个事务中执行，成功提交、异常回滚（每次操作独立连接，线程安全）"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self,
+               path: str,
+               sub_id: int,
+               repo_full_name: str,
+               data_date: str,
+               window_start: datetime,
+               window_end: datetime,
+               size: int,
+               counts: Dict[str, int],
+               checksum: str,
+               snapshot: Optional[str] = None):
+        """
+        记录（或覆盖）一个原始数据文件
+
+        Args:
+            path: 文件相对于原始数据目录的路径
+            sub_id: 订阅ID
+            repo_full_name: 仓库全名
+            data_date: 数据日期（YYYYMMDD）
+            window_start: 窗口开始时间（无时区，UTC）
+            window_end: 窗口结束时间（无时区，UTC）
+            size: 文件字节数
+            counts: 各类数据的条目数（releases / pull_requests / issues）
+            checksum: 文件内容的SHA-256
+            snapshot: 共享快照引用（如有）
+        """
+        with self._connect() as conn:
+            # 同一订阅同一天只保留最新的文件（如文件名格式变化后重新生成）
+            conn.execute(
+                "DELETE FROM raw_files WHERE subscription_id = ? AND data_date = ? AND path != ?",
+                (sub_id, data_date, path)
+            )
+            conn.execute(
+                """INSERT OR REPLACE INTO raw_files
+                   (path, subscription_id, repo_full_name, data_date, window_start, window_end, size,
+                    releases, pull_requests, issues, checksum, snapshot, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    path, sub_id, repo_full_name, data_date,
+                    window_start.isoformat(), window_end.isoformat(), size,
+                    counts.get("releases", 0), counts.get("pull_requests", 0), counts.get("issues", 0),
+                    checksum, snapshot, datetime.now().isoformat()
+                )
+            )
+
+    def contains(self, sub_id: int, data_date: str) -> bool:
+        """判断订阅某天是否已有原始数据记录"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM raw_files WHERE subscription_id = ? AND data_date = ?",
+                (sub_id, data_date)
+            ).fetchone()
+        return row is not None
+
+    def path_for_day(self, sub_id: int, data_date: str) -> Optional[str]:
+        """返回订阅某天的原始数据文件相对路径，不存在时返回None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT path FROM raw_files WHERE subscription_id = ? AND data_date = ?",
+                (sub_id, data_date)
+            ).fetchone()
+        return row[0] if row else None
+
+    def find(self,
+             sub_id: Optional[int] = None,
+             start_time: Optional[datetime] = None,
+             end_time: Optional[datetime] = None) -> List[str]:
+        """
+        按订阅ID和时间范围查找文件（窗口与范围有重叠即命中）
+
+        Returns:
+            按数据日期排序的相对路径列表
+        """
+        clauses, params = [], []
+        if sub_id is not None:
+            clauses.append("subscription_id = ?")
+            params.append(sub_id)
+        if start_time is not None:
+            clauses.append("window_end >= ?")
+            params.append(start_time.isoformat())
+        if end_time is not None:
+            clauses.append("window_start <= ?")
+            params.append(end_time.isoformat())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT path FROM raw_files {where} ORDER BY data_date, subscription_id", params
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def windows(self) -> List[tuple]:
+        """
+        返回全部文件的订阅、仓库和窗口开始时间（无需打开文件即可确定对应的报告文件名）
+
+        Returns:
+            按数据日期排序的 (相对路径, 订阅ID, 仓库全名, 窗口开始时间ISO字符串) 列表
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                """SELECT path, subscription_id, repo_full_name, window_start FROM raw_files
+                   ORDER BY data_date, subscription_id"""
+            ).fetchall()
+
+    def days(self, sub_id: int, start_date: str, end_date: str) -> List[tuple]:
+        """
+        返回订阅在日期范围内有原始数据的日期
+
+        Args:
+            sub_id: 订阅ID
+            start_date: 开始日期（YYYYMMDD，包含）
+            end_date: 结束日期（YYYYMMDD，不包含）
+
+        Returns:
+            按日期排序的 (数据日期, 仓库全名) 列表
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                """SELECT data_date, repo_full_name FROM raw_files
+                   WHERE subscription_id = ? AND data_date >= ? AND data_date < ? ORDER BY data_date""",
+                (sub_id, start_date, end_date)
+            ).fetchall()
+
+    def changed_since(self, updated_after: Optional[str] = None) -> List[tuple]:
+        """
+        返回在指定时间之后写入（或重写）的文件，用于增量导出
+
+        Args:
+            updated_after: 上次处理到的updated_at（ISO字符串），None表示全部
+
+        Returns:
+            按updated_at排序的 (相对路径, 仓库全名, 数据日期, updated_at) 列表
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                """SELECT path, repo_full_name, data_date, updated_at FROM raw_files
+                   WHERE ? IS NULL OR updated_at > ? ORDER BY updated_at""",
+                (updated_after, updated_after)
+            ).fetchall()
+
+    def rows(self, before_date: Optional[str] = None) -> List[tuple]:
+        """
+        返回清单记录，用于目录布局迁移和保留策略
+
+        Args:
+            before_date: 可选，只返回数据日期早于该日期（YYYYMMDD）的记录
+
+        Returns:
+            (相对路径, 订阅ID, 仓库全名, 数据日期) 列表
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                """SELECT path, subscription_id, repo_full_name, data_date FROM raw_files
+                   WHERE ? IS NULL OR data_date < ? ORDER BY data_date""",
+                (before_date, before_date)
+            ).fetchall()
+
+    def update_paths(self, moves: Dict[str, str]):
+        """批量更新文件路径（旧路径 -> 新路径），在单个事务中完成"""
+        with self._connect() as conn:
+            conn.executemany("UPDATE raw_files SET path = ? WHERE path = ?", [(new, old) for old, new in moves.items()])
+
+    def count_with_prefix(self, prefix: str) -> int:
+        """返回路径以指定前缀开头的记录数（如某个月度归档中的成员数）"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM raw_files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)
+            ).fetchone()[0]
+
+    def remove(self, path: str):
+        """删除文件记录"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM raw_files WHERE path = ?", (path,))
+
+    def count(self) -> int:
+        """返回记录总数"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM raw_files").fetchone()[0]
@@ -0,0 +1,229 @@
+import os
+import time
+import zipfile
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from core.config import Config
+from core.file_lock import FileLock
+from . import raw_format
+from .raw_storage import ARCHIVE_SEP, RawDataStorage
+
+
+class RawDataRetention:
+    """
+    原始数据目录维护：目录布局迁移、旧文件月度归档和过期删除
+
+    保留策略（subscription.retention）：
+        compact_after_days: 数据日期早于该天数的日文件按 订阅/月份 合并为一个zip归档
+            （archive/{repo}/{yyyy}/{yyyy-mm}_sub{id}_{repo}.zip），清单路径改为 归档::成员名，
+            读取接口不变；0表示不归档
+        delete_after_days: 数据日期早于该天数的日文件、归档成员和快照被删除，
+            同时清理EntityStore中不再被任何保留文件引用的条目版本；0表示不删除
+
+    归档只处理已完整结束的月份，避免同一个月反复重写归档。
+    """
+
+    ARCHIVE_DIR = "archive"
+    # 清理条目版本时跳过该时间内被写入过的版本（覆盖一次保存从写入条目到登记清单的时间）
+    PRUNE_GRACE_SECONDS = 3600
+
+    def __init__(self, config: Config, raw_storage: Optional[RawDataStorage] = None):
+        self.logger = logging.getLogger(__name__)
+        self.raw_storage = raw_storage or RawDataStorage(config)
+        self.raw_data_dir = self.raw_storage.raw_data_dir
+        self.compact_after_days = config.get("subscription.retention.compact_after_days", 0)
+        self.delete_after_days = config.get("subscription.retention.delete_after_days", 0)
+
+    def _lock(self) -> FileLock:
+        """维护操作之间互斥（多个进程同时执行迁移/归档时只有一个生效）"""
+        return FileLock(os.path.join(self.raw_data_dir, "maintenance"), timeout=300)
+
+    def migrate_layout(self) -> int:
+        """
+        把清单中的日文件移动到当前布局（subscription.raw_layout）对应的目录
+
+        已归档的文件不移动。
+
+        Returns:
+            移动的文件数
+        """
+        moves: Dict[str, str] = {}
+        with self._lock():
+            for rel_path, _, repo_full_name, data_date in self.raw_storage.manifest.rows():
+                if ARCHIVE_SEP in rel_path:
+                    continue
+                current_date = datetime.strptime(data_date, "%Y%m%d").date()
+                target = os.path.join(
+                    self.raw_storage.partition_dir(repo_full_name, current_date), os.path.basename(rel_path)
+                )
+                if target == rel_path:
+                    continue
+                source_path = os.path.join(self.raw_data_dir, rel_path)
+                if not os.path.exists(source_path):
+                    self.logger.warning(f"迁移时文件 {rel_path} 不存在，跳过")
+                    continue
+                target_path = os.path.join(self.raw_data_dir, target)
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                os.replace(source_path, target_path)
+                moves[rel_path] = target
+            self.raw_storage.manifest.update_paths(moves)
+        self.logger.info(f"原始数据目录布局迁移完成，移动 {len(moves)} 个文件")
+        return len(moves)
+
+    def archive_path(self, sub_id: int, repo_full_name: str, month: str) -> str:
+        """返回订阅某月归档文件的相对路径（month为YYYYMM）"""
+        safe_repo = self.raw_storage._safe_repo_name(repo_full_name)
+        return os.path.join(
+            self.ARCHIVE_DIR, safe_repo, month[:4], f"{month[:4]}-{month[4:]}_sub{sub_id}_{safe_repo}.zip"
+        )
+
+    def compact(self, today: date) -> int:
+        """
+        把compact_after_days之前、已结束月份的日文件合并为月度归档
+
+        已有归档时（如补抓了旧月份的数据）会与仍被清单引用的归档成员合并后重写。
+
+        Returns:
+            归档的日文件数
+        """
+        if not self.compact_after_days:
+            return 0
+        cutoff = today - timedelta(days=self.compact_after_days)
+        # 只归档cutoff所在月份之前的完整月份
+        month_start = cutoff.replace(day=1).strftime("%Y%m%d")
+
+        groups: Dict[Tuple[int, str, str], List[str]] = defaultdict(list)
+        for rel_path, sub_id, repo_full_name, data_date in self.raw_storage.manifest.rows(before_date=month_start):
+            if ARCHIVE_SEP not in rel_path:
+                groups[(sub_id, repo_full_name, data_date[:6])].append(rel_path)
+
+        archived = 0
+        for (sub_id, repo_full_name, month), rel_paths in sorted(groups.items()):
+            archive_rel = self.archive_path(sub_id, repo_full_name, month)
+            moves = self._write_archive(archive_rel, rel_paths)
+            self.raw_storage.manifest.update_paths(moves)
+            for rel_path in moves:
+                os.remove(os.path.join(self.raw_data_dir, rel_path))
+            archived += len(moves)
+        return archived
+
+    def _write_archive(self, archive_rel: str, rel_paths: List[str]) -> Dict[str, str]:
+        """
+        写入（或重写）归档文件，返回 日文件相对路径 -> 归档成员路径 的映射
+
+        已压缩的格式原样存入（ZIP_STORED），旧json格式使用deflate压缩。
+        """
+        archive_path = os.path.join(self.raw_data_dir, archive_rel)
+        os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+        tmp_path = f"{archive_path}.{os.getpid()}.tmp"
+        moves: Dict[str, str] = {}
+        written = set()
+        with zipfile.ZipFile(tmp_path, "w") as target:
+            for rel_path in rel_paths:
+                member = os.path.basename(rel_path)
+                source_path = os.path.join(self.raw_data_dir, rel_path)
+                if not os.path.exists(source_path):
+                    self.logger.warning(f"归档时文件 {rel_path} 不存在，跳过")
+                    continue
+                compression = zipfile.ZIP_DEFLATED if raw_format.format_of(member) == "json" else zipfile.ZIP_STORED
+                target.write(source_path, member, compress_type=compression)
+                moves[rel_path] = f"{archive_rel}{ARCHIVE_SEP}{member}"
+                written.add(member)
+
+            # 保留旧归档中仍被清单引用的成员
+            if os.path.exists(archive_path):
+                with zipfile.ZipFile(archive_path) as source:
+                    for info in source.infolist():
+                        referenced = self.raw_storage.manifest.count_with_prefix(
+                            f"{archive_rel}{ARCHIVE_SEP}{info.filename}"
+                        )
+                        if info.filename not in written and referenced:
+                            target.writestr(info, source.read(info))
+        os.replace(tmp_path, archive_path)
+        return moves
+
+    def delete_expired(self, today: date) -> int:
+        """
+        删除delete_after_days之前的日文件、归档成员和快照
+
+        归档中的成员全部过期后删除整个归档，部分过期时重写归档去掉过期成员。
+        启用条目存储时，随后删除不再被任何保留文件引用的条目版本。
+
+        Returns:
+            删除的清单记录数
+        """
+        if not self.delete_after_days:
+            return 0
+        cutoff = (today - timedelta(days=self.delete_after_days)).strftime("%Y%m%d")
+        manifest = self.raw_storage.manifest
+
+        archives = set()
+        rows = manifest.rows(before_date=cutoff)
+        for rel_path, _, _, _ in rows:
+            manifest.remove(rel_path)
+            if ARCHIVE_SEP in rel_path:
+                archives.add(rel_path.split(ARCHIVE_SEP, 1)[0])
+                continue
+            file_path = os.path.join(self.raw_data_dir, rel_path)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+        for archive_rel in archives:
+            archive_path = os.path.join(self.raw_data_dir, archive_rel)
+            if not os.path.exists(archive_path):
+                continue
+            if manifest.count_with_prefix(f"{archive_rel}{ARCHIVE_SEP}"):
+                # 部分过期：重写归档，只保留仍被清单引用的成员
+                self._write_archive(archive_rel, [])
+            else:
+                os.remove(archive_path)
+
+        # 快照文件名以数据日期开头
+        for dir_path, _, filenames in os.walk(self.raw_storage.snapshot_dir):
+            for filename in filenames:
+                if filename.split("_", 1)[0] < cutoff and raw_format.format_of(filename):
+                    os.remove(os.path.join(dir_path, filename))
+
+        if self.raw_storage.entities is not None:
+            # 在收集引用之前确定清理界限：最近被写入过的版本可能属于尚未登记到清单的文件
+            touched_before = time.time() - self.PRUNE_GRACE_SECONDS
+            try:
+                referenced = self._referenced_entities()
+            except (OSError, ValueError) as e:
+                # 无法确认全部引用时不清理，避免删除仍在使用的版本
+                self.logger.warning(f"读取原始数据文件失败，跳过条目版本清理: {e}")
+            else:
+                pruned = self.raw_storage.entities.prune(referenced, touched_before)
+                self.logger.info(f"清理未被引用的条目版本 {pruned} 个")
+        return len(rows)
+
+    def _referenced_entities(self) -> Set[Tuple[str, int, str]]:
+        """收集清单中保留的原始数据文件（含其引用的快照）引用的全部 (类别, id, 版本)"""
+        referenced = set()
+        for rel_path, _, _, _ in self.raw_storage.manifest.rows():
+            items = self.raw_storage.iter_items(os.path.join(self.raw_data_dir, rel_path), project=False)
+            _, header = next(items)
+            if not header.get("entity_refs"):
+                continue
+            for kind, ref in items:
+                referenced.add((kind, ref["id"], ref["version"]))
+        return referenced
+
+    def apply(self, today: Optional[date] = None) -> Dict[str, int]:
+        """
+        执行保留策略（先归档再删除）
+
+        Args:
+            today: 可选，当前日期（默认本地今天）
+
+        Returns:
+            统计信息：归档的日文件数、删除的记录数
+        """
+        today = today or date.today()
+        with self._lock():
+            archived = self.compact(today)
+            deleted = self.delete_expired(today)
+        self.logger.info(f"原始数据保留策略执行完成：归档 {archived} 个日文件，删除 {deleted} 条记录")
+        return {"archived": archived, "deleted": deleted}
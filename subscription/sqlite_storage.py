@@ -0,0 +1,191 @@
+import os
+import json
+import sqlite3
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, List, Optional
+from .models import Subscription
+from core.config import Config
+
+class SQLiteSubscriptionStorage:
+    """订阅数据持久化存储（SQLite），按id/仓库/启用状态建立索引，支持单行更新和事务批量写入"""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            id INTEGER PRIMARY KEY,
+            repo_full_name TEXT NOT NULL,
+            subscribers TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            last_processed_at TEXT,
+            time_range_type TEXT NOT NULL DEFAULT 'daily',
+            enabled INTEGER NOT NULL DEFAULT 1,
+            cursors TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE INDEX IF NOT EXISTS idx_subscriptions_repo ON subscriptions(repo_full_name);
+        CREATE INDEX IF NOT EXISTS idx_subscriptions_enabled ON subscriptions(enabled);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    _COLUMNS = "id, repo_full_name, subscribers, created_at, last_processed_at, time_range_type, enabled, cursors"
+
+    def __init__(self, config: Config):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = config.get("subscription.sqlite_path", "data/subscriptions.db")
+        dir_path = os.path.dirname(self.db_path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        with self._connect() as conn:
+            # WAL模式允许读写并发（CLI、应用和守护进程可同时访问）
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """打开连接并在一个事务中执行，成功提交、异常回滚（每次操作独立连接，线程安全）"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_row(sub: Subscription) -> tuple:
+        data = sub.to_dict()
+        return (
+            data["id"],
+            data["repo_full_name"],
+            json.dumps(data["subscribers"], ensure_ascii=False),
+            data["created_at"],
+            data["last_processed_at"],
+            data["time_range_type"],
+            1 if data["enabled"] else 0,
+            json.dumps(data["cursors"], ensure_ascii=False)
+        )
+
+    @staticmethod
+    def _from_row(row: tuple) -> Subscription:
+        return Subscription(
+            id=row[0],
+            repo_full_name=row[1],
+            subscribers=json.loads(row[2]),
+            created_at=datetime.fromisoformat(row[3]),
+            last_processed_at=datetime.fromisoformat(row[4]) if row[4] else None,
+            time_range_type=row[5],
+            enabled=bool(row[6]),
+            cursors=json.loads(row[7] or "{}")
+        )
+
+    def load_subscriptions(self) -> List[Subscription]:
+        """加载所有订阅"""
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(f"SELECT {self._COLUMNS} FROM subscriptions ORDER BY id").fetchall()
+            return [self._from_row(row) for row in rows]
+        except Exception as e:
+            self.logger.error(f"加载订阅失败: {str(e)}")
+            return []
+
+    def save_subscriptions(self, subscriptions: List[Subscription]):
+        """保存所有订阅（整体替换，单个事务）"""
+        try:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM subscriptions")
+                conn.executemany(
+                    f"INSERT INTO subscriptions ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [self._to_row(sub) for sub in subscriptions]
+                )
+        except Exception as e:
+            self.logger.error(f"保存订阅失败: {str(e)}")
+
+    def get_next_id(self) -> int:
+        """获取下一个可用的订阅ID"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM subscriptions").fetchone()[0]
+
+    def get_subscription(self, sub_id: int) -> Optional[Subscription]:
+        """按ID获取订阅"""
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {self._COLUMNS} FROM subscriptions WHERE id = ?", (sub_id,)
+            ).fetchone()
+        return self._from_row(row) if row else None
+
+    def find_by_repo(self, repo_full_name: str) -> List[Subscription]:
+        """按仓库名获取订阅"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {self._COLUMNS} FROM subscriptions WHERE repo_full_name = ? ORDER BY id",
+                (repo_full_name,)
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def add_subscription(self, sub: Subscription):
+        """
+        新增订阅，ID由SQLite在写事务内分配并回写到sub.id
+
+        多个进程同时用get_next_id取到相同ID时也不会冲突。
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"INSERT INTO subscriptions ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (None,) + self._to_row(sub)[1:]
+            )
+            sub.id = cursor.lastrowid
+
+    def update_subscription(self, sub: Subscription) -> bool:
+        """更新单个订阅，返回是否找到该订阅"""
+        return self.update_subscriptions([sub]) > 0
+
+    def update_subscriptions(self, subscriptions: List[Subscription]) -> int:
+        """在单个事务中批量更新订阅，返回实际更新的行数"""
+        rows = [self._to_row(sub) for sub in subscriptions]
+        with self._connect() as conn:
+            cursor = conn.executemany(
+                """UPDATE subscriptions
+                   SET repo_full_name = ?, subscribers = ?, created_at = ?, last_processed_at = ?,
+                       time_range_type = ?, enabled = ?, cursors = ?
+                   WHERE id = ?""",
+                [row[1:] + row[:1] for row in rows]
+            )
+            return cursor.rowcount
+
+    def delete_subscription(self, sub_id: int) -> bool:
+        """删除订阅，返回是否找到该订阅"""
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM subscriptions WHERE id = ?", (sub_id,))
+            return cursor.rowcount > 0
+
+    def count(self) -> int:
+        """返回订阅总数"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM subscriptions").fetchone()[0]
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """读取存储元数据（如JSON迁移是否已完成）"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        """写入存储元数据"""
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def import_subscriptions(self, subscriptions: List[Subscription]) -> int:
+        """
+        导入订阅（用于从JSON存储迁移），已存在的ID会被跳过
+
+        Returns:
+            实际导入的数量
+        """
+        with self._connect() as conn:
+            cursor = conn.executemany(
+                f"INSERT OR IGNORE INTO subscriptions ({self._COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [self._to_row(sub) for sub in subscriptions]
+            )
+            return cursor.rowcount
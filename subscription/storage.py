@@ -1,16 +1,44 @@
+import copy
 import json
 import os
+import time
+import atexit
 import logging
-from typing import List, Optional
+import threading
+from datetime import datetime
+from dataclasses import fields, replace
+from typing import Any, Dict, List, Optional, Tuple, Union
 from .models import Subscription
+from .sqlite_storage import SQLiteSubscriptionStorage
 from core.config import Config
+from core.file_lock import FileLock, atomic_write_json
 
 class SubscriptionStorage:
-    """订阅数据持久化存储（JSON文件）"""
+    """
+    订阅数据持久化存储（JSON文件）
+
+    订阅在进程内缓存，按文件修改时间判断是否需要重新加载；单个订阅的普通更新（如最后处理时间、启用状态）
+    按字段记为脏数据，按 subscription.auto_save_interval 间隔或进程退出时批量写回，写回前只对本进程可见
+    （写回缓冲只保证单进程内的一致性）。写回时只把本进程改动过的字段应用到文件中最新的记录上，
+    不会用旧记录覆盖其他进程对其余字段的修改。增量水位线变化、新增/删除订阅立即写回，
+    其他进程认领同一订阅时总能读到最新的水位线。所有写入均为临时文件+重命名的原子替换，并在跨进程文件锁内重新读取文件后合并，
+    CLI、应用和守护进程同时运行时不会丢失彼此的更新。
+    """
     def __init__(self, config: Config):
         self.logger = logging.getLogger(__name__)
         self.storage_path = config.get("subscription.storage_path", "data/subscriptions.json")
+        self.auto_save_interval = config.get("subscription.auto_save_interval", 300)
+        self._lock = threading.RLock()
+        self._cache: Optional[Dict[int, Subscription]] = None
+        self._file_stamp: Optional[Tuple[int, int]] = None
+        self._dirty: Dict[int, Dict[str, Any]] = {}  # 订阅ID -> {字段名: 未写回的值}
+        self._last_flush = time.time()
+        self._stop_event = threading.Event()
         self._init_storage_dir()
+        
+        if self.auto_save_interval and self.auto_save_interval > 0:
+            threading.Thread(target=self._auto_save_loop, name="subscription-auto-save", daemon=True).start()
+        atexit.register(self.close)
 
     def _init_storage_dir(self):
         """初始化存储目录"""
@@ -19,29 +47,209 @@ class SubscriptionStorage:
             os.makedirs(dir_path, exist_ok=True)
         # 初始化空文件
         if not os.path.exists(self.storage_path):
-            with open(self.storage_path, "w", encoding="utf-8") as f:
-                json.dump([], f, ensure_ascii=False)
+            with self._file_lock():
+                if not os.path.exists(self.storage_path):
+                    self._write_file([])
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """返回存储文件的(修改时间, 大小)，用于判断缓存是否失效"""
+        try:
+            stat = os.stat(self.storage_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _read_file(self) -> Dict[int, Subscription]:
+        with open(self.storage_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {item["id"]: Subscription.from_dict(item) for item in data}
+
+    def _write_file(self, subscriptions: List[Subscription]):
+        """原子写入：先写临时文件再重命名替换，读取方不会读到写了一半的文件"""
+        atomic_write_json(self.storage_path, [sub.to_dict() for sub in subscriptions], indent=2)
+
+    def _file_lock(self) -> FileLock:
+        """跨进程的订阅文件锁，所有读-改-写过程都在锁内完成"""
+        return FileLock(self.storage_path)
+
+    def _ensure_loaded(self) -> Dict[int, Subscription]:
+        """返回缓存，文件被其他进程修改时重新加载（未写回的脏字段会重新应用到新内容上）"""
+        stamp = self._stat()
+        if self._cache is None or stamp != self._file_stamp:
+            cache = self._read_file()
+            for sub_id, changes in self._dirty.items():
+                if sub_id in cache:
+                    cache[sub_id] = replace(cache[sub_id], **changes)
+            self._cache = cache
+            self._file_stamp = stamp
+        return self._cache
+
+    def _flush_locked(self):
+        """在文件锁内重新读取最新文件、合并脏数据并写回（调用方需持有线程锁和文件锁）"""
+        cache = self._ensure_loaded()
+        self._write_file(list(cache.values()))
+        self._file_stamp = self._stat()
+        self._dirty.clear()
+        self._last_flush = time.time()
+
+    def flush(self):
+        """立即写回所有未保存的更新"""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                with self._file_lock():
+                    self._flush_locked()
+            except Exception as e:
+                self.logger.error(f"保存订阅失败: {str(e)}")
+
+    def _auto_save_loop(self):
+        """后台按自动保存间隔写回脏数据"""
+        while not self._stop_event.wait(self.auto_save_interval):
+            self.flush()
+
+    def close(self):
+        """停止自动保存并写回未保存的更新（进程退出时自动调用）"""
+        self._stop_event.set()
+        self.flush()
 
     def load_subscriptions(self) -> List[Subscription]:
-        """加载所有订阅"""
+        """加载所有订阅（返回副本，修改后需通过update_subscription保存）"""
         try:
-            with open(self.storage_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            return [Subscription.from_dict(item) for item in data]
+            with self._lock:
+                return [replace(sub) for sub in self._ensure_loaded().values()]
         except Exception as e:
             self.logger.error(f"加载订阅失败: {str(e)}")
             return []
 
     def save_subscriptions(self, subscriptions: List[Subscription]):
-        """保存所有订阅"""
+        """保存所有订阅（整体替换，立即写回）"""
         try:
-            data = [sub.to_dict() for sub in subscriptions]
-            with open(self.storage_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with self._lock, self._file_lock():
+                self._write_file(subscriptions)
+                self._cache = {sub.id: replace(sub) for sub in subscriptions}
+                self._file_stamp = self._stat()
+                self._dirty.clear()
+                self._last_flush = time.time()
         except Exception as e:
             self.logger.error(f"保存订阅失败: {str(e)}")
 
     def get_next_id(self) -> int:
         """获取下一个可用的订阅ID"""
-        subs = self.load_subscriptions()
-        return max([sub.id for sub in subs], default=0) + 1
\ No newline at end of file
+        with self._lock:
+            return max(self._ensure_loaded().keys(), default=0) + 1
+
+    def get_subscription(self, sub_id: int) -> Optional[Subscription]:
+        """按ID获取订阅"""
+        with self._lock:
+            sub = self._ensure_loaded().get(sub_id)
+            return replace(sub) if sub else None
+
+    def find_by_repo(self, repo_full_name: str) -> List[Subscription]:
+        """按仓库名获取订阅"""
+        with self._lock:
+            return [replace(sub) for sub in self._ensure_loaded().values() if sub.repo_full_name == repo_full_name]
+
+    def add_subscription(self, sub: Subscription):
+        """新增订阅（立即写回），ID已被其他进程占用时重新分配并回写到sub.id"""
+        with self._lock, self._file_lock():
+            cache = self._ensure_loaded()
+            if sub.id in cache:
+                sub.id = max(cache.keys()) + 1
+            cache[sub.id] = replace(sub)
+            self._flush_locked()
+
+    def update_subscription(self, sub: Subscription) -> bool:
+        """更新单个订阅，返回是否找到该订阅"""
+        return self.update_subscriptions([sub]) > 0
+
+    def update_subscriptions(self, subscriptions: List[Subscription]) -> int:
+        """
+        批量更新订阅（写入缓存并标记为脏数据，到达自动保存间隔时写回），返回实际更新的数量
+
+        只记录与缓存中当前记录不同的字段，写回时按字段合并到文件中的最新记录。
+        水位线（cursors）有变化时立即写回，避免其他进程按旧水位线重复抓取。
+        """
+        with self._lock:
+            cache = self._ensure_loaded()
+            updated = 0
+            cursors_changed = False
+            for sub in subscriptions:
+                current = cache.get(sub.id)
+                if current is None:
+                    continue
+                changes = {
+                    f.name: copy.deepcopy(getattr(sub, f.name))
+                    for f in fields(Subscription)
+                    if getattr(sub, f.name) != getattr(current, f.name)
+                }
+                if changes:
+                    cursors_changed = cursors_changed or "cursors" in changes
+                    cache[sub.id] = replace(current, **changes)
+                    self._dirty.setdefault(sub.id, {}).update(changes)
+                updated += 1
+            if updated and (cursors_changed or time.time() - self._last_flush >= (self.auto_save_interval or 0)):
+                try:
+                    with self._file_lock():
+                        self._flush_locked()
+                except Exception as e:
+                    self.logger.error(f"保存订阅失败: {str(e)}")
+            return updated
+
+    def delete_subscription(self, sub_id: int) -> bool:
+        """删除订阅（立即写回），返回是否找到该订阅"""
+        with self._lock, self._file_lock():
+            cache = self._ensure_loaded()
+            if sub_id not in cache:
+                return False
+            del cache[sub_id]
+            self._dirty.pop(sub_id, None)
+            self._flush_locked()
+            return True
+
+
+def load_legacy_subscriptions(json_path: str) -> List[Subscription]:
+    """
+    直接读取JSON订阅文件（用于迁移，不创建缓存、自动保存线程和退出回调）
+
+    参数:
+        json_path: JSON订阅文件路径
+
+    返回:
+        订阅列表（文件为空或格式错误时返回空列表）
+    """
+    try:
+        with FileLock(json_path), open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.getLogger(__name__).error(f"读取订阅文件 {json_path} 失败: {str(e)}")
+        return []
+    return [Subscription.from_dict(item) for item in data]
+
+
+# SQLite元数据中记录JSON订阅迁移完成时间的键
+JSON_MIGRATED_KEY = "json_migrated_at"
+
+
+def create_subscription_storage(config: Config) -> Union[SubscriptionStorage, SQLiteSubscriptionStorage]:
+    """
+    根据配置 subscription.storage_backend（json / sqlite）创建订阅存储
+
+    首次使用SQLite存储且数据库为空时，自动从JSON文件（subscription.storage_path）一次性迁移已有订阅；
+    迁移完成后在数据库元数据中记录，之后即使删光订阅也不会再次导入
+    """
+    logger = logging.getLogger(__name__)
+    backend = config.get("subscription.storage_backend", "json")
+    if backend != "sqlite":
+        return SubscriptionStorage(config)
+
+    storage = SQLiteSubscriptionStorage(config)
+    if storage.get_meta(JSON_MIGRATED_KEY) is None:
+        json_path = config.get("subscription.storage_path", "data/subscriptions.json")
+        if storage.count() == 0 and os.path.exists(json_path):
+            subs = load_legacy_subscriptions(json_path)
+            if subs:
+                imported = storage.import_subscriptions(subs)
+                logger.info(f"已从 {json_path} 迁移 {imported} 个订阅到 {storage.db_path}")
+        storage.set_meta(JSON_MIGRATED_KEY, datetime.now().isoformat())
+    return storage
@@ -2,8 +2,10 @@ import gradio as gr
 import os
 import json
 import yaml
+import queue
+import threading
 from datetime import datetime, timedelta, date
-from typing import List, Dict, Tuple, Optional
+from typing import Iterator, List, Dict, Tuple, Optional
 import pandas as pd
 from subscription.manager import SubscriptionManager
 from subscription.models import Subscription
@@ -25,7 +27,7 @@ AI_REPORTS_DIR = config.get("report.output_dir", "ai_reports")
 
 # 初始化核心组件
 github_token = os.getenv("GITHUB_TOKEN") or config.get("github_token")
-github_client = GitHubClient(github_token=github_token) if github_token else None
+github_client = GitHubClient.from_config(config, github_token) if github_token else None
 
 deepseek_api_key = os.getenv("DEEPSEEK_API_KEY") or config.get("deepseek.api_key")
 report_generator = AIReportGenerator(config, deepseek_api_key)
@@ -214,27 +216,32 @@ def on_report_select(evt: gr.SelectData) -> Tuple[str, str]:
     
     return "未选择任何报告", ""
 
-def generate_reports(sub_id: str, start_date_str: str, end_date_str: str) -> Tuple[pd.DataFrame, str]:
-    """生成报告，保存到ai_reports目录"""
+def generate_reports(sub_id: str, start_date_str: str, end_date_str: str) -> Iterator[Tuple[pd.DataFrame, str, str]]:
+    """生成报告，保存到ai_reports目录（流式显示生成中的报告内容）"""
     if not sub_manager or not report_generator:
-        return load_reports(), "初始化失败，请检查配置"
+        yield load_reports(), "初始化失败，请检查配置", ""
+        return
     
     if not sub_id or not sub_id.isdigit():
-        return load_reports(), "请输入有效的订阅ID"
+        yield load_reports(), "请输入有效的订阅ID", ""
+        return
     
     # 解析日期
     start_date = parse_date(start_date_str)
     end_date = parse_date(end_date_str)
     
     if not start_date or not end_date:
-        return load_reports(), "日期格式错误，请使用YYYY-MM-DD格式"
+        yield load_reports(), "日期格式错误，请使用YYYY-MM-DD格式", ""
+        return
     
     # 验证日期范围（最大1个月）
     if start_date >= end_date:
-        return load_reports(), "开始日期必须早于结束日期"
+        yield load_reports(), "开始日期必须早于结束日期", ""
+        return
     
     if (end_date - start_date).days > 31:
-        return load_reports(), "日期范围不能超过1个月"
+        yield load_reports(), "日期范围不能超过1个月", ""
+        return
     
     # 转换为datetime
     start_time = datetime.combine(start_date, datetime.min.time())
@@ -243,23 +250,42 @@ def generate_reports(sub_id: str, start_date_str: str, end_date_str: str) -> Tup
     # 处理订阅数据
     sub_id_int = int(sub_id)
     success, msg, file_paths = sub_manager.process_single_subscription(
-        sub=next((s for s in sub_manager.list_subscriptions() if s.id == sub_id_int), None),
+        sub=sub_manager.get_subscription(sub_id_int),
         custom_time_start=start_time,
         custom_time_end=end_time,
         avoid_duplicate=True
     )
     
     if not success:
-        return load_reports(), f"数据处理失败: {msg}"
+        yield load_reports(), f"数据处理失败: {msg}", ""
+        return
     
-    # 生成AI报告，指定输出目录为ai_reports
-    success_count, total_count, report_paths = report_generator.generate_subscription_report(
-                    sub_id=sub_id_int,
-                    start_time=start_time,
-                    end_time=end_time
-                )
-    
-    return load_reports(), f"报告生成完成: 成功 {success_count}"
+    # 在后台线程生成AI报告，部分结果通过队列传回界面
+    updates: "queue.Queue" = queue.Queue()
+    result = {}
+
+    def run():
+        try:
+            result["value"] = report_generator.generate_subscription_report(
+                sub_id=sub_id_int,
+                start_time=start_time,
+                end_time=end_time,
+                on_progress=updates.put
+            )
+        finally:
+            updates.put(None)
+
+    threading.Thread(target=run, daemon=True).start()
+    content = ""
+    while True:
+        partial = updates.get()
+        if partial is None:
+            break
+        content = partial
+        yield gr.update(), "报告生成中...", content
+
+    success, msg, report_path = result.get("value", (False, "报告生成失败", None))
+    yield load_reports(), msg, content
 
 # 配置管理页签功能
 def save_config(config_data: Dict) -> str:
@@ -284,7 +310,7 @@ def save_config(config_data: Dict) -> str:
         global github_client, sub_manager, report_generator
         
         github_token = config.get("github_token") or os.getenv("GITHUB_TOKEN")
-        github_client = GitHubClient(github_token=github_token) if github_token else None
+        github_client = GitHubClient.from_config(config, github_token) if github_token else None
         
         deepseek_api_key = config.get("deepseek.api_key") or os.getenv("DEEPSEEK_API_KEY")
         report_generator = AIReportGenerator(config, deepseek_api_key)
@@ -417,7 +443,7 @@ def create_interface():
         generate_btn.click(
             fn=generate_reports,
             inputs=[sub_id_input, start_date_input, end_date_input],
-            outputs=[report_table, generate_status]
+            outputs=[report_table, generate_status, report_content]
         )
         
         # 报告列表刷新
@@ -2,8 +2,8 @@ import click
 import logging
 import os
 import sys
-from datetime import datetime, timedelta
-from typing import Tuple, List, Optional, Dict, Any
+from datetime import datetime
+from typing import Tuple, Optional
 from core.config import Config
 from core.logger import setup_logger
 from github.client import GitHubClient
@@ -27,11 +27,7 @@ def init_global_components() -> Tuple[Config, GitHubClient, SubscriptionManager,
         click.echo("错误：未配置GitHub Token（请设置环境变量GITHUB_TOKEN或在config.yaml中配置）")
         sys.exit(1)
     
-    github_client = GitHubClient(
-        github_token=github_token,
-        timeout=config.get("api_timeout", 10),
-        retries=config.get("api_retries", 3)
-    )
+    github_client = GitHubClient.from_config(config, github_token)
     
     # 初始化订阅管理器
     sub_manager = SubscriptionManager(config, github_client)
@@ -81,6 +77,10 @@ def show_help():
      示例：generate-all-reports
      说明：为所有未生成报告的原始数据生成AI总结
 
+   - generate-rollup <订阅ID> [--period=weekly|monthly --start=2024-05-01 --end=2024-05-08]
+     示例：generate-rollup 1 或 generate-rollup 1 --period=monthly
+     说明：基于已生成的日报汇总周报/月报（默认截至今天的最近7/30天），缺少日报的日期使用原始数据
+
 4. 其他：
    - help：显示此帮助信息
    - exit：退出工具
@@ -181,8 +181,7 @@ def execute_interactive_command(cmd: str,
                         custom_end = parse_datetime_param(parts[i].split("=")[1])
 
                 # 查找订阅
-                subs = sub_manager.list_subscriptions()
-                sub = next((s for s in subs if s.id == sub_id), None)
+                sub = sub_manager.get_subscription(sub_id)
                 if not sub:
                     click.echo(f"未找到订阅ID: {sub_id}")
                     return
@@ -244,12 +243,14 @@ def execute_interactive_command(cmd: str,
                     elif parts[i].startswith("--end="):
                         end_time = parse_datetime_param(parts[i].split("=")[1])
 
-                # 生成报告
+                # 生成报告（流式生成时显示进度）
                 success, msg, report_path = report_generator.generate_subscription_report(
                     sub_id=sub_id,
                     start_time=start_time,
-                    end_time=end_time
+                    end_time=end_time,
+                    on_progress=lambda content: click.echo(f"\r生成中：报告已有 {len(content)} 字", nl=False)
                 )
+                click.echo()
                 click.echo(msg)
                 if report_path:
                     click.echo(f"报告文件：{report_path}")
@@ -257,6 +258,34 @@ def execute_interactive_command(cmd: str,
             except ValueError:
                 f"生成报告失败"
 
+        # 生成周报/月报
+        elif parts[0] == "generate-rollup":
+            if len(parts) < 2:
+                click.echo("用法：generate-rollup <订阅ID> [--period=weekly|monthly --start=2024-05-01 --end=2024-05-08]")
+                return
+
+            sub_id = int(parts[1])
+            period = "weekly"
+            start_time = None
+            end_time = None
+            for i in range(2, len(parts)):
+                if parts[i].startswith("--period="):
+                    period = parts[i].split("=")[1]
+                elif parts[i].startswith("--start="):
+                    start_time = parse_datetime_param(parts[i].split("=")[1])
+                elif parts[i].startswith("--end="):
+                    end_time = parse_datetime_param(parts[i].split("=")[1])
+
+            success, msg, report_path = report_generator.generate_rollup_report(
+                sub_id=sub_id,
+                period=period,
+                start_time=start_time,
+                end_time=end_time
+            )
+            click.echo(msg)
+            if report_path:
+                click.echo(f"报告文件：{report_path}")
+
         # 生成所有报告
         elif parts[0] == "generate-all-reports":
             success_count, total_count, report_paths = report_generator.generate_all_reports()
@@ -376,6 +405,79 @@ def list_subs(obj, repo_full_name):
     for sub in subs:
         click.echo(f"ID: {sub.id}, 仓库: {sub.repo_full_name}, 状态: {'启用' if sub.enabled else '禁用'}")
 
+@cli.command()
+@click.option("--full", is_flag=True, help="忽略导出进度，重新导出全部原始数据")
+@click.pass_obj
+def export_analytics(obj, full):
+    """导出原始数据到按仓库/月份分区的Parquet文件（命令模式）"""
+    from analytics.exporter import AnalyticsExporter
+    config, _, sub_manager, _ = obj
+    try:
+        stats = AnalyticsExporter(config, sub_manager.raw_storage).export(full=full)
+    except RuntimeError as e:
+        click.echo(f"错误：{str(e)}")
+        return
+    click.echo(f"导出完成：原始文件 {stats['files']} 个，分区 {stats['partitions']} 个，条目 {stats['items']} 条")
+
+@cli.command()
+@click.argument("sub_id", type=int)
+@click.option("--period", type=click.Choice(["weekly", "monthly"]), default="weekly", help="汇总周期")
+@click.option("--start", help="开始时间（格式：YYYY-MM-DD），默认为结束时间前一个周期")
+@click.option("--end", help="结束时间（格式：YYYY-MM-DD，不包含），默认为今天")
+@click.pass_obj
+def generate_rollup(obj, sub_id, period, start, end):
+    """基于已生成的日报汇总周报/月报（命令模式）"""
+    _, _, _, report_generator = obj
+    success, msg, report_path = report_generator.generate_rollup_report(
+        sub_id=sub_id,
+        period=period,
+        start_time=parse_datetime_param(start) if start else None,
+        end_time=parse_datetime_param(end) if end else None
+    )
+    click.echo(msg)
+    if report_path:
+        click.echo(f"报告文件：{report_path}")
+
+@cli.command()
+@click.pass_obj
+def migrate_raw_layout(obj):
+    """把已有原始数据文件移动到 subscription.raw_layout 对应的目录布局（命令模式）"""
+    from subscription.raw_retention import RawDataRetention
+    config, _, sub_manager, _ = obj
+    moved = RawDataRetention(config, sub_manager.raw_storage).migrate_layout()
+    click.echo(f"迁移完成：移动 {moved} 个原始数据文件")
+
+@cli.command()
+@click.pass_obj
+def apply_retention(obj):
+    """按 subscription.retention 归档旧原始数据并删除过期数据（命令模式）"""
+    from subscription.raw_retention import RawDataRetention
+    config, _, sub_manager, _ = obj
+    stats = RawDataRetention(config, sub_manager.raw_storage).apply()
+    click.echo(f"保留策略执行完成：归档 {stats['archived']} 个日文件，删除 {stats['deleted']} 条记录")
+
+@cli.command()
+@click.argument("metric", type=click.Choice(["merge-latency", "issue-growth", "release-cadence"]))
+@click.option("--repo", "repos", multiple=True, help="仓库过滤（可多次指定）")
+@click.pass_obj
+def analytics(obj, metric, repos):
+    """基于导出的分析数据统计合并耗时/Issue增长/发布节奏（命令模式）"""
+    from analytics.query import AnalyticsQuery
+    config, _, _, _ = obj
+    try:
+        query = AnalyticsQuery(config)
+    except RuntimeError as e:
+        click.echo(f"错误：{str(e)}")
+        return
+    repos = list(repos) or None
+    if metric == "merge-latency":
+        result = query.merge_latency(repos)
+    elif metric == "issue-growth":
+        result = query.open_issue_growth(repos)
+    else:
+        result = query.release_cadence(repos)
+    click.echo(result.to_string() if len(result) else "暂无分析数据（请先执行 export-analytics）")
+
 if __name__ == "__main__":
     try:
         cli()
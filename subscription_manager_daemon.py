@@ -9,7 +9,6 @@ import logging
 import subprocess
 import signal
 from datetime import datetime, timedelta, timezone
-from typing import Optional
 
 # 导入项目相关模块
 from github.client import GitHubClient
@@ -39,7 +38,7 @@ def create_clients(config: Config):
     try:
         # 初始化核心组件
         github_token = os.getenv("GITHUB_TOKEN") or config.get("github_token")
-        github_client = GitHubClient(github_token=github_token) if github_token else None
+        github_client = GitHubClient.from_config(config, github_token) if github_token else None
 
         deepseek_api_key = os.getenv("DEEPSEEK_API_KEY") or config.get("deepseek.api_key")
         report_generator = AIReportGenerator(config, deepseek_api_key)
@@ -102,6 +101,23 @@ def generate_daily_report():
         subscriptions =sub_manager.list_subscriptions()
         success_count, total_count, report_paths = report_generator.generate_all_reports(subscriptions)
         
+        # 增量导出分析数据
+        if config.get("analytics.auto_export", False):
+            try:
+                from analytics.exporter import AnalyticsExporter
+                AnalyticsExporter(config, sub_manager.raw_storage).export()
+            except Exception as e:
+                logger.error(f"导出分析数据失败: {str(e)}")
+        
+        # 归档/清理旧原始数据
+        if config.get("subscription.retention.compact_after_days", 0) or \
+                config.get("subscription.retention.delete_after_days", 0):
+            try:
+                from subscription.raw_retention import RawDataRetention
+                RawDataRetention(config, sub_manager.raw_storage).apply()
+            except Exception as e:
+                logger.error(f"执行原始数据保留策略失败: {str(e)}")
+        
         # 记录任务结果
         logger.info(
             f"定时任务完成 - "
@@ -0,0 +1,19 @@
+import os
+import sys
+import pytest
+
+# 项目模块以仓库根目录为导入根
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import Config
+
+
+@pytest.fixture
+def config(tmp_path):
+    """指向临时目录的最小配置"""
+    config = Config()
+    config.set("subscription.raw_data_dir", str(tmp_path / "raw"))
+    config.set("subscription.storage_path", str(tmp_path / "subscriptions.json"))
+    config.set("subscription.lease_dir", str(tmp_path / "leases"))
+    config.set("subscription.auto_save_interval", 0)
+    return config
@@ -0,0 +1,94 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from analytics import exporter as exporter_module
+from analytics.exporter import AnalyticsExporter
+from analytics.query import AnalyticsQuery
+from subscription.raw_storage import RawDataStorage
+
+
+def _save_day(storage: RawDataStorage, current_date: date, prs):
+    day_start = datetime.combine(current_date, datetime.min.time())
+    data = {
+        "repo_info": {"full_name": "octo/repo", "name": "repo"},
+        "releases": [],
+        "pull_requests": prs,
+        "issues": [],
+    }
+    return storage.save(1, "octo/repo", current_date, day_start, day_start + timedelta(days=1), data=data)
+
+
+def _pr(pr_id: int, updated_at: str, title: str, merged_at=None):
+    return {"id": pr_id, "number": pr_id, "state": "closed" if merged_at else "open", "title": title,
+            "user": {"login": "octocat"}, "created_at": "2024-03-01T00:00:00Z",
+            "updated_at": updated_at, "closed_at": merged_at, "merged_at": merged_at}
+
+
+@pytest.fixture
+def analytics_config(config, tmp_path):
+    pytest.importorskip("pyarrow")
+    config.set("analytics.output_dir", str(tmp_path / "analytics"))
+    return config
+
+
+def test_export_requires_pyarrow(config, tmp_path, monkeypatch):
+    config.set("analytics.output_dir", str(tmp_path / "analytics"))
+    monkeypatch.setattr(exporter_module, "pa", None)
+
+    with pytest.raises(RuntimeError, match="pyarrow"):
+        AnalyticsExporter(config).export()
+
+
+def test_export_query_round_trip(analytics_config):
+    storage = RawDataStorage(analytics_config)
+    _save_day(storage, date(2024, 3, 1), [_pr(1, "2024-03-01T10:00:00Z", "v1")])
+    _save_day(storage, date(2024, 3, 2), [
+        _pr(1, "2024-03-02T10:00:00Z", "v2", merged_at="2024-03-02T12:00:00Z"),
+        _pr(2, "2024-03-02T11:00:00Z", "other"),
+    ])
+
+    stats = AnalyticsExporter(analytics_config, storage).export()
+    assert stats == {"files": 2, "partitions": 1, "items": 3}
+
+    table = AnalyticsQuery(analytics_config).load("pull_requests", repos=["octo/repo"])
+    rows = {row["id"]: row for row in table.to_pylist()}
+    # 同一PR只保留最新版本，仓库名从分区目录还原
+    assert sorted(rows) == [1, 2]
+    assert rows[1]["title"] == "v2" and rows[1]["repo"] == "octo/repo" and rows[1]["month"] == "2024-03"
+    assert AnalyticsQuery(analytics_config).load("pull_requests", repos=["other/repo"]).num_rows == 0
+
+
+def test_export_is_incremental_by_manifest_watermark(analytics_config):
+    storage = RawDataStorage(analytics_config)
+    _save_day(storage, date(2024, 3, 1), [_pr(1, "2024-03-01T10:00:00Z", "v1")])
+    exporter = AnalyticsExporter(analytics_config, storage)
+    assert exporter.export()["files"] == 1
+
+    # 没有新写入时不再处理任何文件
+    assert exporter.export()["files"] == 0
+
+    # 只处理水位线之后写入（或重写）的文件
+    _save_day(storage, date(2024, 3, 2), [_pr(2, "2024-03-02T10:00:00Z", "new")])
+    assert exporter.export() == {"files": 1, "partitions": 1, "items": 1}
+    assert exporter._load_state()["manifest_watermark"] == storage.manifest.changed_since()[-1][3]
+
+
+def test_export_retries_files_that_failed_to_load(analytics_config):
+    storage = RawDataStorage(analytics_config)
+    broken = _save_day(storage, date(2024, 3, 1), [_pr(1, "2024-03-01T10:00:00Z", "v1")])
+    _save_day(storage, date(2024, 3, 2), [_pr(2, "2024-03-02T10:00:00Z", "other")])
+    with open(broken, "rb") as f:
+        content = f.read()
+    with open(broken, "wb") as f:
+        f.write(b"not json")
+
+    exporter = AnalyticsExporter(analytics_config, storage)
+    assert exporter.export()["files"] == 1
+
+    # 水位线停在读取失败的文件之前，文件恢复后（清单未变）下次导出仍会重新读取它
+    with open(broken, "wb") as f:
+        f.write(content)
+    assert exporter.export()["files"] == 2
+    ids = sorted(AnalyticsQuery(analytics_config).load("pull_requests").column("id").to_pylist())
+    assert ids == [1, 2]
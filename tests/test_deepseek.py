@@ -0,0 +1,202 @@
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from llm.circuit_breaker import CircuitBreaker
+from llm.deepseek import DeepSeekAPIError, DeepSeekClient, estimate_tokens
+
+
+@pytest.fixture
+def client(config):
+    config.set("deepseek.cache.enabled", False)
+    config.set("deepseek.stream", False)
+    config.set("deepseek.circuit_breaker.failure_threshold", 2)
+    config.set("deepseek.circuit_breaker.reset_timeout", 60)
+    return DeepSeekClient("test-key", config)
+
+
+def _messages():
+    return [{"role": "user", "content": "hi"}]
+
+
+def test_read_timeouts_are_not_retried(client):
+    retry = client.session.get_adapter("https://api.deepseek.com").max_retries
+    assert retry.read == 0
+    assert retry.connect == retry.status == 3
+    assert 503 in retry.status_forcelist
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    # 半开：只放行一个试探请求，试探失败后重新打开
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failures_raise_and_open_breaker(client, monkeypatch):
+    calls = []
+
+    def post(*args, **kwargs):
+        calls.append(kwargs)
+        raise requests.ConnectionError("connection refused")
+
+    monkeypatch.setattr(client.session, "post", post)
+    for _ in range(2):
+        with pytest.raises(DeepSeekAPIError, match="connection refused"):
+            client._call_api(_messages())
+
+    # 熔断打开后直接失败，不再发出请求
+    with pytest.raises(DeepSeekAPIError, match="熔断"):
+        client._call_api(_messages())
+    assert len(calls) == 2
+
+
+class FakeLLM:
+    """替换_call_api：记录每次请求的用户消息，返回短结果"""
+
+    def __init__(self):
+        self.prompts = []
+        self.streamed = []
+        self._lock = threading.Lock()
+
+    def __call__(self, messages, on_token=None):
+        prompt = messages[-1]["content"]
+        with self._lock:
+            self.prompts.append(prompt)
+            number = len(self.prompts)
+        if on_token:
+            self.streamed.append(prompt)
+            on_token("final")
+            return "final"
+        return f"summary {number}"
+
+
+@pytest.fixture
+def small_budget_client(client, monkeypatch):
+    client.max_input_tokens = 700
+    fake = FakeLLM()
+    monkeypatch.setattr(client, "_call_api", fake)
+    return client, fake
+
+
+def test_map_reduce_splits_rows_within_budget(small_budget_client):
+    client, fake = small_budget_client
+    rows = [{"编号": i, "标题": "x" * 200} for i in range(30)]
+    tokens = []
+
+    result = client._map_reduce("system", {"Pull Requests": rows}, on_token=tokens.append)
+
+    budget = client._input_budget("system")
+    *chunk_prompts, final_prompt = fake.prompts
+    assert len(chunk_prompts) > 1
+    # 每段都在预算内，且所有条目恰好出现一次
+    assert all(estimate_tokens(prompt) <= budget for prompt in chunk_prompts)
+    assert sum(prompt.count('"编号"') for prompt in chunk_prompts) == len(rows)
+    # 只有最终的合并请求流式回调，合并内容为各段总结
+    assert fake.streamed == [final_prompt]
+    assert all(f"summary {i}" in final_prompt for i in range(1, len(chunk_prompts) + 1))
+    assert result == "final" and tokens == ["final"]
+
+
+def test_reduce_merges_in_layers_when_partials_exceed_budget(small_budget_client):
+    client, fake = small_budget_client
+    partials = [f"part{i} " + "y" * 800 for i in range(5)]
+    tokens = []
+
+    result = client._reduce("system", partials, on_token=tokens.append)
+
+    # 第一层两组（2份+3份，不留单份的组），第二层合并两份中间结果
+    assert len(fake.prompts) == 3
+    first_layer = fake.prompts[:2]
+    assert sorted(sum(f"part{i} " in prompt for i in range(5)) for prompt in first_layer) == [2, 3]
+    assert fake.streamed == [fake.prompts[2]]
+    assert "summary 1" in fake.prompts[2] and "summary 2" in fake.prompts[2]
+    assert result == "final" and tokens == ["final"]
+
+
+def test_reduce_single_partial_is_returned_without_request(small_budget_client):
+    client, fake = small_budget_client
+    tokens = []
+
+    assert client._reduce("system", ["only"], on_token=tokens.append) == "only"
+    assert fake.prompts == [] and tokens == ["only"]
+
+
+class FakeStreamResponse:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, chunk_size=512, decode_unicode=False):
+        return iter(self.lines)
+
+
+def _sse(content=None):
+    delta = {"content": content} if content is not None else {"role": "assistant"}
+    return "data: " + json.dumps({"choices": [{"delta": delta}]})
+
+
+def _stream_post(lines, payloads):
+    def post(url, data=None, stream=False, timeout=None):
+        payloads.append(json.loads(data))
+        return FakeStreamResponse(lines)
+    return post
+
+
+def test_stream_parses_sse_deltas_until_done(client, monkeypatch):
+    payloads = []
+    lines = [_sse(), "", ": keep-alive", _sse("你好"), _sse(""), _sse("，世界"), "data: [DONE]", _sse("忽略")]
+    monkeypatch.setattr(client.session, "post", _stream_post(lines, payloads))
+    tokens = []
+
+    assert client._call_api(_messages(), on_token=tokens.append) == "你好，世界"
+    assert tokens == ["你好", "，世界"]
+    assert payloads[0]["stream"] is True
+
+
+def test_stream_without_content_raises(client, monkeypatch):
+    monkeypatch.setattr(client.session, "post", _stream_post([_sse(), "data: [DONE]"], []))
+
+    with pytest.raises(DeepSeekAPIError, match="格式异常"):
+        client._call_api(_messages(), on_token=lambda text: None)
+
+
+def test_cache_hit_replays_full_content_to_on_token(config, tmp_path, monkeypatch):
+    config.set("deepseek.cache.enabled", True)
+    config.set("deepseek.cache.path", str(tmp_path / "llm_cache.db"))
+    client = DeepSeekClient("test-key", config)
+    payloads = []
+    monkeypatch.setattr(client.session, "post", _stream_post([_sse("一"), _sse("二"), "data: [DONE]"], payloads))
+
+    first = []
+    assert client._call_api(_messages(), on_token=first.append) == "一二"
+    replayed = []
+    assert client._call_api(_messages(), on_token=replayed.append) == "一二"
+
+    assert first == ["一", "二"]
+    # 命中缓存时不再请求，以完整内容回调一次
+    assert replayed == ["一二"] and len(payloads) == 1
@@ -0,0 +1,95 @@
+import json
+import os
+import time
+
+import pytest
+
+from core.file_lock import FileLock, FileLockTimeout, LeaseManager, atomic_write_json
+
+
+def test_atomic_write_json_replaces_file(tmp_path):
+    path = tmp_path / "state.json"
+    atomic_write_json(str(path), {"version": 1})
+    atomic_write_json(str(path), {"version": 2, "名称": "订阅"})
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {"version": 2, "名称": "订阅"}
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_atomic_write_json_keeps_original_on_failure(tmp_path):
+    path = tmp_path / "state.json"
+    atomic_write_json(str(path), {"version": 1})
+
+    with pytest.raises(TypeError):
+        atomic_write_json(str(path), {"version": object()})
+
+    assert json.loads(path.read_text(encoding="utf-8")) == {"version": 1}
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_file_lock_times_out_while_held(tmp_path):
+    path = str(tmp_path / "state.json")
+    with FileLock(path):
+        with pytest.raises(FileLockTimeout):
+            with FileLock(path, timeout=0.1):
+                pass
+    with FileLock(path, timeout=0.1):
+        pass
+
+
+def test_lease_is_exclusive_until_released(tmp_path):
+    first = LeaseManager(str(tmp_path))
+    second = LeaseManager(str(tmp_path))
+
+    assert first.claim("sub1_20261016")
+    assert not second.claim("sub1_20261016")
+    assert second.claim("sub2_20261016")
+
+    first.release("sub1_20261016")
+    assert second.claim("sub1_20261016")
+
+
+def test_lease_context_releases_only_claimed(tmp_path):
+    first = LeaseManager(str(tmp_path))
+    second = LeaseManager(str(tmp_path))
+
+    with first.lease("sub1_incremental") as claimed:
+        assert claimed
+        with second.lease("sub1_incremental") as contended:
+            assert not contended
+        # 未认领成功的一方退出时不会释放他人的租约
+        assert not second.claim("sub1_incremental")
+    assert second.claim("sub1_incremental")
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    crashed = LeaseManager(str(tmp_path), ttl=0.01)
+    assert crashed.claim("sub1_20261016")
+    time.sleep(0.05)
+
+    assert LeaseManager(str(tmp_path)).claim("sub1_20261016")
+
+
+def test_release_keeps_lease_taken_over_by_other_process(tmp_path):
+    slow = LeaseManager(str(tmp_path), ttl=0.01)
+    slow.owner = "host:1"
+    assert slow.claim("sub1_20261016")
+    time.sleep(0.05)
+    other = LeaseManager(str(tmp_path))
+    other.owner = "host:2"
+    assert other.claim("sub1_20261016")
+
+    # 原持有者处理结束后释放，不会删除接管者的租约
+    slow.release("sub1_20261016")
+    assert not LeaseManager(str(tmp_path)).claim("sub1_20261016")
+    assert not slow.renew("sub1_20261016")
+
+
+def test_renew_extends_own_lease(tmp_path):
+    holder = LeaseManager(str(tmp_path), ttl=0.2)
+    assert holder.claim("sub1_20261016")
+    time.sleep(0.1)
+    assert holder.renew("sub1_20261016")
+    time.sleep(0.15)
+
+    assert not LeaseManager(str(tmp_path)).claim("sub1_20261016")
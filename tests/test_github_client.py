@@ -0,0 +1,127 @@
+import os
+import time
+from datetime import datetime, timezone
+
+from github.cache import ResponseCache
+from github.client import GitHubClient
+
+
+def _release(release_id: int, created_at: str, published_at: str):
+    return {"id": release_id, "tag_name": f"v{release_id}", "prerelease": False,
+            "created_at": created_at, "published_at": published_at}
+
+
+def test_release_published_after_creation_is_kept(monkeypatch):
+    client = GitHubClient("test-token")
+    pages = [
+        [_release(2, "2026-10-13T08:00:00Z", "2026-10-15T08:00:00Z"),
+         _release(1, "2026-10-01T08:00:00Z", "2026-10-01T09:00:00Z")],
+        [_release(0, "2026-08-01T08:00:00Z", "2026-08-01T09:00:00Z")],
+        [_release(-1, "2026-07-01T08:00:00Z", "2026-10-15T10:00:00Z")],
+    ]
+    requested = []
+
+    def iter_pages(endpoint, params=None):
+        for page in pages:
+            requested.append(page)
+            yield page
+
+    monkeypatch.setattr(client, "_iter_pages", iter_pages)
+    releases = client.get_latest_releases(
+        "octo/repo",
+        datetime(2026, 10, 15, tzinfo=timezone.utc),
+        datetime(2026, 10, 16, 23, 59, 59, tzinfo=timezone.utc),
+    )
+
+    # 按发布时间过滤：创建于窗口之前、发布于窗口之内的发布保留
+    assert [r["id"] for r in releases] == [2]
+    # 整页创建时间早于 开始时间 - RELEASE_LOOKBACK 后停止翻页
+    assert len(requested) == 2
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+        self.links = {}
+
+    def json(self):
+        return self._body
+
+
+def test_not_modified_serves_cached_body(tmp_path, monkeypatch):
+    client = GitHubClient("test-token", cache=ResponseCache(str(tmp_path)))
+    responses = [
+        FakeResponse(200, {"full_name": "octo/repo"}, {"ETag": '"v1"'}),
+        FakeResponse(304),
+    ]
+    sent_headers = []
+
+    def request(url, params=None, extra_headers=None, **kwargs):
+        sent_headers.append(extra_headers or {})
+        return responses.pop(0)
+
+    monkeypatch.setattr(client, "_request", request)
+
+    assert client.get_repo_info("octo/repo") == {"full_name": "octo/repo"}
+    assert client.get_repo_info("octo/repo") == {"full_name": "octo/repo"}
+    assert sent_headers == [{}, {"If-None-Match": '"v1"'}]
+
+
+def test_cache_evicts_least_recently_used_at_size_limit(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    for key in ("a", "b"):
+        cache.set(key, {"body": "x" * 100}, etag=key)
+        time.sleep(0.01)
+    # 上限容纳两个条目（留出少量余量，条目大小因时间戳长度略有差异）
+    cache.max_size = cache._total_size + 20
+    # 读取a使b成为最久未使用的条目
+    assert cache.get("a") is not None
+    time.sleep(0.01)
+
+    cache.set("c", {"body": "x" * 100}, etag="c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache._total_size <= cache.max_size
+    assert sorted(os.listdir(tmp_path)) == ["a.json", "c.json"]
+
+
+def _search_client(monkeypatch, total_for_window):
+    """按查询窗口返回预置total_count的搜索客户端，记录每次查询的窗口"""
+    client = GitHubClient("test-token")
+    windows = []
+
+    def get_json(url, params=None):
+        window = params["q"].split("updated:")[1]
+        windows.append(window)
+        total = total_for_window(window)
+        return {"total_count": total, "items": [{"id": window}] if total else []}, None
+
+    monkeypatch.setattr(client, "_get_json", get_json)
+    return client, windows
+
+
+def test_search_splits_window_over_result_cap(monkeypatch):
+    start = datetime(2026, 10, 15, tzinfo=timezone.utc)
+    end = datetime(2026, 10, 15, 0, 0, 3, tzinfo=timezone.utc)
+    full_window = "2026-10-15T00:00:00Z..2026-10-15T00:00:03Z"
+    client, windows = _search_client(monkeypatch, lambda window: 1500 if window == full_window else 600)
+
+    items = list(client.search_issues("octo/repo", start, end))
+
+    assert windows == [full_window,
+                       "2026-10-15T00:00:02Z..2026-10-15T00:00:03Z",
+                       "2026-10-15T00:00:00Z..2026-10-15T00:00:01Z"]
+    assert [item["id"] for item in items] == windows[1:]
+
+
+def test_search_warns_when_window_cannot_split(monkeypatch, caplog):
+    start = datetime(2026, 10, 15, tzinfo=timezone.utc)
+    client, windows = _search_client(monkeypatch, lambda window: 1500)
+
+    items = list(client.search_issues("octo/repo", start, start))
+
+    assert len(windows) == 1 and len(items) == 1
+    assert "无法再拆分" in caplog.text
@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from github.client import GitHubAPIError, GitHubClient
+from github.graphql import GraphQLFetcher
+
+
+class FakeGraphQLClient(GitHubClient):
+    """按别名返回预置仓库数据的GitHub客户端，未知仓库返回null"""
+
+    def __init__(self, repos, next_pages=None):
+        super().__init__("test-token")
+        self.repos = repos
+        self.next_pages = next_pages or {}
+        self.queries = 0
+
+    def graphql(self, query, variables=None, cost=1):
+        self.queries += 1
+        if "after" in variables:
+            connection = next(name for name in ("releases", "pullRequests", "issues") if f"{name}(" in query)
+            return {"repository": {connection: self.next_pages[(connection, variables["after"])]}}
+        data = {}
+        i = 0
+        while f"owner{i}" in variables:
+            data[f"r{i}"] = self.repos.get(f"{variables[f'owner{i}']}/{variables[f'name{i}']}")
+            i += 1
+        return data
+
+
+def _repo(full_name):
+    empty = {"nodes": [], "pageInfo": {"hasNextPage": False}}
+    return {"nameWithOwner": full_name, "name": full_name.split("/")[1],
+            "releases": empty, "pullRequests": empty, "issues": empty}
+
+
+def test_missing_repo_does_not_discard_batch():
+    client = FakeGraphQLClient({"octo/a": _repo("octo/a"), "octo/c": _repo("octo/c")})
+    fetcher = GraphQLFetcher(client)
+    start = datetime(2026, 10, 15, tzinfo=timezone.utc)
+    end = datetime(2026, 10, 16, tzinfo=timezone.utc)
+
+    results = fetcher.fetch_windows(["octo/a", "octo/gone", "octo/c"], start, end)
+
+    assert client.queries == 1
+    assert results["octo/a"]["repo_info"]["full_name"] == "octo/a"
+    assert results["octo/c"]["repo_info"]["full_name"] == "octo/c"
+    assert isinstance(results["octo/gone"], GitHubAPIError)
+    with pytest.raises(GitHubAPIError):
+        fetcher.fetch_window("octo/gone", start, end)
+
+
+def _release(release_id, created_at, published_at):
+    return {"databaseId": release_id, "tagName": f"v{release_id}", "createdAt": created_at,
+            "publishedAt": published_at, "isPrerelease": False, "isDraft": False}
+
+
+def test_release_pages_follow_publish_time():
+    repo = _repo("octo/a")
+    # 首页最后一条创建于窗口之前，但之后的页仍可能有窗口内发布的条目
+    repo["releases"] = {
+        "nodes": [_release(3, "2026-10-14T08:00:00Z", "2026-10-15T08:00:00Z")],
+        "pageInfo": {"hasNextPage": True, "endCursor": "p2"},
+    }
+    next_pages = {("releases", "p2"): {
+        "nodes": [_release(2, "2026-10-12T08:00:00Z", "2026-10-15T09:00:00Z"),
+                  _release(1, "2026-08-01T08:00:00Z", "2026-08-01T09:00:00Z")],
+        "pageInfo": {"hasNextPage": True, "endCursor": "p3"},
+    }}
+    client = FakeGraphQLClient({"octo/a": repo}, next_pages)
+    start = datetime(2026, 10, 15, tzinfo=timezone.utc)
+    end = datetime(2026, 10, 16, tzinfo=timezone.utc)
+
+    data = GraphQLFetcher(client).fetch_window("octo/a", start, end)
+
+    assert [r["id"] for r in data["releases"]] == [3, 2]
+    # 最后一条创建于 开始时间 - RELEASE_LOOKBACK 之前，不再请求第三页
+    assert client.queries == 2
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from subscription.models import Subscription
+from subscription.storage import SubscriptionStorage
+
+
+def test_flush_keeps_fields_changed_by_other_process(config):
+    config.set("subscription.auto_save_interval", 3600)
+    app = SubscriptionStorage(config)
+    daemon = SubscriptionStorage(config)
+    app.save_subscriptions([
+        Subscription(id=1, repo_full_name="octo/repo", subscribers=[], created_at=datetime.now())
+    ])
+
+    # 应用切换状态（只记为脏数据），守护进程随后推进水位线（立即写回）
+    sub = app.get_subscription(1)
+    sub.enabled = False
+    app.update_subscription(sub)
+    sub = daemon.get_subscription(1)
+    sub.cursors = {"issues": "2026-10-16T00:00:00+00:00"}
+    daemon.update_subscription(sub)
+
+    app.flush()
+
+    saved = SubscriptionStorage(config).get_subscription(1)
+    assert saved.enabled is False
+    assert saved.cursors == {"issues": "2026-10-16T00:00:00+00:00"}
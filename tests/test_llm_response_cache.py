@@ -0,0 +1,81 @@
+from llm import response_cache
+from llm.response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def _cache(tmp_path, monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache, "time", clock)
+    return ResponseCache(str(tmp_path / "llm_cache.db"), **kwargs), clock
+
+
+def test_make_key_ignores_key_order_but_not_content():
+    key = ResponseCache.make_key({"model": "m", "messages": [{"role": "user", "content": "hi"}]})
+    assert key == ResponseCache.make_key({"messages": [{"role": "user", "content": "hi"}], "model": "m"})
+    assert key != ResponseCache.make_key({"model": "m", "messages": [{"role": "user", "content": "hello"}]})
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    cache, clock = _cache(tmp_path, monkeypatch, ttl=60)
+    cache.put("k", "answer")
+
+    clock.now += 59
+    assert cache.get("k") == "answer"
+    clock.now += 2
+    assert cache.get("k") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 0}
+
+
+def test_zero_ttl_never_expires(tmp_path, monkeypatch):
+    cache, clock = _cache(tmp_path, monkeypatch, ttl=0)
+    cache.put("k", "answer")
+
+    clock.now += 365 * 24 * 3600
+    assert cache.get("k") == "answer"
+
+
+def test_evicts_least_recently_accessed_entry(tmp_path, monkeypatch):
+    cache, clock = _cache(tmp_path, monkeypatch, max_entries=2)
+    cache.put("a", "A")
+    clock.now += 1
+    cache.put("b", "B")
+    clock.now += 1
+    # 读取a使b成为最久未访问的条目
+    assert cache.get("a") == "A"
+    clock.now += 1
+
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats() == {"hits": 3, "misses": 1, "entries": 2}
+
+
+def test_client_serves_repeated_request_from_cache(config, tmp_path, monkeypatch):
+    from llm.deepseek import DeepSeekClient
+
+    config.set("deepseek.cache.enabled", True)
+    config.set("deepseek.cache.path", str(tmp_path / "llm_cache.db"))
+    config.set("deepseek.stream", False)
+    client = DeepSeekClient("test-key", config)
+    calls = []
+
+    def post(payload):
+        calls.append(payload)
+        return f"answer {len(calls)}"
+
+    monkeypatch.setattr(client, "_post", post)
+    messages = [{"role": "user", "content": "hi"}]
+
+    assert client._call_api(messages) == "answer 1"
+    assert client._call_api(messages) == "answer 1"
+    assert client._call_api([{"role": "user", "content": "other"}]) == "answer 2"
+    assert len(calls) == 2
+    assert client.cache.stats() == {"hits": 1, "misses": 2, "entries": 2}
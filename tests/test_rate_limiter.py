@@ -0,0 +1,63 @@
+import pytest
+
+from github import rate_limiter as rate_limiter_module
+from github.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """替代time模块：sleep只推进虚拟时间并记录等待时长"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module, "time", clock)
+    return clock
+
+
+def _headers(limit: int, remaining: int, reset_at: float):
+    return {"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(reset_at)}
+
+
+def test_plenty_of_quota_is_not_paced(clock):
+    limiter = RateLimiter()
+    limiter.update("core", _headers(5000, 4000, clock.now + 1000))
+
+    for _ in range(3):
+        limiter.acquire("core")
+
+    assert clock.sleeps == []
+
+
+def test_low_remaining_spreads_requests_until_reset(clock):
+    limiter = RateLimiter(reserve=50)
+    # 剩余配额低于20%：扣除保留的50次后，剩余50次均匀分摊到1000秒内
+    limiter.update("core", _headers(5000, 100, clock.now + 1000))
+
+    limiter.acquire("core")
+    limiter.acquire("core")
+
+    assert clock.sleeps == [pytest.approx(20.0)]
+
+
+def test_exhausted_quota_waits_until_reset(clock):
+    limiter = RateLimiter(reserve=50)
+    reset_at = clock.now + 300
+    limiter.update("core", _headers(5000, 50, reset_at))
+
+    limiter.acquire("core")
+
+    assert clock.sleeps == [pytest.approx(301.0)]
+    assert clock.now >= reset_at
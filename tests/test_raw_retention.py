@@ -0,0 +1,100 @@
+from datetime import date, datetime, timedelta
+
+from subscription.raw_retention import RawDataRetention
+from subscription.raw_storage import RawDataStorage
+
+
+def _day_data(current_date: date, pr_ids):
+    updated_at = f"{current_date.isoformat()}T12:00:00Z"
+    return {
+        "repo_info": {"full_name": "octo/repo", "name": "repo"},
+        "releases": [],
+        "pull_requests": [{"id": pr_id, "number": pr_id, "title": f"PR {pr_id}", "updated_at": updated_at}
+                          for pr_id in pr_ids],
+        "issues": [],
+    }
+
+
+def _save(storage: RawDataStorage, current_date: date, pr_ids):
+    day_start = datetime.combine(current_date, datetime.min.time())
+    return storage.save(1, "octo/repo", current_date, day_start, day_start + timedelta(days=1),
+                        data=_day_data(current_date, pr_ids))
+
+
+def _entity_keys(storage: RawDataStorage):
+    with storage.entities._connect() as conn:
+        return set(conn.execute("SELECT kind, id, version FROM entities"))
+
+
+def test_delete_expired_removes_old_files(config):
+    config.set("subscription.retention.delete_after_days", 30)
+    storage = RawDataStorage(config)
+    today = date(2026, 10, 17)
+    _save(storage, today - timedelta(days=40), [1])
+    _save(storage, today - timedelta(days=1), [2])
+
+    deleted = RawDataRetention(config, storage).delete_expired(today)
+
+    assert deleted == 1
+    assert not storage.exists(1, "octo/repo", today - timedelta(days=40))
+    assert storage.load_day(1, "octo/repo", today - timedelta(days=1))["data"]["pull_requests"][0]["id"] == 2
+
+
+def test_delete_expired_prunes_unreferenced_entities(config, monkeypatch):
+    monkeypatch.setattr(RawDataRetention, "PRUNE_GRACE_SECONDS", 0)
+    config.set("subscription.entity_store", True)
+    config.set("subscription.retention.delete_after_days", 30)
+    storage = RawDataStorage(config)
+    today = date(2026, 10, 17)
+    old_day = today - timedelta(days=40)
+    new_day = today - timedelta(days=1)
+    _save(storage, old_day, [1, 2])
+    _save(storage, new_day, [2, 3])
+    # 同一天被重写后，旧文件引用的版本也不再被引用
+    _save(storage, new_day, [3])
+
+    RawDataRetention(config, storage).delete_expired(today)
+
+    assert _entity_keys(storage) == {("pull_requests", 3, f"{new_day.isoformat()}T12:00:00Z")}
+    assert storage.load_day(1, "octo/repo", new_day)["data"]["pull_requests"][0]["id"] == 3
+
+
+def test_delete_expired_keeps_entities_of_archived_files(config):
+    config.set("subscription.entity_store", True)
+    config.set("subscription.retention.compact_after_days", 30)
+    config.set("subscription.retention.delete_after_days", 400)
+    storage = RawDataStorage(config)
+    today = date(2026, 10, 17)
+    archived_day = date(2026, 7, 3)
+    _save(storage, archived_day, [7])
+
+    RawDataRetention(config, storage).apply(today)
+
+    assert _entity_keys(storage) == {("pull_requests", 7, "2026-07-03T12:00:00Z")}
+    assert storage.load_day(1, "octo/repo", archived_day)["data"]["pull_requests"][0]["id"] == 7
+
+
+def test_prune_keeps_versions_written_during_collection(config, monkeypatch):
+    monkeypatch.setattr(RawDataRetention, "PRUNE_GRACE_SECONDS", 0)
+    config.set("subscription.entity_store", True)
+    config.set("subscription.retention.delete_after_days", 30)
+    storage = RawDataStorage(config)
+    today = date(2026, 10, 17)
+    old_day = today - timedelta(days=40)
+    _save(storage, old_day, [1])
+    retention = RawDataRetention(config, storage)
+    collect = retention._referenced_entities
+
+    def collect_then_save():
+        referenced = collect()
+        # 收集引用之后另一个进程保存了引用同一版本的文件，尚未出现在收集结果中
+        data = _day_data(old_day, [1])
+        day_start = datetime.combine(today, datetime.min.time())
+        storage.save(2, "octo/repo", today, day_start, day_start + timedelta(days=1), data=data)
+        return referenced
+
+    monkeypatch.setattr(retention, "_referenced_entities", collect_then_save)
+    retention.delete_expired(today)
+
+    assert _entity_keys(storage) == {("pull_requests", 1, f"{old_day.isoformat()}T12:00:00Z")}
+    assert storage.load_day(2, "octo/repo", today)["data"]["pull_requests"][0]["id"] == 1
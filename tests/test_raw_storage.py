@@ -0,0 +1,107 @@
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from subscription import raw_format
+from subscription.raw_storage import RawDataStorage
+
+
+def _save_day(storage: RawDataStorage, current_date: date, prs, stars: int):
+    day_start = datetime.combine(current_date, datetime.min.time())
+    data = {
+        "repo_info": {"full_name": "octo/repo", "name": "repo", "stargazers_count": stars},
+        "releases": [],
+        "pull_requests": prs,
+        "issues": [],
+    }
+    storage.save(1, "octo/repo", current_date, day_start, day_start + timedelta(days=1), data=data)
+
+
+def _pr(pr_id: int, updated_at: str, title: str):
+    return {"id": pr_id, "number": pr_id, "title": title, "state": "open",
+            "updated_at": updated_at, "body": "x" * 100}
+
+
+@pytest.fixture(params=["json", "jsonl.gz"])
+def storage(request, config):
+    config.set("subscription.raw_format", request.param)
+    return RawDataStorage(config)
+
+
+@pytest.fixture(params=[True, False], ids=["ijson", "fallback"])
+def parser(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(raw_format, "ijson", None)
+    elif raw_format.ijson is None:
+        pytest.skip("未安装ijson")
+
+
+def _merge(storage: RawDataStorage):
+    _save_day(storage, date(2026, 10, 15), [_pr(1, "2026-10-15T08:00:00Z", "old"), _pr(2, "2026-10-15T09:00:00Z", "two")], 10)
+    _save_day(storage, date(2026, 10, 16), [_pr(1, "2026-10-16T08:00:00Z", "new")], 12)
+    return storage.load_merged(1)
+
+
+def test_load_merged_keeps_latest_version(storage, parser):
+    merged = _merge(storage)
+
+    assert merged["subscription_id"] == 1
+    assert merged["repo_full_name"] == "octo/repo"
+    assert merged["data"]["repo_info"]["stargazers_count"] == 12
+    titles = {pr["id"]: pr["title"] for pr in merged["data"]["pull_requests"]}
+    assert titles == {1: "new", 2: "two"}
+    # 合并结果为精简投影
+    assert all("body" not in pr for pr in merged["data"]["pull_requests"])
+
+
+def test_load_merged_resolves_entity_refs(config, parser):
+    config.set("subscription.entity_store", True)
+    merged = _merge(RawDataStorage(config))
+
+    titles = {pr["id"]: pr["title"] for pr in merged["data"]["pull_requests"]}
+    assert titles == {1: "new", 2: "two"}
+
+
+def test_load_merged_without_data(storage):
+    assert storage.load_merged(1) is None
+
+
+def test_missing_file_is_dropped_from_manifest(storage):
+    _save_day(storage, date(2026, 10, 15), [_pr(1, "2026-10-15T08:00:00Z", "one")], 10)
+    _save_day(storage, date(2026, 10, 16), [_pr(2, "2026-10-16T08:00:00Z", "two")], 10)
+    assert storage.exists(1, "octo/repo", date(2026, 10, 15))
+
+    # 文件被手动删除后该日期不再视为已完成，会被重新抓取
+    os.remove(storage.path_for(1, "octo/repo", date(2026, 10, 15)))
+    assert not storage.exists(1, "octo/repo", date(2026, 10, 15))
+    assert storage.manifest.path_for_day(1, "20261015") is None
+
+    os.remove(storage.path_for(1, "octo/repo", date(2026, 10, 16)))
+    assert storage.load_day(1, "octo/repo", date(2026, 10, 16)) is None
+    assert storage.manifest.path_for_day(1, "20261016") is None
+
+
+def test_subscription_files_resolve_shared_snapshot(storage, parser):
+    current_date = date(2026, 10, 15)
+    day_start = datetime.combine(current_date, datetime.min.time())
+    day_end = day_start + timedelta(days=1)
+    data = {"repo_info": {"full_name": "octo/repo", "name": "repo"}, "releases": [],
+            "pull_requests": [_pr(1, "2026-10-15T08:00:00Z", "shared")], "issues": []}
+    snapshot = storage.save_snapshot("octo/repo", current_date, day_start, day_end, data)
+    paths = [storage.save(sub_id, "octo/repo", current_date, day_start, day_end, data=data, snapshot=snapshot)
+             for sub_id in (1, 2)]
+
+    for sub_id, path in zip((1, 2), paths):
+        # 订阅文件只记录快照引用，不内联数据
+        assert "data" not in storage._read(path)
+        raw = storage.load(path)
+        assert raw["subscription_id"] == sub_id
+        assert [pr["title"] for pr in raw["data"]["pull_requests"]] == ["shared"]
+
+        # 流式读取透明地切换到快照文件
+        stream = storage.iter_items(path)
+        kind, header = next(stream)
+        assert kind == "header" and header["subscription_id"] == sub_id
+        assert header["snapshot"] == snapshot
+        assert [(kind, item["title"]) for kind, item in stream] == [("pull_requests", "shared")]
@@ -0,0 +1,169 @@
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from llm.deepseek import DeepSeekAPIError
+from report.generator import AIReportGenerator, _ReportProgress, _SUMMARY_END, _SUMMARY_START
+
+
+def _save_day(storage, current_date: date, prs=()):
+    day_start = datetime.combine(current_date, datetime.min.time())
+    data = {"repo_info": {"full_name": "octo/repo", "name": "repo"},
+            "releases": [], "pull_requests": list(prs), "issues": []}
+    return storage.save(1, "octo/repo", current_date, day_start, day_start + timedelta(days=1), data=data)
+
+
+@pytest.fixture
+def generator(config, tmp_path):
+    config.set("report.output_dir", str(tmp_path / "reports"))
+    return AIReportGenerator(config, None)
+
+
+def test_generate_all_reports_loads_only_pending_files(generator, monkeypatch):
+    storage = generator.raw_storage
+    _save_day(storage, date(2026, 10, 15))
+    pending_path = _save_day(storage, date(2026, 10, 16))
+    existing = generator.daily_report_path(1, "octo/repo", "20261015")
+    with open(existing, "w", encoding="utf-8") as f:
+        f.write("# report")
+
+    loaded = []
+    load = storage.load
+    monkeypatch.setattr(storage, "load", lambda path: loaded.append(path) or load(path))
+    generated = []
+    monkeypatch.setattr(generator, "generate_single_raw_report",
+                        lambda raw_data, recipients=None: generated.append(raw_data) or (False, "skip", None))
+
+    _, total, _ = generator.generate_all_reports()
+
+    assert total == 2
+    # 已有报告的日期不打开原始数据文件
+    assert loaded == [pending_path]
+    assert [raw["time_range"]["start"][:10] for raw in generated] == ["2026-10-16"]
+
+
+class FakeRollupClient:
+    def __init__(self):
+        self.calls = []
+
+    def summarize_rollup(self, daily_summaries, releases, issues, prs):
+        self.calls.append((daily_summaries, releases, issues, prs))
+        return "周期总结"
+
+
+def _write_daily_report(generator, data_date: str, summary: str):
+    with open(generator.daily_report_path(1, "octo/repo", data_date), "w", encoding="utf-8") as f:
+        f.write(f"# 日报\n\n{_SUMMARY_START}\n{summary}\n\n---\n{_SUMMARY_END}\n原始数据")
+
+
+def test_rollup_reuses_daily_summaries_and_loads_only_missing_days(generator, monkeypatch):
+    storage = generator.raw_storage
+    _save_day(storage, date(2026, 10, 13), prs=[{"id": 1, "number": 1, "title": "old"}])
+    _save_day(storage, date(2026, 10, 14), prs=[{"id": 1, "number": 1, "title": "v1"}])
+    _save_day(storage, date(2026, 10, 15), prs=[{"id": 1, "number": 1, "title": "v2"},
+                                                {"id": 2, "number": 2, "title": "new"}])
+    _write_daily_report(generator, "20261013", "13日的总结")
+    # 旧版本写入了调用失败提示的日报不可复用，按没有日报处理
+    _write_daily_report(generator, "20261014", "未能生成总结（超时）")
+
+    loaded = []
+    load_day = storage.load_day
+    monkeypatch.setattr(storage, "load_day",
+                        lambda sub_id, repo, day: loaded.append(day) or load_day(sub_id, repo, day))
+    client = FakeRollupClient()
+    generator.deepseek_client = client
+
+    success, _, report_path = generator.generate_rollup_report(
+        1, start_time=datetime(2026, 10, 13), end_time=datetime(2026, 10, 16)
+    )
+
+    assert success
+    assert loaded == [date(2026, 10, 14), date(2026, 10, 15)]
+    (daily_summaries, releases, issues, prs), = client.calls
+    assert daily_summaries == ["【2026-10-13】\n13日的总结"]
+    # 未生成日报的日期合并原始数据，同一条目保留最后一次出现的版本
+    assert sorted((pr["id"], pr["title"]) for pr in prs) == [(1, "v2"), (2, "new")]
+    assert releases == [] and issues == []
+    with open(report_path, encoding="utf-8") as f:
+        content = f.read()
+    assert "周期总结" in content and "3 天原始数据，其中 1 天使用已生成的日报总结" in content
+
+
+def test_report_progress_writes_partial_file_and_removes_it(tmp_path, monkeypatch):
+    monkeypatch.setattr(_ReportProgress, "FLUSH_INTERVAL", 0)
+    report_path = str(tmp_path / "report.md")
+    updates = []
+    progress = _ReportProgress(report_path, lambda summaries: f"{summaries['releases']}|{summaries['issues_prs']}",
+                               updates.append)
+
+    progress.callback("releases")("发布")
+    progress.callback("issues_prs")("社区")
+    progress.callback("releases")("总结")
+
+    with open(progress.partial_path, encoding="utf-8") as f:
+        assert f.read() == "发布总结|社区"
+    assert updates == ["发布|（生成中…）", "发布|社区", "发布总结|社区"]
+
+    progress.finish("完整报告")
+    assert not os.path.exists(progress.partial_path)
+    assert updates[-1] == "完整报告"
+
+
+def test_report_progress_throttles_partial_writes(tmp_path):
+    progress = _ReportProgress(str(tmp_path / "report.md"), lambda summaries: summaries["releases"])
+    for text in ("a", "b", "c"):
+        progress.callback("releases")(text)
+
+    # 间隔内的后续内容只累积，不重写部分文件
+    with open(progress.partial_path, encoding="utf-8") as f:
+        assert f.read() == "a"
+    assert progress.summaries["releases"] == "abc"
+    progress.discard()
+    assert not os.path.exists(progress.partial_path)
+
+
+class FakeStreamingClient:
+    stream = True
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+
+    def summarize_releases(self, releases, on_token=None):
+        on_token("发布总结")
+        return "发布总结"
+
+    def summarize_issues_prs(self, issues, prs, on_token=None):
+        on_token("社区")
+        if self.fail:
+            raise DeepSeekAPIError("连接中断")
+        on_token("总结")
+        return "社区总结"
+
+
+@pytest.mark.parametrize("fail", [False, True], ids=["finished", "failed"])
+def test_streamed_report_partial_file_lifecycle(generator, monkeypatch, fail):
+    monkeypatch.setattr(_ReportProgress, "FLUSH_INTERVAL", 0)
+    storage = generator.raw_storage
+    raw_data = storage.load(_save_day(storage, date(2026, 10, 16)))
+    report_path = generator.daily_report_path(1, "octo/repo", "20261016")
+    partial_path = f"{report_path}.partial"
+    generator.deepseek_client = FakeStreamingClient(fail)
+    updates = []
+
+    def on_progress(content):
+        updates.append((content, os.path.exists(partial_path), os.path.exists(report_path)))
+
+    success, _, path = generator.generate_single_raw_report(raw_data, on_progress=on_progress)
+
+    # 生成过程中只写部分文件，正式报告在完成后才出现
+    assert updates[0][1:] == (True, False)
+    assert not os.path.exists(partial_path)
+    if fail:
+        assert not success and path is None
+        assert not os.path.exists(report_path)
+    else:
+        assert success and path == report_path
+        with open(report_path, encoding="utf-8") as f:
+            content = f.read()
+        assert "社区总结" in content and updates[-1] == (content, False, True)
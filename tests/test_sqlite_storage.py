@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from subscription.models import Subscription
+from subscription.sqlite_storage import SQLiteSubscriptionStorage
+from subscription.storage import SubscriptionStorage, create_subscription_storage
+
+
+def test_add_subscription_assigns_unique_ids(config, tmp_path):
+    config.set("subscription.sqlite_path", str(tmp_path / "subscriptions.db"))
+    first_process = SQLiteSubscriptionStorage(config)
+    second_process = SQLiteSubscriptionStorage(config)
+
+    # 两个进程取到相同的候选ID
+    subs = [
+        Subscription(id=storage.get_next_id(), repo_full_name=repo, subscribers=[], created_at=datetime.now())
+        for storage, repo in ((first_process, "octo/a"), (second_process, "octo/b"))
+    ]
+    assert subs[0].id == subs[1].id
+
+    first_process.add_subscription(subs[0])
+    second_process.add_subscription(subs[1])
+
+    assert subs[0].id != subs[1].id
+    assert {sub.repo_full_name for sub in first_process.load_subscriptions()} == {"octo/a", "octo/b"}
+    assert second_process.get_subscription(subs[1].id).repo_full_name == "octo/b"
+
+
+def test_json_migration_runs_once(config, tmp_path):
+    config.set("subscription.storage_backend", "sqlite")
+    config.set("subscription.sqlite_path", str(tmp_path / "subscriptions.db"))
+    json_storage = SubscriptionStorage(config)
+    json_storage.save_subscriptions([
+        Subscription(id=1, repo_full_name="octo/a", subscribers=[], created_at=datetime.now())
+    ])
+
+    storage = create_subscription_storage(config)
+    assert [sub.id for sub in storage.load_subscriptions()] == [1]
+
+    # 删光订阅后重启，不会再从JSON文件导入
+    assert storage.delete_subscription(1)
+    assert create_subscription_storage(config).load_subscriptions() == []
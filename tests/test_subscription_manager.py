@@ -0,0 +1,225 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from core.file_lock import LeaseManager
+from github.client import GitHubClient
+from subscription.manager import SubscriptionManager
+from subscription.models import Subscription
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FakeGitHubClient(GitHubClient):
+    """按窗口过滤预置条目的GitHub客户端，记录每次列表请求的窗口"""
+
+    def __init__(self):
+        super().__init__("test-token")
+        self.items = {"releases": [], "pull_requests": [], "issues": []}
+        self.calls = []
+
+    def _list(self, kind, time_field, start_time, end_time):
+        self.calls.append((kind, start_time, end_time))
+        start_utc = self._ensure_utc_timezone(start_time)
+        end_utc = self._ensure_utc_timezone(end_time)
+        return [
+            item for item in self.items[kind]
+            if start_utc <= self._parse_github_datetime(item[time_field]) <= end_utc
+        ]
+
+    def get_repo_info(self, repo_full_name):
+        return {"full_name": repo_full_name, "name": repo_full_name.split("/")[1]}
+
+    def get_latest_releases(self, repo_full_name, start_time=None, end_time=None, limit=None):
+        return self._list("releases", "published_at", start_time, end_time)
+
+    def get_recent_pull_requests(self, repo_full_name, start_time=None, end_time=None, limit=None):
+        return self._list("pull_requests", "updated_at", start_time, end_time)
+
+    def get_recent_issues(self, repo_full_name, start_time=None, end_time=None, limit=None):
+        return self._list("issues", "updated_at", start_time, end_time)
+
+
+@pytest.fixture
+def client():
+    return FakeGitHubClient()
+
+
+@pytest.fixture
+def manager(config, client):
+    manager = SubscriptionManager(config, client)
+    manager.storage.save_subscriptions([
+        Subscription(id=1, repo_full_name="octo/repo", subscribers=[], created_at=datetime.now())
+    ])
+    return manager
+
+
+def _window(start: date, end: date):
+    return (datetime.combine(start, datetime.min.time(), tzinfo=timezone.utc),
+            datetime.combine(end, datetime.max.time(), tzinfo=timezone.utc))
+
+
+def test_repo_group_skips_days_leased_by_other_process(config, manager, client):
+    other_process = LeaseManager(config.get("subscription.lease_dir"))
+    assert other_process.claim("sub1_20261016")
+    start_time, end_time = _window(date(2026, 10, 15), date(2026, 10, 16))
+
+    (ok, message, paths), = manager._process_repo_group(
+        [manager.get_subscription(1)], start_time, end_time, backfill=False
+    )
+
+    assert ok
+    assert "成功: 1" in message and "已跳过: 1" in message
+    assert manager.raw_storage.exists(1, "octo/repo", date(2026, 10, 15))
+    assert not manager.raw_storage.exists(1, "octo/repo", date(2026, 10, 16))
+    # 只抓取了未被占用的日期
+    assert {start.date() for _, start, _ in client.calls} == {date(2026, 10, 15)}
+    # 本进程认领的租约已释放，他人的租约保持不变
+    assert manager.leases.claim("sub1_20261015")
+    assert not manager.leases.claim("sub1_20261016")
+
+
+def test_incremental_run_skips_subscription_leased_by_other_process(config, manager, client):
+    other_process = LeaseManager(config.get("subscription.lease_dir"))
+    with other_process.lease("sub1_incremental"):
+        ok, _, paths = manager.process_incremental_subscription(manager.get_subscription(1))
+
+    assert not ok and paths == []
+    assert client.calls == []
+
+
+def test_incremental_cursors_advance_per_endpoint(manager, client):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    pr_time = now - timedelta(hours=2)
+    client.items["pull_requests"] = [{"id": 10, "number": 10, "title": "PR", "updated_at": _iso(pr_time)}]
+
+    ok, _, paths = manager.process_incremental_subscription(manager.get_subscription(1), now=now)
+
+    assert ok
+    assert len(paths) == 1
+    cursors = manager.get_subscription(1).cursors
+    skewed_end = now - timedelta(seconds=manager.cursor_skew)
+    # 没有新条目的类型也推进到 抓取截止时间 - 时钟偏差
+    assert datetime.fromisoformat(cursors["releases"]) == skewed_end
+    assert datetime.fromisoformat(cursors["issues"]) == skewed_end
+    assert datetime.fromisoformat(cursors["pull_requests"]) == skewed_end
+
+    # 下一次运行每类数据从各自的水位线开始抓取，并且不重写没有新条目的日期
+    client.calls.clear()
+    client.items["issues"] = [{"id": 20, "number": 20, "title": "Issue", "updated_at": _iso(now + timedelta(minutes=30))}]
+    later = now + timedelta(hours=1)
+    ok, message, paths = manager.process_incremental_subscription(manager.get_subscription(1), now=later)
+
+    assert ok
+    assert {kind: start for kind, start, _ in client.calls} == {
+        kind: skewed_end for kind in ("releases", "pull_requests", "issues")
+    }
+    assert "新条目: 1" in message
+    assert len(paths) == 1
+    cursors = manager.get_subscription(1).cursors
+    assert datetime.fromisoformat(cursors["issues"]) == later - timedelta(seconds=manager.cursor_skew)
+
+
+def test_incremental_cursor_stays_behind_skew_window(manager, client):
+    # 固定在当天中午，偏差窗口内的条目都落在同一天
+    now = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
+    # 时钟偏差窗口内的条目不会把水位线推过 截止时间 - 偏差
+    pr_time = now - timedelta(seconds=10)
+    client.items["pull_requests"] = [{"id": 10, "number": 10, "title": "PR", "updated_at": _iso(pr_time)}]
+
+    assert manager.process_incremental_subscription(manager.get_subscription(1), now=now)[0]
+
+    skewed_end = now - timedelta(seconds=manager.cursor_skew)
+    cursors = manager.get_subscription(1).cursors
+    assert datetime.fromisoformat(cursors["pull_requests"]) == skewed_end
+
+    # GitHub稍后才返回的、早于该条目的更新在下一次运行中仍会被抓取，重叠的条目按id去重
+    late_time = now - timedelta(seconds=60)
+    client.items["pull_requests"].append(
+        {"id": 11, "number": 11, "title": "Late PR", "updated_at": _iso(late_time)}
+    )
+    ok, message, _ = manager.process_incremental_subscription(
+        manager.get_subscription(1), now=now + timedelta(minutes=1)
+    )
+
+    assert ok
+    day = manager.raw_storage.load_day(1, "octo/repo", late_time.date())
+    assert sorted(pr["id"] for pr in day["data"]["pull_requests"]) == [10, 11]
+
+
+def test_incremental_failure_keeps_cursors(manager, client):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    client.get_recent_issues = lambda *args, **kwargs: (_ for _ in ()).throw(RuntimeError("boom"))
+
+    ok, message, _ = manager.process_incremental_subscription(manager.get_subscription(1), now=now)
+
+    assert not ok and "boom" in message
+    assert manager.get_subscription(1).cursors == {}
+
+
+def test_incremental_exception_does_not_abort_other_subscriptions(manager, client):
+    manager.storage.add_subscription(
+        Subscription(id=2, repo_full_name="octo/other", subscribers=[], created_at=datetime.now())
+    )
+    process = manager.process_incremental_subscription
+
+    def flaky(sub, now=None):
+        if sub.id == 1:
+            raise OSError("lease lock timeout")
+        return process(sub, now)
+
+    manager.process_incremental_subscription = flaky
+    results = manager.process_all_subscriptions(incremental=True, max_concurrent=2)
+
+    assert not results[0][0] and "lease lock timeout" in results[0][1]
+    assert results[1][0]
+
+
+def test_backfill_fetches_range_once_and_buckets_by_day(manager, client):
+    client.items["pull_requests"] = [
+        {"id": 1, "number": 1, "title": "PR 1", "updated_at": "2026-10-14T23:59:59Z"},
+        {"id": 2, "number": 2, "title": "PR 2", "updated_at": "2026-10-16T00:00:00Z"},
+    ]
+    client.items["releases"] = [
+        {"id": 3, "tag_name": "v3", "created_at": "2026-10-10T08:00:00Z", "published_at": "2026-10-15T12:00:00Z"},
+    ]
+    start_time, end_time = _window(date(2026, 10, 14), date(2026, 10, 16))
+
+    (ok, _, paths), = manager._process_repo_group(
+        [manager.get_subscription(1)], start_time, end_time, backfill=True
+    )
+
+    assert ok and len(paths) == 3
+    # 每类数据对整个范围只请求一次
+    assert sorted(kind for kind, _, _ in client.calls) == ["issues", "pull_requests", "releases"]
+
+    def day(d):
+        return manager.raw_storage.load_day(1, "octo/repo", d)["data"]
+
+    assert [pr["id"] for pr in day(date(2026, 10, 14))["pull_requests"]] == [1]
+    assert [r["id"] for r in day(date(2026, 10, 15))["releases"]] == [3]
+    assert day(date(2026, 10, 15))["pull_requests"] == []
+    assert [pr["id"] for pr in day(date(2026, 10, 16))["pull_requests"]] == [2]
+
+
+def test_subscriptions_of_same_repo_share_one_fetch_and_snapshot(manager, client):
+    manager.storage.add_subscription(
+        Subscription(id=2, repo_full_name="octo/repo", subscribers=[], created_at=datetime.now())
+    )
+    client.items["issues"] = [{"id": 5, "number": 5, "title": "Issue", "updated_at": "2026-10-15T10:00:00Z"}]
+    start_time, end_time = _window(date(2026, 10, 15), date(2026, 10, 15))
+
+    results = manager._process_repo_group(
+        [manager.get_subscription(1), manager.get_subscription(2)], start_time, end_time
+    )
+
+    assert all(ok for ok, _, _ in results)
+    assert len(client.calls) == 3
+    paths = [path for _, _, sub_paths in results for path in sub_paths]
+    snapshots = {manager.raw_storage._read(path)["snapshot"] for path in paths}
+    assert len(snapshots) == 1
+    for sub_id in (1, 2):
+        day = manager.raw_storage.load_day(sub_id, "octo/repo", date(2026, 10, 15))
+        assert [issue["id"] for issue in day["data"]["issues"]] == [5]
@@ -0,0 +1,47 @@
+from github.client import GitHubClient
+from github.rate_limiter import RateLimiter
+from github.token_pool import TokenPool
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = {}
+        self.links = {}
+        self.text = ""
+        self.encoding = None
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        pass
+
+
+def test_select_prefers_token_with_most_headroom():
+    limiter = RateLimiter()
+    pool = TokenPool(["token-a", "token-b", "token-a", ""], limiter)
+    limiter.update(pool.bucket_key("token-a", "core"), {"X-RateLimit-Remaining": "100"})
+    limiter.update(pool.bucket_key("token-b", "core"), {"X-RateLimit-Remaining": "4000"})
+
+    assert pool.tokens == ["token-a", "token-b"]
+    assert pool.select("core") == "token-b"
+
+
+def test_unauthorized_token_is_quarantined_and_next_token_used(monkeypatch):
+    client = GitHubClient(["bad-token", "good-token"])
+    used = []
+
+    def get(url, headers=None, params=None, timeout=None):
+        token = headers["Authorization"].split()[-1]
+        used.append(token)
+        return FakeResponse(401) if token == "bad-token" else FakeResponse(200, {"full_name": "octo/repo"})
+
+    monkeypatch.setattr("github.client.requests.get", get)
+
+    assert client.get_repo_info("octo/repo") == {"full_name": "octo/repo"}
+    assert client.get_repo_info("octo/repo") == {"full_name": "octo/repo"}
+    # 失效令牌只尝试一次，隔离后不再参与调度
+    assert used == ["bad-token", "good-token", "good-token"]
+    assert client.token_pool.select("core") == "good-token"